@@ -106,21 +106,157 @@ except ImportError:
     print("Run: python setup.py install")
     exit(1)
 
-from src.pitherm.hardware import HardwareController
-from src.pitherm.monitor import Monitor
-from src.pitherm.logging_service import start_scheduler
-from src.pitherm.config import validate_env
+from src.pitherm.startup import STARTUP
 
-validate_env()
+# Only what the first reading needs is imported here; the multi-process,
+# stream and web modules are imported when enabled, and the heavy sink
+# dependencies (openpyxl, requests, smtplib) on first use.
+with STARTUP.stage("imports"):
+    from src.pitherm.hardware import HardwareController
+    from src.pitherm.monitor import Monitor
+    from src.pitherm.logging_service import start_scheduler
+    from src.pitherm.dashboard import stop_uploader
+    from src.pitherm.alert import stop_dispatcher
+    from src.pitherm.metrics import start_metrics_server
+    from src.pitherm.writebuffer import WRITE_BUFFER
+    from src.pitherm.scheduler import Scheduler
+    from src.pitherm.snapshot import StateSnapshot
+    from src.pitherm.watchdog import WATCHDOG
+    from src.pitherm.rules import validate_rules
+    from src.pitherm.config import (
+        validate_env,
+        REQUIRED_ENV_VARS,
+        FLEET_REQUIRED_ENV_VARS,
+        RUN_MODE,
+        METRICS_ENABLED,
+        METRICS_HOST,
+        METRICS_PORT,
+        ROLLUP_PRUNE_SCHEDULE,
+        HEARTBEAT_SCHEDULE,
+        ACQUISITION_SCHEDULER_STATE_FILE,
+        STREAM_ENABLED,
+        STREAM_SOCKET_PATH,
+        STREAM_HOST,
+        STREAM_PORT,
+        WEB_ENABLED,
+        WEB_HOST,
+        WEB_PORT,
+        SNAPSHOT_ENABLED,
+        FLEET_SERVER,
+        FLEET_NODE_NAME,
+        WATCHDOG_ENABLED
+    )
+
+validate_env(REQUIRED_ENV_VARS + FLEET_REQUIRED_ENV_VARS if FLEET_SERVER else REQUIRED_ENV_VARS)
+validate_rules()
+
+def start_watchdog(hardware, scheduler, supervisor, fleet):
+    # The uploader and alert dispatcher register themselves when first
+    # used. The main loop and sensor reads are critical: a stall there
+    # stops the systemd watchdog pings.
+    WATCHDOG.register("main_loop", critical=True, periodic=True)
+    WATCHDOG.register("sensor_read", critical=True)
+
+    if supervisor is not None:
+        WATCHDOG.register("publish")
+    else:
+        WATCHDOG.register("log_to_excel")
+        WATCHDOG.register("send_to_adafruit")
+
+    WATCHDOG.register("write_buffer", worker=WRITE_BUFFER)
+    WATCHDOG.register("scheduler", worker=scheduler)
+    if hardware.lcd_renderer is not None:
+        WATCHDOG.register("lcd", worker=hardware.lcd_renderer)
+    if fleet is not None:
+        WATCHDOG.register("fleet", worker=fleet)
+
+    WATCHDOG.start()
 
 def main():
     print(f"[START] Using python: {sys.executable}")
 
-    hardware = HardwareController()
-    monitor = Monitor(hardware)
+    # Replays rows staged before a crash ahead of anything reading the logs.
+    with STARTUP.stage("write_buffer"):
+        WRITE_BUFFER.start()
+
+    with STARTUP.stage("hardware"):
+        hardware = HardwareController()
+    supervisor = None
+
+    snapshot = None
+    if SNAPSHOT_ENABLED:
+        with STARTUP.stage("snapshot"):
+            snapshot = StateSnapshot([config.name for config in hardware.sensor_configs])
+
+    with STARTUP.stage("monitor"):
+        if RUN_MODE == "multiprocess":
+            from src.pitherm.processes import SinkSupervisor
+
+            # Logging, upload and alerting run in their own processes; the
+            # archive and report jobs run in the logging process.
+            restored = snapshot.restored if snapshot is not None else None
+            supervisor = SinkSupervisor(hardware.sensor_configs, restored=restored)
+            supervisor.start()
+            monitor = Monitor(hardware, publisher=supervisor.publish, snapshot=snapshot)
+            supervisor.state_source = monitor.sink_state
+
+            scheduler = Scheduler(state_file=ACQUISITION_SCHEDULER_STATE_FILE)
+            scheduler.start()
+            scheduler.add("process_health", HEARTBEAT_SCHEDULE, supervisor.report, catch_up=False)
+        else:
+            monitor = Monitor(hardware, snapshot=snapshot)
+            scheduler = start_scheduler()
+
+        scheduler.add("rollup_prune", ROLLUP_PRUNE_SCHEDULE, monitor.rollups.prune)
+        scheduler.add("heartbeat", HEARTBEAT_SCHEDULE, monitor.heartbeat, catch_up=False)
+        monitor.listeners.append(STARTUP.on_reading)
+
+    with STARTUP.stage("servers"):
+        if METRICS_ENABLED:
+            start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+        stream = None
+        if STREAM_ENABLED:
+            from src.pitherm.stream import StreamServer
+
+            stream = StreamServer(unix_path=STREAM_SOCKET_PATH, tcp_address=(STREAM_HOST, STREAM_PORT))
+            stream.start()
+            monitor.listeners.append(stream.publish)
+
+        if WEB_ENABLED:
+            from src.pitherm.web import start_web_dashboard
 
-    start_scheduler()
-    monitor.run()
+            start_web_dashboard(monitor, WEB_HOST, WEB_PORT)
+
+        fleet = None
+        if FLEET_SERVER:
+            from src.pitherm.fleet import FleetClient, parse_address
+
+            fleet = FleetClient(parse_address(FLEET_SERVER), FLEET_NODE_NAME, hardware.sensor_configs)
+            fleet.start()
+            monitor.listeners.append(fleet.submit)
+
+    if WATCHDOG_ENABLED:
+        start_watchdog(hardware, scheduler, supervisor, fleet)
+
+    try:
+        if RUN_MODE == "async":
+            monitor.run_async()
+        else:
+            monitor.run()
+    finally:
+        scheduler.stop()
+        if stream is not None:
+            stream.stop()
+        if fleet is not None:
+            fleet.stop()
+        if supervisor is not None:
+            supervisor.stop()
+        stop_uploader()
+        stop_dispatcher()
+        WRITE_BUFFER.close()
+        if snapshot is not None:
+            snapshot.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Fleet aggregator: collects readings from PiTherm nodes that have
+PITHERM_FLEET_SERVER pointed at this host, and runs alerting, logging,
+archiving and the monthly report for all of them centrally.
+
+Run it from its own directory; it writes logs/ like a node does, with
+sensors named "node/sensor".
+"""
+import sys
+
+def is_venv():
+    return sys.prefix != sys.base_prefix
+
+if not is_venv():
+    print("[ERROR] Not running inside a virtual environment.")
+    print("[HINT] Activate your venv first, then run: python PiThermAggregator.py")
+    exit(1)
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    print("[ERROR] Required dependencies not installed.")
+    print("Run: python setup.py install")
+    exit(1)
+
+from src.pitherm.fleet import FleetAggregator
+from src.pitherm.logging_service import start_scheduler
+from src.pitherm.alert import stop_dispatcher
+from src.pitherm.metrics import start_metrics_server
+from src.pitherm.writebuffer import WRITE_BUFFER
+from src.pitherm.rules import validate_rules
+from src.pitherm.config import (
+    validate_env,
+    AGGREGATOR_REQUIRED_ENV_VARS,
+    METRICS_ENABLED,
+    METRICS_HOST,
+    FLEET_METRICS_PORT,
+    FLEET_HOST,
+    FLEET_PORT,
+    HEARTBEAT_SCHEDULE
+)
+
+validate_env(AGGREGATOR_REQUIRED_ENV_VARS)
+validate_rules()
+
+def main():
+    print(f"[START] Using python: {sys.executable}")
+
+    WRITE_BUFFER.start("aggregator")
+
+    aggregator = FleetAggregator(FLEET_HOST, FLEET_PORT)
+    scheduler = start_scheduler(report=aggregator.monthly_report)
+    scheduler.add("fleet_report", HEARTBEAT_SCHEDULE, aggregator.report, catch_up=False)
+
+    if METRICS_ENABLED:
+        start_metrics_server(METRICS_HOST, FLEET_METRICS_PORT)
+
+    try:
+        aggregator.run()
+    except KeyboardInterrupt:
+        print("\n[STOP] Aggregator stopped by user.")
+    finally:
+        scheduler.stop()
+        stop_dispatcher()
+        WRITE_BUFFER.close()
+
+if __name__ == "__main__":
+    main()
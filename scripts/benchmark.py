@@ -0,0 +1,172 @@
+# Benchmark Suite for the Monitoring Pipeline
+#
+# Run from the project root:
+#   python -m scripts.benchmark            compare against the stored baseline
+#   python -m scripts.benchmark --save     record a new baseline
+#
+# Record the baseline on the Pi itself; numbers from a desktop are not
+# comparable.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SMTP_HOST", "127.0.0.1")
+os.environ.setdefault("SMTP_PORT", "25")
+
+# Empty rather than unset, so load_dotenv() does not fill them in from
+# .env: the benchmark must never upload to the live Adafruit IO account.
+os.environ["ADAFRUIT_IO_USERNAME"] = ""
+os.environ["ADAFRUIT_IO_KEY"] = ""
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(PROJECT_ROOT, "scripts", "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.pitherm import logging_service
+from src.pitherm.hardware import HardwareController
+from src.pitherm.journal import ReadingJournal, JOURNAL_HEADER
+from src.pitherm.monitor import Monitor
+from src.pitherm.report import build_report
+from src.pitherm.sensors import SensorConfig
+from src.pitherm.simulation import SimClock, SyntheticSensor
+
+def quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+def bench_process_reading(readings=2000):
+    config = SensorConfig("bench", temp_high=100.0, temp_low=-100.0)
+    sensor = SyntheticSensor(config, spike_chance=0.05, clock=SimClock(speed=30), seed=1)
+
+    with quiet():
+        hardware = HardwareController([config])
+        monitor = Monitor(hardware)
+        samples = [sensor.read() for _ in range(readings)]
+
+        start = time.perf_counter()
+        for temp, hum in samples:
+            monitor.process_reading(temp, hum, sensor="bench")
+        elapsed = time.perf_counter() - start
+
+        monitor.rollups.close()
+
+    return {"process_reading_per_sec": round(readings / elapsed, 1)}
+
+def prefill_journal(rows):
+    journal = ReadingJournal(logging_service.CURRENT_DIR)
+    when = datetime.now() - timedelta(seconds=rows)
+
+    with quiet():
+        for i in range(rows):
+            journal.append(22.0 + (i % 50) / 10, 45.0, when=when + timedelta(seconds=i))
+    journal.close()
+
+def bench_log_to_excel(sizes=(1, 10000, 100000), calls=200):
+    results = {}
+
+    for rows in sizes:
+        shutil.rmtree(logging_service.BASE_LOG_DIR, ignore_errors=True)
+        logging_service._journal.close()
+        prefill_journal(rows)
+
+        with quiet():
+            start = time.perf_counter()
+            for _ in range(calls):
+                logging_service.log_to_excel(23.4, 45.6)
+            elapsed = time.perf_counter() - start
+
+        results[f"log_to_excel_ms@{rows}"] = round(elapsed / calls * 1000, 3)
+
+    logging_service._journal.close()
+    return results
+
+def bench_report(days=31, sensors=("main",)):
+    path = "bench_journal.csv"
+    start_time = datetime(2026, 1, 1)
+
+    with open(path, "w") as file:
+        file.write(",".join(JOURNAL_HEADER) + "\n")
+        for step in range(days * 24 * 12):
+            timestamp = int((start_time + timedelta(minutes=5 * step)).timestamp())
+            for sensor in sensors:
+                file.write(f"{timestamp},{22.0 + (step % 100) / 20},45.0,{sensor}\n")
+
+    with quiet():
+        result = build_report(path, "bench_report.xlsx", summary=True, compress=True)
+
+    return {
+        "report_seconds": result["seconds"],
+        "report_rows": result["rows"]
+    }
+
+def compare(results, baseline, tolerance):
+    regressions = []
+
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None or name.endswith("_rows"):
+            continue
+
+        # Throughput should not drop, latencies should not grow.
+        higher_is_better = name.endswith("_per_sec")
+        change = (value - base) / base if base else 0.0
+        worse = -change if higher_is_better else change
+        marker = "REGRESSION" if worse > tolerance else "ok"
+
+        if worse > tolerance:
+            regressions.append(name)
+        print(f"[BENCH] {name:32} {value:>12} (baseline {base}, {change:+.0%}) {marker}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="PiTherm pipeline benchmarks")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-row case")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pitherm-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        results = {}
+        results.update(bench_process_reading())
+        results.update(bench_log_to_excel(sizes=(1, 10000) if args.quick else (1, 10000, 100000)))
+        results.update(bench_report())
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=4)
+        for name, value in results.items():
+            print(f"[BENCH] {name:32} {value:>12}")
+        print(f"[BENCH] Baseline saved to {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r") as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"[BENCH] {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print("[BENCH] No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
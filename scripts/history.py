@@ -0,0 +1,92 @@
+# Query the Historical Reading Store
+#
+#   python -m scripts.history import
+#   python -m scripts.history stats 2026-01-01 2026-03-31
+#   python -m scripts.history stats 2026-03-01 2026-03-31 --bucket day --sensor rack_front
+#   python -m scripts.history rows "2026-03-04 10:00" "2026-03-04 12:00"
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from src.pitherm.logging_service import CURRENT_DIR, ARCHIVE_DIR
+from src.pitherm.store import ReadingStore, STORE_PATH, import_logs
+
+BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+def parse_when(value):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Invalid date: {value}")
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def end_of(value, when):
+    # A bare date as the end of a range means the whole day.
+    if len(value) == 10:
+        return when.timestamp() + 86399
+    return when.timestamp()
+
+def main():
+    parser = argparse.ArgumentParser(description="PiTherm historical store")
+    parser.add_argument("--db", default=STORE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("import", help="bulk import archived workbooks, journals and CSV fallbacks")
+    commands.add_parser("info", help="show the stored range")
+
+    for name in ("stats", "rows"):
+        command = commands.add_parser(name)
+        command.add_argument("start")
+        command.add_argument("end")
+        command.add_argument("--sensor")
+        if name == "stats":
+            command.add_argument("--bucket", choices=sorted(BUCKETS))
+        else:
+            command.add_argument("--limit", type=int, default=1000)
+
+    args = parser.parse_args()
+    store = ReadingStore(args.db)
+
+    if args.command == "import":
+        import_logs(store, [ARCHIVE_DIR, CURRENT_DIR])
+        return 0
+
+    if args.command == "info":
+        first, last, count = store.extent()
+        if not count:
+            print("[INFO] Store is empty. Run: python -m scripts.history import")
+        else:
+            print(f"[INFO] {count} readings from {format_ts(first)} to {format_ts(last)}")
+        return 0
+
+    start = parse_when(args.start).timestamp()
+    end = end_of(args.end, parse_when(args.end))
+    started = time.perf_counter()
+
+    if args.command == "rows":
+        rows = store.query(start, end, sensor=args.sensor, limit=args.limit)
+        for ts, sensor, temp, hum in rows:
+            print(f"{format_ts(ts)}  {sensor:12}  {temp:6.1f}°C  {hum:5.1f}%")
+        count = len(rows)
+    else:
+        results = store.aggregate(start, end, sensor=args.sensor, bucket_seconds=BUCKETS.get(args.bucket))
+        for row in results:
+            prefix = f"{format_ts(row['bucket'])}  " if "bucket" in row else ""
+            print(
+                f"{prefix}{row['sensor']:12}  n={row['count']:<7} "
+                f"temp min {row['temp_min']:.1f} max {row['temp_max']:.1f} mean {row['temp_mean']:.2f}  "
+                f"hum min {row['hum_min']:.1f} max {row['hum_max']:.1f} mean {row['hum_mean']:.2f}"
+            )
+        count = len(results)
+
+    print(f"[INFO] {count} result(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Live Reading Stream Client
+#
+#   python -m scripts.stream_client                      Unix socket, live only
+#   python -m scripts.stream_client --replay 100         last 100 readings first
+#   python -m scripts.stream_client --tcp 127.0.0.1:9109
+
+import argparse
+import sys
+from datetime import datetime
+
+from src.pitherm.config import STREAM_SOCKET_PATH
+from src.pitherm.stream import subscribe, read_frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the PiTherm live reading stream")
+    parser.add_argument("--unix", default=STREAM_SOCKET_PATH)
+    parser.add_argument("--tcp", help="host:port instead of the Unix socket")
+    parser.add_argument("--replay", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.tcp:
+        host, _, port = args.tcp.rpartition(":")
+        address = (host, int(port))
+    else:
+        address = args.unix
+
+    sock = subscribe(address, replay=args.replay)
+
+    try:
+        for reading in read_frames(sock):
+            when = datetime.fromtimestamp(reading["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"#{reading['seq']:<8} {when}  {reading['sensor']:12}  {reading['temperature']:6.1f}°C  {reading['humidity']:5.1f}%")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+    print("[INFO] Stream closed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
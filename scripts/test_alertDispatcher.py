@@ -0,0 +1,84 @@
+# Script for Testing Alert Coalescing and SMTP Session Reuse against a Local SMTP Stand-in
+
+import os
+import socketserver
+import threading
+import time
+
+os.environ.setdefault("SMTP_FROM", "pitherm@localhost")
+os.environ.setdefault("SMTP_RECIPIENT", "ops@localhost")
+
+from src.pitherm.alert import AlertDispatcher
+from src.pitherm.smtp_client import SMTPClient
+
+print("[DEBUG] Initiating Script")
+
+connections = []
+messages = []
+accepting = threading.Event()
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        connections.append(self.client_address)
+        self.reply("220 stub ready")
+
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+
+            command = line.split(" ")[0].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                data = []
+                while True:
+                    chunk = self.rfile.readline().decode()
+                    if chunk.strip() == ".":
+                        break
+                    data.append(chunk)
+                if accepting.is_set():
+                    messages.append("".join(data))
+                    self.reply("250 queued")
+                else:
+                    self.reply("451 try again later")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+def debug():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubSMTPHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = SMTPClient(keepalive_seconds=30, host="127.0.0.1", port=server.server_address[1], starttls=False)
+    dispatcher = AlertDispatcher(client=client, coalesce_seconds=1, retry_backoff=0.5)
+    dispatcher.start()
+
+    print("[DEBUG] Firing a burst of alerts while the relay rejects mail.")
+    for temp in (25.2, 25.6, 26.1):
+        dispatcher.submit(temp, 45.0, "high")
+    time.sleep(2)
+
+    print("[DEBUG] Relay accepting again.")
+    accepting.set()
+    time.sleep(2)
+
+    dispatcher.submit(18.5, 40.0, "low")
+    time.sleep(2)
+
+    dispatcher.stop()
+    server.shutdown()
+
+    print("[DEBUG] Stats:", dispatcher.get_stats())
+    print(f"[DEBUG] {len(messages)} emails delivered over {len(connections)} SMTP connections.")
+
+if __name__ == "__main__":
+    debug()
@@ -0,0 +1,107 @@
+# Script for Testing the Fleet Aggregator with Simulated Nodes on Localhost
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# The aggregator writes logs/ relative to the working directory.
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("PITHERM_STAGING_DIR", "off")
+os.environ.setdefault("PITHERM_FLEET_SECRET", "test-secret")
+
+from src.pitherm.fleet import FleetAggregator, FleetClient
+from src.pitherm.sensors import SensorConfig
+from src.pitherm.alert import stop_dispatcher
+from src.pitherm.archive import ArchiveMonth, archive_filename
+from src.pitherm.logging_service import CURRENT_DIR, ARCHIVE_DIR, closed_month, compact_month
+from src.pitherm.writebuffer import WRITE_BUFFER
+
+print("[DEBUG] Initiating Script")
+
+NODES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+SENSORS = ("front", "back")
+READINGS = 30
+
+def debug():
+    configs = [SensorConfig(name, temp_high=40.0, temp_low=5.0) for name in SENSORS]
+    clients = [
+        FleetClient(
+            ("127.0.0.1", 0),
+            f"room{i:03d}",
+            configs,
+            batch_size=10,
+            flush_seconds=0.5,
+            spool_path=os.path.join("spool", f"room{i:03d}.jsonl")
+        )
+        for i in range(NODES)
+    ]
+
+    # Half the readings are submitted before the aggregator is up, so they
+    # go through each node's spool.
+    start = time.time() - READINGS * 30
+    for step in range(READINGS):
+        if step == READINGS // 2:
+            time.sleep(1)
+            aggregator = FleetAggregator("127.0.0.1", 0)
+            threading.Thread(target=aggregator.run, daemon=True).start()
+            aggregator.ready.wait()
+
+            for client in clients:
+                client.address = ("127.0.0.1", aggregator.port)
+                client._next_connect = 0
+
+        if step == 0:
+            for client in clients:
+                client.start()
+
+        for client in clients:
+            for sensor in SENSORS:
+                client.submit(sensor, start + step * 30, 22.0 + step * 0.1, 45.0)
+
+    expected = NODES * len(SENSORS) * READINGS
+    waiting = time.monotonic()
+    deadline = waiting + 60
+    while aggregator.stats["readings"] < expected and time.monotonic() < deadline:
+        time.sleep(0.5)
+
+    print(f"[DEBUG] Delivered {aggregator.stats['readings']} readings in {time.monotonic() - waiting:.1f}s")
+
+    stoppers = [threading.Thread(target=client.stop) for client in clients]
+    for stopper in stoppers:
+        stopper.start()
+    for stopper in stoppers:
+        stopper.join()
+    aggregator.stop()
+    stop_dispatcher()
+
+    spooled = sum(client.stats["spooled"] for client in clients)
+    print(f"[DEBUG] Nodes: {NODES}, readings spooled while offline: {spooled}")
+    print("[DEBUG] Aggregator stats:", aggregator.stats)
+    print("[DEBUG] All readings received:", aggregator.stats["readings"] == expected)
+    aggregator.report()
+
+    # Every node's sensors end up in one monthly archive.
+    WRITE_BUFFER.flush()
+    archived = []
+    for file in sorted(os.listdir(CURRENT_DIR)):
+        path = os.path.join(CURRENT_DIR, file)
+        month = closed_month(path, None)
+        if month is not None:
+            compact_month(path, month)
+            archived.append(month)
+
+    rows = 0
+    sensors = set()
+    for month in archived:
+        archive = ArchiveMonth(os.path.join(ARCHIVE_DIR, archive_filename(month)))
+        rows += archive.rows
+        sensors.update(archive.sensors)
+        archive.close()
+
+    print(f"[DEBUG] Archived {rows} rows for {len(sensors)} sensors")
+    print("[DEBUG] All logged rows archived:", rows == aggregator.stats["logged"])
+
+if __name__ == "__main__":
+    debug()
@@ -0,0 +1,33 @@
+# Script for Testing Concurrent Multi-Sensor Polling with Simulated Sensors
+
+import time
+
+from src.pitherm.sensors import SensorConfig, SensorRegistry, SimulatedSensor
+
+print("[DEBUG] Initiating Script")
+
+def debug():
+    registry = SensorRegistry()
+    configs = [
+        SensorConfig("rack_front", "D4"),
+        SensorConfig("rack_back", "D5"),
+        SensorConfig("ceiling", "D6"),
+        SensorConfig("crac_intake", "D13")
+    ]
+
+    # A DHT22 read can take around two seconds on a bad cycle.
+    for i, config in enumerate(configs):
+        registry.register(SimulatedSensor(config, temp=22.0 + i, jitter=0.5, delay=2.0))
+
+    start = time.monotonic()
+    readings = registry.read_all()
+    elapsed = time.monotonic() - start
+
+    for name, (temp, hum) in readings.items():
+        print(f"[DEBUG] {name}: {temp}°C | {hum}%")
+
+    print(f"[DEBUG] Polled {len(readings)} sensors in {elapsed:.2f}s")
+    registry.close()
+
+if __name__ == "__main__":
+    debug()
@@ -0,0 +1,64 @@
+# Script for Testing the Adafruit Uploader against a Local HTTP Stub
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.pitherm.uploader import AdafruitUploader
+
+print("[DEBUG] Initiating Script")
+
+received = []
+online = threading.Event()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+
+        if not online.is_set():
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        received.append((self.path, payload["data"]))
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, format, *args):
+        pass
+
+def debug():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    spool_path = os.path.join(tempfile.mkdtemp(), "spool.jsonl")
+    uploader = AdafruitUploader("debug", "key", base_url=base_url, batch_size=5, flush_seconds=0.5, spool_path=spool_path)
+    uploader.start()
+
+    print("[DEBUG] Sending while offline.")
+    for i in range(7):
+        uploader.submit(20.0 + i, 40.0 + i)
+    time.sleep(2)
+    print("[DEBUG] Stats:", uploader.get_stats())
+
+    print("[DEBUG] Bringing stub online.")
+    online.set()
+    for i in range(7, 10):
+        uploader.submit(20.0 + i, 40.0 + i)
+    time.sleep(2)
+
+    uploader.stop()
+    server.shutdown()
+
+    temps = [point["value"] for path, data in received if "/temperature/" in path for point in data]
+    print("[DEBUG] Stats:", uploader.get_stats())
+    print("[DEBUG] Temperatures received in order:", temps == sorted(temps), temps)
+
+if __name__ == "__main__":
+    debug()
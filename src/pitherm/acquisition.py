@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+from src.pitherm.config import (
+    READ_INTERVAL_SECONDS,
+    DHT_MIN_READ_INTERVAL_SECONDS,
+    DHT_READ_RETRIES,
+    DHT_BURST_SAMPLES,
+    READ_INTERVAL_FAST_SECONDS,
+    READ_INTERVAL_SLOW_SECONDS,
+    ADAPTIVE_MARGIN,
+    ADAPTIVE_STABLE_RANGE
+)
+from src.pitherm.metrics import DHT_ERRORS
+
+class FilteredSensor:
+    # Wraps a sensor backend: respects the DHT22 minimum read interval,
+    # retries failed reads right away and median-filters a short burst.
+
+    def __init__(
+        self,
+        sensor,
+        min_interval=DHT_MIN_READ_INTERVAL_SECONDS,
+        retries=DHT_READ_RETRIES,
+        burst=DHT_BURST_SAMPLES
+    ):
+        self.sensor = sensor
+        self.config = sensor.config
+        self.min_interval = min_interval
+        self.retries = retries
+        self.burst = burst
+        self._last_read = None
+        self._lock = threading.Lock()
+
+    def _read_once(self):
+        if self._last_read is not None:
+            wait = self._last_read + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+        self._last_read = time.monotonic()
+        temp, hum = self.sensor.read()
+
+        if temp is None or hum is None:
+            raise RuntimeError("DHT returned no data")
+        return temp, hum
+
+    def read(self, burst=None):
+        burst = burst or self.burst
+
+        with self._lock:
+            temps, hums = [], []
+            failures = 0
+            last_error = None
+
+            while len(temps) < burst and failures <= self.retries:
+                try:
+                    temp, hum = self._read_once()
+                    temps.append(temp)
+                    hums.append(hum)
+                except RuntimeError as err:
+                    failures += 1
+                    last_error = err
+                    DHT_ERRORS.inc(self.config.name)
+                    print(f"[RETRY] DHT read failed ({self.config.name}, attempt {failures}): {err}")
+
+            if not temps:
+                raise RuntimeError(f"No valid DHT reading after {failures} attempts: {last_error}")
+
+            return statistics.median(temps), statistics.median(hums)
+
+    def close(self):
+        self.sensor.close()
+
+class AdaptiveSampler:
+    def __init__(
+        self,
+        base=READ_INTERVAL_SECONDS,
+        fast=READ_INTERVAL_FAST_SECONDS,
+        slow=READ_INTERVAL_SLOW_SECONDS,
+        margin=ADAPTIVE_MARGIN,
+        stable_range=ADAPTIVE_STABLE_RANGE
+    ):
+        self.base = base
+        self.fast = fast
+        self.slow = slow
+        self.margin = margin
+        self.stable_range = stable_range
+        self.current = base
+
+    def next_interval(self, states):
+        interval = self.slow
+
+        for state in states:
+            latest = state.history.latest()
+            if latest is None:
+                return self._set(self.base)
+
+            temp = latest[1]
+            distance = min(state.temp_high - temp, temp - state.temp_low)
+
+            if distance <= self.margin:
+                return self._set(self.fast)
+
+            recent = state.history.stats(300, "temperature")
+            spread = recent["max"] - recent["min"] if recent["count"] > 1 else None
+
+            if spread is None or spread > self.stable_range or distance <= 2 * self.margin:
+                interval = self.base
+
+        return self._set(interval)
+
+    def _set(self, interval):
+        if interval != self.current:
+            print(f"[SAMPLING] Read interval {self.current}s -> {interval}s")
+            self.current = interval
+        return interval
@@ -1,17 +1,199 @@
+import queue
+import threading
+import time
+from datetime import datetime
 from src.pitherm.smtp_client import SMTPClient
+from src.pitherm.watchdog import WATCHDOG
+from src.pitherm.config import (
+    DEFAULT_SENSOR,
+    SMTP_KEEPALIVE_SECONDS,
+    ALERT_COALESCE_SECONDS,
+    ALERT_RETRY_BACKOFF_SECONDS,
+    ALERT_RETRY_MAX_BACKOFF_SECONDS
+)
 
-def send_email_alert(temp, hum, alert_type="high"):
-    subject = "ALERT: High Temperature" if alert_type == "high" else "ALERT: Low temperature"
+ALERT_SUBJECTS = {
+    "high": "ALERT: High Temperature",
+    "low": "ALERT: Low temperature",
+    "trend_high": "WARNING: Temperature rising towards the high threshold",
+    "trend_low": "WARNING: Temperature falling towards the low threshold",
+    "rule": "ALERT: Monitoring rule triggered",
+    "log_failure": "ALERT: Log writes failing"
+}
 
-    body = f"""
-    <p><strong>Server Room Temperature Alert:</strong></p>
+def build_alert_body(alerts):
+    lines = []
 
+    for alert in alerts:
+        sensor = "" if alert["sensor"] == DEFAULT_SENSOR else f" ({alert['sensor']})"
+        # System alerts (e.g. log write failures) carry no reading.
+        details = [] if alert["temp"] is None else [f"Temperature: {alert['temp']:.1f}°C", f"Humidity: {alert['hum']:.1f}%"]
+        if alert.get("detail"):
+            details.append(alert["detail"])
+        body = "<br>\n    ".join(details)
+        lines.append(f"""
     <p>
-    Temperature: {temp:.1f}°C<br>
-    Humidity: {hum:.1f}%
+    <strong>{ALERT_SUBJECTS.get(alert["type"], "ALERT")}{sensor}</strong> at {alert["time"].strftime("%Y-%m-%d %H:%M:%S")}<br>
+    {body}
     </p>
+    """)
 
+    return f"""
+    <p><strong>Server Room Temperature Alert:</strong></p>
+    {"".join(lines)}
     <p>- Raspberry Pi Temperature Monitor</p>
     """
 
-    SMTPClient().send(subject, body, is_html=True)
\ No newline at end of file
+def build_alert_subject(alerts):
+    if len(alerts) == 1:
+        return ALERT_SUBJECTS.get(alerts[0]["type"], "ALERT")
+    return f"ALERT: {len(alerts)} Temperature alerts"
+
+class AlertDispatcher:
+    def __init__(
+        self,
+        client=None,
+        coalesce_seconds=ALERT_COALESCE_SECONDS,
+        retry_backoff=ALERT_RETRY_BACKOFF_SECONDS,
+        max_backoff=ALERT_RETRY_MAX_BACKOFF_SECONDS
+    ):
+        self.client = client or SMTPClient(keepalive_seconds=SMTP_KEEPALIVE_SECONDS)
+        self.coalesce_seconds = coalesce_seconds
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+
+        self.queue = queue.Queue()
+        self.stats = {
+            "alerts_submitted": 0,
+            "emails_sent": 0,
+            "send_failures": 0,
+            "pending": 0
+        }
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, temp, hum, alert_type="high", sensor=DEFAULT_SENSOR, detail=None):
+        self.queue.put({
+            "type": alert_type,
+            "sensor": sensor,
+            "temp": temp,
+            "hum": hum,
+            "detail": detail,
+            "time": datetime.now()
+        })
+        self.stats["alerts_submitted"] += 1
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        return stats
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=15):
+        self._stop.set()
+
+        if self._thread:
+            self._thread.join(timeout)
+
+        self.client.close()
+
+    def _collect(self, alerts):
+        # Alerts that fire within the coalesce window go out as one email.
+        deadline = time.monotonic() + self.coalesce_seconds
+
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                alerts.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return self._drain(alerts)
+
+    def _drain(self, alerts):
+        while True:
+            try:
+                alerts.append(self.queue.get_nowait())
+            except queue.Empty:
+                return alerts
+
+    def _deliver(self, alerts):
+        with WATCHDOG.busy("alert_email"):
+            sent = self.client.send(build_alert_subject(alerts), build_alert_body(alerts), is_html=True)
+
+        if sent:
+            self.stats["emails_sent"] += 1
+        else:
+            self.stats["send_failures"] += 1
+
+        return sent
+
+    def _run(self):
+        pending = []
+        attempt = 0
+
+        while not self._stop.is_set():
+            if not pending:
+                try:
+                    pending = self._collect([self.queue.get(timeout=1)])
+                except queue.Empty:
+                    self.client.close_if_idle()
+                    continue
+            else:
+                pending = self._drain(pending)
+
+            self.stats["pending"] = len(pending)
+
+            if self._deliver(pending):
+                pending = []
+                attempt = 0
+                self.stats["pending"] = 0
+                continue
+
+            attempt += 1
+            delay = min(self.retry_backoff * 2 ** (attempt - 1), self.max_backoff)
+            print(f"[WARN] Alert email failed. Retrying in {delay:g}s ({len(pending)} pending).")
+            self._stop.wait(delay)
+
+        pending = self._drain(pending)
+        if pending:
+            self._deliver(pending)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+            _dispatcher.start()
+            WATCHDOG.register("alert_email", worker=_dispatcher)
+
+    return _dispatcher
+
+def stop_dispatcher():
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            WATCHDOG.unregister("alert_email")
+            _dispatcher.stop()
+            _dispatcher = None
+
+def send_email_alert(temp, hum, alert_type="high", sensor=DEFAULT_SENSOR, detail=None):
+    get_dispatcher().submit(temp, hum, alert_type, sensor, detail)
@@ -0,0 +1,360 @@
+import bisect
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime
+from operator import itemgetter
+from src.pitherm.config import ARCHIVE_BLOCK_ROWS, ARCHIVE_SORT_ROWS
+from src.pitherm.journal import JOURNAL_PREFIX, iter_journal
+
+# Closed months are stored as .pta files:
+#
+#   b"PTA1" | uint32 header length | JSON header | zlib blocks
+#
+# The header lists every block's first/last timestamp, offset and row
+# count, so a time-range query only inflates the blocks it overlaps.
+# Inside a block the columns are stored one after another: the first
+# timestamp (int64) and row count (uint32), then int32 timestamp deltas,
+# int16 temperatures and humidities in hundredths and a uint16 sensor
+# index (uint8 in version 1 files).
+
+ARCHIVE_MAGIC = b"PTA1"
+ARCHIVE_EXT = ".pta"
+ARCHIVE_SCALE = 100
+ARCHIVE_VERSION = 2
+SENSOR_TYPECODES = {1: "B", 2: "H"}
+MAX_SENSORS = 65536
+
+# Rows spilled to disk while sorting: timestamp, sensor index, temperature, humidity.
+SORT_ROW = struct.Struct("<qHdd")
+SORT_KEY = itemgetter(0, 1)
+
+def archive_filename(month_str):
+    return f"{JOURNAL_PREFIX}{month_str}{ARCHIVE_EXT}"
+
+def _to_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def _scaled(value):
+    scaled = round(value * ARCHIVE_SCALE)
+    if not -32768 <= scaled <= 32767:
+        raise ValueError(f"Reading {value} out of range for the archive format")
+    return scaled
+
+def _encode_block(rows):
+    # rows are (ts, sensor index, temperature, humidity)
+    first_ts = rows[0][0]
+    deltas = array("i", (row[0] - prev[0] for prev, row in zip(rows, rows[1:])))
+    temps = array("h", (_scaled(row[2]) for row in rows))
+    hums = array("h", (_scaled(row[3]) for row in rows))
+    sensors = array(SENSOR_TYPECODES[ARCHIVE_VERSION], (row[1] for row in rows))
+
+    payload = struct.pack("<qI", first_ts, len(rows))
+    payload += _to_bytes(deltas) + _to_bytes(temps) + _to_bytes(hums) + _to_bytes(sensors)
+    return zlib.compress(payload, 9)
+
+def _decode_block(data, version=ARCHIVE_VERSION):
+    data = zlib.decompress(data)
+    first_ts, count = struct.unpack_from("<qI", data)
+    offset = struct.calcsize("<qI")
+
+    deltas = _from_bytes("i", data[offset:offset + 4 * (count - 1)])
+    offset += 4 * (count - 1)
+    temps = _from_bytes("h", data[offset:offset + 2 * count])
+    offset += 2 * count
+    hums = _from_bytes("h", data[offset:offset + 2 * count])
+    offset += 2 * count
+    typecode = SENSOR_TYPECODES[version]
+    sensors = _from_bytes(typecode, data[offset:offset + array(typecode).itemsize * count])
+
+    timestamps = array("q", [first_ts])
+    for delta in deltas:
+        timestamps.append(timestamps[-1] + delta)
+
+    return timestamps, temps, hums, sensors
+
+def _sorted_runs(readings, sensor_ids, run_rows, run_path, run_files):
+    # Sorts the readings in runs of run_rows; every run but the last is
+    # spilled to a file, added to run_files, so memory stays bounded
+    # however long the month. Returns the last run.
+    run = []
+
+    def spill():
+        run.sort(key=SORT_KEY)
+        spill_path = f"{run_path}.{len(run_files)}"
+        run_files.append(spill_path)
+        with open(spill_path, "wb") as file:
+            for row in run:
+                file.write(SORT_ROW.pack(*row))
+        run.clear()
+
+    for when, temp, hum, sensor in readings:
+        sensor_id = sensor_ids.get(sensor)
+        if sensor_id is None:
+            if len(sensor_ids) >= MAX_SENSORS:
+                raise ValueError("Too many sensors for the archive format")
+            sensor_id = sensor_ids[sensor] = len(sensor_ids)
+
+        run.append((int(when.timestamp()), sensor_id, temp, hum))
+        if len(run) >= run_rows:
+            spill()
+
+    run.sort(key=SORT_KEY)
+    return run
+
+def _read_run(path, chunk_rows=4096):
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(SORT_ROW.size * chunk_rows)
+            if not data:
+                return
+            yield from SORT_ROW.iter_unpack(data)
+
+def write_archive(readings, path, block_rows=ARCHIVE_BLOCK_ROWS, sort_rows=ARCHIVE_SORT_ROWS):
+    # readings are (datetime, temperature, humidity, sensor), as yielded
+    # by iter_journal, in any order. They are written sorted by time, and
+    # of the rows sharing a second and sensor only the first is kept, so
+    # readings that are already archived can be fed in first. Returns the
+    # number of rows written.
+    tmp_path = path + ".tmp"
+    blocks_path = path + ".blocks"
+    sensor_ids = {}
+    run_files = []
+
+    try:
+        last_run = _sorted_runs(readings, sensor_ids, sort_rows, path + ".run", run_files)
+        # heapq.merge keeps equal keys in run order, so the first
+        # occurrence of a row still comes first.
+        rows = heapq.merge(*(_read_run(run) for run in run_files), last_run, key=SORT_KEY)
+
+        index = []
+        offset = 0
+        count = 0
+        chunk = []
+        previous = None
+
+        with open(blocks_path, "wb") as blocks:
+            def write_block():
+                nonlocal offset
+                block = _encode_block(chunk)
+                index.append([chunk[0][0], chunk[-1][0], offset, len(block), len(chunk)])
+                blocks.write(block)
+                offset += len(block)
+                chunk.clear()
+
+            for row in rows:
+                key = SORT_KEY(row)
+                if key == previous:
+                    continue
+                previous = key
+
+                chunk.append(row)
+                count += 1
+                if len(chunk) >= block_rows:
+                    write_block()
+
+            if chunk:
+                write_block()
+
+        header = json.dumps({
+            "version": ARCHIVE_VERSION,
+            "rows": count,
+            "scale": ARCHIVE_SCALE,
+            "sensors": list(sensor_ids),
+            "blocks": index
+        }).encode()
+
+        with open(tmp_path, "wb") as file, open(blocks_path, "rb") as blocks:
+            file.write(ARCHIVE_MAGIC + struct.pack("<I", len(header)) + header)
+            shutil.copyfileobj(blocks, file)
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in run_files + [blocks_path, tmp_path]:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return count
+
+class ArchiveMonth:
+    # Opened on first use and memory-mapped, so only the blocks a query
+    # touches are read from the SD card.
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self._file = None
+        self._map = None
+        self._data_start = 0
+        self._block_starts = []
+
+    def _open(self):
+        if self._map is not None:
+            return
+
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:4] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a PiTherm archive")
+
+        (header_len,) = struct.unpack_from("<I", self._map, 4)
+        self.header = json.loads(self._map[8:8 + header_len])
+        self._data_start = 8 + header_len
+        self._block_starts = [block[0] for block in self.header["blocks"]]
+
+    @property
+    def rows(self):
+        self._open()
+        return self.header["rows"]
+
+    @property
+    def sensors(self):
+        self._open()
+        return list(self.header["sensors"])
+
+    def extent(self):
+        self._open()
+        blocks = self.header["blocks"]
+        if not blocks:
+            return None, None
+        return blocks[0][0], blocks[-1][1]
+
+    def _blocks(self, start, end):
+        blocks = self.header["blocks"]
+        first = max(bisect.bisect_right(self._block_starts, start) - 1, 0) if start is not None else 0
+
+        for first_ts, last_ts, offset, length, _ in blocks[first:]:
+            if end is not None and first_ts > end:
+                break
+            if start is not None and last_ts < start:
+                continue
+
+            position = self._data_start + offset
+            yield _decode_block(self._map[position:position + length], self.header.get("version", 1))
+
+    def columns(self, start=None, end=None, sensor=None):
+        # Returns {"timestamp", "temperature", "humidity"} arrays for the
+        # range, optionally for a single sensor.
+        self._open()
+        scale = self.header["scale"]
+        sensor_id = None
+
+        if sensor is not None:
+            if sensor not in self.header["sensors"]:
+                return {"timestamp": array("q"), "temperature": array("d"), "humidity": array("d")}
+            sensor_id = self.header["sensors"].index(sensor)
+
+        result = {"timestamp": array("q"), "temperature": array("d"), "humidity": array("d")}
+
+        for timestamps, temps, hums, sensors in self._blocks(start, end):
+            for i, ts in enumerate(timestamps):
+                if (start is not None and ts < start) or (end is not None and ts > end):
+                    continue
+                if sensor_id is not None and sensors[i] != sensor_id:
+                    continue
+                result["timestamp"].append(ts)
+                result["temperature"].append(temps[i] / scale)
+                result["humidity"].append(hums[i] / scale)
+
+        return result
+
+    def iter_rows(self, start=None, end=None, sensor=None):
+        self._open()
+        scale = self.header["scale"]
+        names = self.header["sensors"]
+
+        for timestamps, temps, hums, sensors in self._blocks(start, end):
+            for i, ts in enumerate(timestamps):
+                if (start is not None and ts < start) or (end is not None and ts > end):
+                    continue
+                name = names[sensors[i]]
+                if sensor is not None and name != sensor:
+                    continue
+                yield datetime.fromtimestamp(ts), temps[i] / scale, hums[i] / scale, name
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = None
+        self._file = None
+
+class ReadingArchive:
+    # All archived months in a directory; each month is opened lazily.
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._months = {}
+
+    def month_files(self):
+        if not os.path.isdir(self.directory):
+            return []
+
+        files = []
+        for file in sorted(os.listdir(self.directory)):
+            name, ext = os.path.splitext(file)
+            if name.startswith(JOURNAL_PREFIX) and ext == ARCHIVE_EXT:
+                files.append((name.replace(JOURNAL_PREFIX, ""), os.path.join(self.directory, file)))
+        return files
+
+    def month(self, month_str):
+        if month_str not in self._months:
+            path = os.path.join(self.directory, archive_filename(month_str))
+            if not os.path.exists(path):
+                return None
+            self._months[month_str] = ArchiveMonth(path)
+        return self._months[month_str]
+
+    def _months_between(self, start, end):
+        first = datetime.fromtimestamp(start).strftime("%Y-%m") if start is not None else ""
+        last = datetime.fromtimestamp(end).strftime("%Y-%m") if end is not None else "9999-99"
+
+        for month_str, _ in self.month_files():
+            if first <= month_str <= last:
+                yield self.month(month_str)
+
+    def iter_rows(self, start=None, end=None, sensor=None):
+        for month in self._months_between(start, end):
+            yield from month.iter_rows(start, end, sensor)
+
+    def columns(self, start=None, end=None, sensor=None):
+        result = {"timestamp": array("q"), "temperature": array("d"), "humidity": array("d")}
+
+        for month in self._months_between(start, end):
+            for key, values in month.columns(start, end, sensor).items():
+                result[key].extend(values)
+        return result
+
+    def close(self):
+        for month in self._months.values():
+            month.close()
+        self._months = {}
+
+def iter_readings(path):
+    # Readings from either a live journal or an archived month.
+    if path.endswith(ARCHIVE_EXT):
+        month = ArchiveMonth(path)
+        try:
+            yield from month.iter_rows()
+        finally:
+            month.close()
+    else:
+        yield from iter_journal(path)
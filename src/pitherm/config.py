@@ -1,4 +1,5 @@
 import os
+import socket
 import sys
 from dotenv import load_dotenv
 
@@ -8,20 +9,250 @@ load_dotenv()
 
 ADAFRUIT_IO_USERNAME = os.getenv("ADAFRUIT_IO_USERNAME")
 ADAFRUIT_IO_KEY = os.getenv("ADAFRUIT_IO_KEY")
+ADAFRUIT_IO_URL = os.getenv("ADAFRUIT_IO_URL") or "https://io.adafruit.com"
 SMTP_RECIPIENT = os.getenv("SMTP_RECIPIENT")
 SMTP_CC = os.getenv("SMTP_CC")
 SMTP_FROM = os.getenv("SMTP_FROM")
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = os.getenv("SMTP_PORT")
+SMTP_STARTTLS = (os.getenv("SMTP_STARTTLS") or "true").strip().lower() != "false"
 
 # Global Variables
 
 TEMP_THRESHOLD_HIGH = 25.0
 TEMP_THRESHOLD_LOW = 19.0
 READ_INTERVAL_SECONDS = 30
+READ_INTERVAL_FAST_SECONDS = 10
+READ_INTERVAL_SLOW_SECONDS = 60
 LOG_INTERVAL_SECONDS = 300
 TEMP_HYSTERESIS = 1.0
 
+# Run Mode ("sync", "async" or "multiprocess")
+
+RUN_MODE = (os.getenv("PITHERM_RUN_MODE") or "sync").strip().lower()
+SENSOR_READ_TIMEOUT_SECONDS = 10
+SINK_WORKERS = 4
+SINK_TIMEOUT_SECONDS = {
+    "default": 5,
+    "log_to_excel": 5,
+    "send_to_adafruit": 2
+}
+
+# Multi-process Mode: the acquisition process publishes readings to a
+# shared-memory ring, each sink process consumes it on its own.
+
+RING_SLOTS = 4096
+SINK_PROCESSES = ("logging", "upload", "alerts")
+SINK_POLL_SECONDS = 0.5
+SINK_STALL_SECONDS = 120
+SINK_RESTART_BACKOFF_SECONDS = 5
+SINK_RESTART_MAX_BACKOFF_SECONDS = 300
+PROCESS_CHECK_SECONDS = 5
+
+# Trend Alerts: warn when a steady rise/fall is projected to cross a
+# threshold within TREND_LEAD_SECONDS. A warning clears once the
+# projection is further out than TREND_RESET_FACTOR x the lead time.
+
+TREND_ALERTS = True
+TREND_WINDOW_SECONDS = 900
+TREND_LEAD_SECONDS = 900
+TREND_MIN_POINTS = 8
+TREND_MIN_R2 = 0.7
+TREND_MIN_SLOPE_PER_HOUR = 0.5
+TREND_RESET_FACTOR = 2
+
+# Alert Rules: extra declarative rules (humidity, rate of change,
+# sustained conditions, per-sensor scope) on top of the sensor thresholds.
+# See rules.example.json.
+
+ALERT_RULES_FILE = os.getenv("PITHERM_RULES") or "rules.json"
+RULE_RATE_WINDOW_SECONDS = 600
+RULE_MIN_RATE_POINTS = 3
+
+# Sensor Acquisition
+
+DHT_MIN_READ_INTERVAL_SECONDS = 2.0
+DHT_READ_RETRIES = 3
+DHT_BURST_SAMPLES = 3
+
+# Adaptive Sampling: read faster within ADAPTIVE_MARGIN °C of a threshold,
+# slower when the last 5 minutes moved less than ADAPTIVE_STABLE_RANGE °C.
+
+ADAPTIVE_SAMPLING = True
+ADAPTIVE_MARGIN = 1.5
+ADAPTIVE_STABLE_RANGE = 0.3
+
+# LCD (16x2 HD44780 over PCF8574)
+
+LCD_COLS = 16
+LCD_ROWS = 2
+LCD_ROTATE_SCREENS = True
+LCD_ROTATE_SECONDS = 5
+LCD_MERGE_GAP = 2
+
+# Sensors
+
+DEFAULT_SENSOR = "main"
+SENSOR_NAME_MAX_BYTES = 32      # UTF-8, the size of the name field in the state snapshot
+SENSOR_CONFIG_FILE = os.getenv("PITHERM_SENSORS") or "sensors.json"
+SENSOR_POLL_WORKERS = 4
+
+# Simulated sensors used in development mode, e.g. "synthetic:drift"
+# or "replay:logs/archive/temp_log_2026-07.csv"
+
+SIM_SOURCE = os.getenv("PITHERM_SIM") or ""
+SIM_SPEED = float(os.getenv("PITHERM_SIM_SPEED") or 1)
+
+# Reading History (in memory)
+
+HISTORY_CAPACITY = 3000
+HISTORY_WINDOWS = (300, 3600, 86400)
+
+# State Snapshot: alert flags, last log time and the last
+# SNAPSHOT_READINGS readings per sensor, restored at startup
+
+SNAPSHOT_ENABLED = True
+SNAPSHOT_FILE = os.path.join("logs", "state.snap")
+SNAPSHOT_READINGS = HISTORY_CAPACITY
+SNAPSHOT_FLUSH_SECONDS = 60
+
+# Rollup Tiers: (name, bucket seconds, retention seconds)
+
+ROLLUP_TIERS = (
+    ("1m", 60, 2 * 86400),
+    ("5m", 300, 90 * 86400),
+    ("1h", 3600, 5 * 365 * 86400)
+)
+ROLLUP_MAX_POINTS = 1500
+
+# Historical Store (SQLite)
+
+STORE_ENABLED = True
+
+# Scheduled Jobs (cron: minute hour day month weekday)
+
+SCHEDULER_STATE_FILE = os.path.join("logs", "scheduler_state.json")
+ACQUISITION_SCHEDULER_STATE_FILE = os.path.join("logs", "scheduler_state_acquisition.json")
+SCHEDULER_MAX_SLEEP_SECONDS = 300
+ARCHIVE_SCHEDULE = "0 0 1 * *"
+MONTHLY_REPORT_SCHEDULE = "0 7 1 * *"
+ROLLUP_PRUNE_SCHEDULE = "30 0 * * *"
+HEARTBEAT_SCHEDULE = "0 * * * *"
+
+# Buffered Log Writes: rows are committed after WRITE_FLUSH_ROWS rows or
+# WRITE_FLUSH_SECONDS, and staged in tmpfs until then. Set
+# PITHERM_STAGING_DIR to a directory on the SD card to survive power loss
+# as well, or to "off" to buffer in memory only. Rows that fail to write
+# are retried every WRITE_RETRY_SECONDS, keeping at most
+# WRITE_MAX_PENDING_ROWS.
+
+WRITE_FLUSH_ROWS = 50
+WRITE_FLUSH_SECONDS = 300
+WRITE_MAX_PENDING_ROWS = 20000
+WRITE_RETRY_SECONDS = 30
+_staging_dir = os.getenv("PITHERM_STAGING_DIR") or ("/dev/shm/pitherm" if os.path.isdir("/dev/shm") else "off")
+WRITE_STAGING_DIR = None if _staging_dir.lower() == "off" else _staging_dir
+
+# Archive (closed months are compacted to .pta files). Months with more
+# than ARCHIVE_SORT_ROWS rows are sorted in runs spilled to disk.
+
+ARCHIVE_COMPACT = True
+ARCHIVE_BLOCK_ROWS = 2048
+ARCHIVE_SORT_ROWS = 100000
+
+# Monthly Report
+
+REPORT_COMPRESS = True
+
+# Live Stream (framed readings over a Unix socket and TCP)
+
+STREAM_ENABLED = True
+STREAM_SOCKET_PATH = os.path.join("logs", "pitherm.sock")
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 9109
+STREAM_CLIENT_QUEUE = 256
+STREAM_REPLAY_MAX = 1000
+STREAM_SEND_TIMEOUT_SECONDS = 5
+
+# Web Dashboard: there is no authentication, so it only listens on
+# localhost by default. Set PITHERM_WEB_HOST=0.0.0.0 to make it reachable
+# from the LAN (e.g. for wall displays) on a trusted network.
+
+WEB_ENABLED = True
+WEB_HOST = os.getenv("PITHERM_WEB_HOST") or "127.0.0.1"
+WEB_PORT = 8080
+WEB_CHART_POINTS = 500
+WEB_MAX_CHART_POINTS = 2000
+WEB_CACHE_ENTRIES = 64
+WEB_SSE_MAX_CLIENTS = 20
+WEB_SSE_QUEUE = 100
+
+# Fleet: nodes forward readings to a central aggregator
+# (PiThermAggregator.py). Set PITHERM_FLEET_SERVER to "host:port" on a
+# node to enable its client sink. Nodes authenticate with
+# PITHERM_FLEET_SECRET, which must be the same on the aggregator and on
+# every node.
+
+FLEET_SERVER = os.getenv("PITHERM_FLEET_SERVER") or ""
+FLEET_SECRET = os.getenv("PITHERM_FLEET_SECRET") or ""
+FLEET_NODE_NAME = os.getenv("PITHERM_NODE") or socket.gethostname()
+FLEET_HOST = os.getenv("PITHERM_FLEET_HOST") or "0.0.0.0"
+FLEET_PORT = 9110
+FLEET_BATCH_SIZE = 100
+FLEET_FLUSH_SECONDS = 30
+FLEET_QUEUE_SIZE = 5000
+FLEET_ACK_TIMEOUT_SECONDS = 10
+FLEET_RECONNECT_MAX_SECONDS = 300
+FLEET_SPOOL_FILE = os.path.join("logs", "spool", "fleet_spool.jsonl")
+FLEET_NODE_STALE_SECONDS = 600
+FLEET_STATE_FILE = os.path.join("logs", "fleet_state.json")
+FLEET_STATE_COMPACT_CHANGES = 1000
+FLEET_METRICS_PORT = 9111
+
+# Metrics Endpoint
+
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+
+# Adafruit IO Uploader
+
+UPLOAD_BATCH_SIZE = 10
+UPLOAD_FLUSH_SECONDS = 60
+UPLOAD_QUEUE_SIZE = 1000
+UPLOAD_TIMEOUT_SECONDS = 5
+
+# Alert Dispatcher
+
+SMTP_KEEPALIVE_SECONDS = 300
+ALERT_COALESCE_SECONDS = 10
+ALERT_RETRY_BACKOFF_SECONDS = 5
+ALERT_RETRY_MAX_BACKOFF_SECONDS = 300
+
+# Watchdog: every component reports in; one that misses its deadline is
+# logged as a stall, and a worker thread that died is restarted. Under
+# systemd with WatchdogSec= set, WATCHDOG=1 is only sent while the
+# critical components (main loop, sensor reads) are healthy, so a hang
+# there gets the service restarted.
+
+WATCHDOG_ENABLED = True
+WATCHDOG_CHECK_SECONDS = 5
+WATCHDOG_HISTORY = 50
+WATCHDOG_DEADLINES = {
+    "default": 60,
+    "main_loop": 180,       # longest sampling interval plus a slow cycle
+    "sensor_read": 30,
+    "log_to_excel": 60,
+    "send_to_adafruit": 30,
+    "publish": 10,
+    "write_buffer": 120,
+    "lcd": 30,
+    "adafruit_upload": 120,
+    "alert_email": 120,
+    "fleet": 120,
+    "scheduler": 3600       # archive compaction can take a while
+}
+
 # Required ENV Variables
 
 REQUIRED_ENV_VARS = [
@@ -33,10 +264,24 @@ REQUIRED_ENV_VARS = [
     "ADAFRUIT_IO_KEY"
 ]
 
-def validate_env():
+# Needed on a node as well once PITHERM_FLEET_SERVER is set.
+FLEET_REQUIRED_ENV_VARS = [
+    "PITHERM_FLEET_SECRET"
+]
+
+# The aggregator only sends email.
+AGGREGATOR_REQUIRED_ENV_VARS = [
+    "SMTP_HOST",
+    "SMTP_PORT",
+    "SMTP_FROM",
+    "SMTP_RECIPIENT",
+    *FLEET_REQUIRED_ENV_VARS
+]
+
+def validate_env(required=REQUIRED_ENV_VARS):
     missing = []
 
-    for var in REQUIRED_ENV_VARS:
+    for var in required:
         value = os.getenv(var)
         if value is None or value.strip() == "":
             missing.append(var)
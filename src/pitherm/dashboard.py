@@ -1,30 +1,68 @@
-import requests
+import threading
 from src.pitherm.config import (
+    DEFAULT_SENSOR,
     ADAFRUIT_IO_USERNAME,
-    ADAFRUIT_IO_KEY
+    ADAFRUIT_IO_KEY,
+    ADAFRUIT_IO_URL,
+    UPLOAD_BATCH_SIZE,
+    UPLOAD_FLUSH_SECONDS,
+    UPLOAD_QUEUE_SIZE,
+    UPLOAD_TIMEOUT_SECONDS
 )
+from src.pitherm.uploader import AdafruitUploader
+from src.pitherm.metrics import REGISTRY
+from src.pitherm.watchdog import WATCHDOG
 
-def send_to_adafruit(temp, hum):
+_uploader = None
+_uploader_lock = threading.Lock()
+
+REGISTRY.gauge("pitherm_upload_queue_depth", "Readings waiting for upload.").set_function(
+    lambda: _uploader.queue.qsize() if _uploader else 0
+)
+REGISTRY.gauge("pitherm_upload_spool_depth", "Adafruit points spooled offline.").set_function(
+    lambda: _uploader.stats["spool_depth"] if _uploader else 0
+)
+
+def get_uploader():
+    global _uploader
+
+    with _uploader_lock:
+        if _uploader is None:
+            _uploader = AdafruitUploader(
+                ADAFRUIT_IO_USERNAME,
+                ADAFRUIT_IO_KEY,
+                base_url=ADAFRUIT_IO_URL,
+                batch_size=UPLOAD_BATCH_SIZE,
+                flush_seconds=UPLOAD_FLUSH_SECONDS,
+                queue_size=UPLOAD_QUEUE_SIZE,
+                timeout=UPLOAD_TIMEOUT_SECONDS
+            )
+            _uploader.start()
+            WATCHDOG.register("adafruit_upload", worker=_uploader)
+
+    return _uploader
+
+def send_to_adafruit(temp, hum, sensor=DEFAULT_SENSOR):
     if not ADAFRUIT_IO_KEY or not ADAFRUIT_IO_USERNAME:
         print("[WARN] Adafruit IO not configured. Upload skipped.")
         return
 
-    try:
-        headers = {
-            "X-AIO-Key": ADAFRUIT_IO_KEY,
-            "Content-Type": "application/json"
-        }
+    # The default sensor keeps the original temperature/humidity feeds.
+    feed_prefix = "" if sensor == DEFAULT_SENSOR else f"{sensor}-"
 
-        temp_url = f"https://io.adafruit.com/api/v2/{ADAFRUIT_IO_USERNAME}/feeds/temperature/data"
-        hum_url = f"https://io.adafruit.com/api/v2/{ADAFRUIT_IO_USERNAME}/feeds/humidity/data"
+    if not get_uploader().submit(temp, hum, feed_prefix=feed_prefix):
+        print("[WARN] Adafruit upload queue full. Reading dropped.")
 
-        temp_res = requests.post(temp_url, headers=headers, json={"value": temp}, timeout=5)
-        hum_res = requests.post(hum_url, headers=headers, json={"value": hum}, timeout=5)
+def get_upload_stats():
+    if _uploader is None:
+        return None
+    return _uploader.get_stats()
 
-        if temp_res.status_code == 200 and hum_res.status_code == 200:
-            print("[UPLOAD] Data sent to Adafruit IO.")
-        else:
-            print(f"[WARN] Adafruit error: {temp_res.text} | {hum_res.text}")
+def stop_uploader():
+    global _uploader
 
-    except Exception as err:
-        print("[ERROR] Adafruit exception:", err)
\ No newline at end of file
+    with _uploader_lock:
+        if _uploader is not None:
+            WATCHDOG.unregister("adafruit_upload")
+            _uploader.stop()
+            _uploader = None
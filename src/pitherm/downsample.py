@@ -0,0 +1,83 @@
+# Server-side downsampling for charts. Both functions take points sorted
+# by x and never return more than the requested number of points.
+
+def lttb(points, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and,
+    # from each bucket in between, the point forming the largest triangle
+    # with the previously kept point and the next bucket's average. Peaks
+    # survive, unlike with plain averaging. points are (x, y) pairs.
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]
+        best_area = -1.0
+        best = start
+
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+def minmax_buckets(points, buckets, start=None, end=None):
+    # Splits the x range into equal-width buckets and returns
+    # (bucket start, min, max, mean) for every non-empty one. points are
+    # (x, y) or (x, y_min, y_max, y_mean, weight) tuples, so rollup rows can
+    # be merged without losing their extremes. Points outside start..end
+    # are left out.
+    if not points or buckets < 1:
+        return []
+
+    start = points[0][0] if start is None else start
+    end = points[-1][0] if end is None else end
+    width = max((end - start) / buckets, 1e-9)
+    merged = {}
+
+    for point in points:
+        if len(point) == 2:
+            x, y = point
+            low = high = mean = y
+            weight = 1
+        else:
+            x, low, high, mean, weight = point
+
+        if x < start or x > end:
+            continue
+
+        index = min(int((x - start) / width), buckets - 1)
+        bucket = merged.get(index)
+
+        if bucket is None:
+            merged[index] = [low, high, mean * weight, weight]
+        else:
+            bucket[0] = min(bucket[0], low)
+            bucket[1] = max(bucket[1], high)
+            bucket[2] += mean * weight
+            bucket[3] += weight
+
+    return [
+        (start + index * width, low, high, total / weight if weight else None)
+        for index, (low, high, total, weight) in sorted(merged.items())
+    ]
@@ -0,0 +1,639 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.pitherm.config import (
+    LOG_INTERVAL_SECONDS,
+    TEMP_THRESHOLD_HIGH,
+    TEMP_THRESHOLD_LOW,
+    FLEET_HOST,
+    FLEET_PORT,
+    FLEET_SECRET,
+    FLEET_BATCH_SIZE,
+    FLEET_FLUSH_SECONDS,
+    FLEET_QUEUE_SIZE,
+    FLEET_ACK_TIMEOUT_SECONDS,
+    FLEET_RECONNECT_MAX_SECONDS,
+    FLEET_SPOOL_FILE,
+    FLEET_NODE_STALE_SECONDS,
+    FLEET_STATE_FILE,
+    FLEET_STATE_COMPACT_CHANGES
+)
+from src.pitherm.metrics import REGISTRY
+from src.pitherm.monitor import SensorState, evaluate_alerts
+from src.pitherm.logging_service import log_readings, send_monthly_report
+from src.pitherm.sensors import SensorConfig
+from src.pitherm.snapshot import FLAGS
+from src.pitherm.watchdog import WATCHDOG
+
+# Wire format (all integers big-endian). Every message is
+#
+#   uint8 type, uint32 length of the body, body
+#
+#   CHALLENGE  aggregator -> node, first message on a connection. 32
+#          random bytes
+#   HELLO  node -> aggregator, the reply. HMAC-SHA256 of the challenge and
+#          the JSON under the shared secret, then the JSON:
+#          {"node": name, "sensors": [{"name", "temp_high", "temp_low"}]}
+#   BATCH  node -> aggregator. uint32 batch id, then zlib-compressed
+#          records of float64 timestamp, float32 temperature (°C),
+#          float32 humidity (%), uint8 index into the hello's sensors
+#   ACK    aggregator -> node. uint32 batch id, sent once the batch has
+#          been processed; the node only then forgets it
+#
+# A node sends one batch at a time and waits for its ACK. Batches that
+# cannot be delivered are spooled to disk and sent first on reconnect.
+
+MESSAGE = struct.Struct(">BI")
+BATCH_ID = struct.Struct(">I")
+RECORD = struct.Struct(">dffB")
+
+HELLO = 1
+BATCH = 2
+ACK = 3
+CHALLENGE = 4
+
+NONCE_BYTES = 32
+MAC_BYTES = hashlib.sha256().digest_size
+MAX_HELLO_BYTES = 64 * 1024
+MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+# A batch holds FLEET_BATCH_SIZE readings; leave plenty of room for nodes
+# configured with larger batches, but never inflate more than this.
+MAX_BATCH_BYTES = 255 * RECORD.size * FLEET_BATCH_SIZE
+HELLO_TIMEOUT_SECONDS = 10
+
+FLEET_NODES = REGISTRY.gauge("pitherm_fleet_nodes_connected", "Nodes connected to the aggregator.")
+FLEET_BATCHES = REGISTRY.counter("pitherm_fleet_batches_total", "Reading batches received from nodes.")
+FLEET_READINGS = REGISTRY.counter(
+    "pitherm_fleet_readings_total",
+    "Readings received from nodes, by outcome.",
+    labels=("outcome",)
+)
+
+def encode_message(kind, body):
+    return MESSAGE.pack(kind, len(body)) + body
+
+def encode_batch(batch_id, records):
+    # records are (sensor index, ts, temperature, humidity)
+    packed = b"".join(RECORD.pack(ts, temp, hum, index) for index, ts, temp, hum in records)
+    return encode_message(BATCH, BATCH_ID.pack(batch_id) + zlib.compress(packed))
+
+def decode_batch(body):
+    batch_id = BATCH_ID.unpack_from(body)[0]
+    inflater = zlib.decompressobj()
+    packed = inflater.decompress(body[BATCH_ID.size:], MAX_BATCH_BYTES)
+
+    if inflater.unconsumed_tail:
+        raise ValueError(f"Batch inflates to more than {MAX_BATCH_BYTES} bytes")
+    if not inflater.eof or len(packed) % RECORD.size:
+        raise ValueError("Truncated batch")
+
+    records = []
+    for ts, temp, hum, index in RECORD.iter_unpack(packed):
+        records.append((index, ts, round(temp, 2), round(hum, 2)))
+    return batch_id, records
+
+def fsync_directory(path):
+    # Makes a file created or renamed in path survive a power cut.
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def sign_hello(secret, nonce, body):
+    return hmac.new(secret.encode(), nonce + body, hashlib.sha256).digest()
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Aggregator closed the connection")
+        data += chunk
+    return data
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port or FLEET_PORT)
+
+class FleetClient:
+    # Node side. A Monitor listener that batches readings and forwards
+    # them to the aggregator, spooling batches while it is unreachable.
+
+    def __init__(
+        self,
+        address,
+        node,
+        sensor_configs,
+        batch_size=FLEET_BATCH_SIZE,
+        flush_seconds=FLEET_FLUSH_SECONDS,
+        queue_size=FLEET_QUEUE_SIZE,
+        ack_timeout=FLEET_ACK_TIMEOUT_SECONDS,
+        reconnect_max=FLEET_RECONNECT_MAX_SECONDS,
+        spool_path=FLEET_SPOOL_FILE,
+        secret=FLEET_SECRET
+    ):
+        self.address = address
+        self.node = node
+        self.secret = secret
+        self.sensors = [config.name for config in sensor_configs]
+        self.hello = {
+            "node": node,
+            "sensors": [
+                {"name": c.name, "temp_high": c.temp_high, "temp_low": c.temp_low} for c in sensor_configs
+            ]
+        }
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.ack_timeout = ack_timeout
+        self.reconnect_max = reconnect_max
+        self.spool_path = spool_path
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"sent": 0, "batches": 0, "dropped": 0, "spooled": 0, "replayed": 0, "reconnects": 0}
+
+        self._sock = None
+        self._batch_id = 0
+        self._backoff = 1
+        self._next_connect = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, sensor, ts, temperature, humidity):
+        try:
+            self.queue.put_nowait((sensor, ts, temperature, humidity))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-client", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+
+        if self._thread:
+            self._thread.join(timeout)
+        self._close()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=min(remaining, 1)))
+            except queue.Empty:
+                continue
+
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            with WATCHDOG.busy("fleet"):
+                self._flush(batch)
+
+        self._flush(self._drain())
+
+    def _flush(self, readings):
+        if not readings and not os.path.exists(self.spool_path):
+            return
+
+        # While the aggregator is unreachable new readings are only
+        # appended, so the spool is not rewritten on every flush.
+        if self._sock is None and not self._connect():
+            if readings:
+                self._spool(readings)
+            return
+
+        # Spooled readings go first so each sensor's readings arrive in order.
+        spooled = self._read_spool()
+        pending = spooled + readings
+        if not pending:
+            return
+
+        sent = self._send(pending)
+        unsent = pending[sent:]
+
+        if spooled:
+            self.stats["replayed"] += min(sent, len(spooled))
+            self._rewrite_spool(unsent)
+            if not unsent:
+                print(f"[FLEET] Replayed {len(spooled)} spooled readings.")
+        elif unsent:
+            self._spool(unsent)
+
+    def _send(self, readings):
+        # Returns how many readings, from the start, were acknowledged.
+        for i in range(0, len(readings), self.batch_size):
+            chunk = readings[i:i + self.batch_size]
+            records = [
+                (self.sensors.index(sensor), ts, temp, hum)
+                for sensor, ts, temp, hum in chunk if sensor in self.sensors
+            ]
+
+            self._batch_id = (self._batch_id + 1) % 2 ** 32
+            try:
+                self._sock.sendall(encode_batch(self._batch_id, records))
+                kind, length = MESSAGE.unpack(_recv_exact(self._sock, MESSAGE.size))
+                body = _recv_exact(self._sock, length)
+
+                if kind != ACK or BATCH_ID.unpack(body)[0] != self._batch_id:
+                    raise ConnectionError("Unexpected reply from aggregator")
+            except OSError as e:
+                print(f"[FLEET] Send to {self.address[0]}:{self.address[1]} failed:", e)
+                self._close()
+                self._schedule_reconnect()
+                return i
+
+            self.stats["sent"] += len(chunk)
+            self.stats["batches"] += 1
+
+        return len(readings)
+
+    def _connect(self):
+        if time.monotonic() < self._next_connect:
+            return False
+
+        sock = None
+        try:
+            sock = socket.create_connection(self.address, timeout=self.ack_timeout)
+            kind, length = MESSAGE.unpack(_recv_exact(sock, MESSAGE.size))
+            if kind != CHALLENGE or length != NONCE_BYTES:
+                raise ConnectionError("Expected a challenge from the aggregator")
+
+            nonce = _recv_exact(sock, length)
+            hello = json.dumps(self.hello).encode()
+            sock.sendall(encode_message(HELLO, sign_hello(self.secret, nonce, hello) + hello))
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            print(f"[FLEET] Aggregator {self.address[0]}:{self.address[1]} unreachable:", e)
+            self._schedule_reconnect()
+            return False
+
+        self._sock = sock
+        self._backoff = 1
+        self.stats["reconnects"] += 1
+        print(f"[FLEET] Connected to aggregator {self.address[0]}:{self.address[1]} as {self.node}")
+        return True
+
+    def _schedule_reconnect(self):
+        self._next_connect = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.reconnect_max)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _read_spool(self):
+        if not os.path.exists(self.spool_path):
+            return []
+
+        readings = []
+        with open(self.spool_path, "r") as file:
+            for line in file:
+                try:
+                    readings.append(tuple(json.loads(line)))
+                except ValueError:
+                    continue
+        return readings
+
+    def _spool(self, readings):
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+
+        with open(self.spool_path, "a") as file:
+            for reading in readings:
+                file.write(json.dumps(reading) + "\n")
+
+        self.stats["spooled"] += len(readings)
+
+    def _rewrite_spool(self, readings):
+        if not readings:
+            os.remove(self.spool_path)
+            return
+
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            for reading in readings:
+                file.write(json.dumps(reading) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+async def read_message(reader, max_bytes=MAX_MESSAGE_BYTES):
+    kind, length = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+    if length > max_bytes:
+        raise ValueError(f"Message of {length} bytes exceeds the limit")
+    return kind, await reader.readexactly(length)
+
+class FleetAggregator:
+    # Central side. One asyncio loop serves every node connection; batches
+    # are processed in order on a single worker thread, so alert state and
+    # the journal need no further locking. Readings are stored under
+    # "node/sensor", which keeps the store's (sensor, ts) key ordered by
+    # node and time, and the archive, report and store tooling unchanged.
+    # The last timestamp and alert flags of every sensor are saved to
+    # state_file (and the change log next to it) before a batch is
+    # acknowledged, so a batch resent after a restart is still recognised
+    # and alerts are not sent twice.
+
+    def __init__(
+        self,
+        host=FLEET_HOST,
+        port=FLEET_PORT,
+        log_interval=LOG_INTERVAL_SECONDS,
+        secret=FLEET_SECRET,
+        state_file=FLEET_STATE_FILE
+    ):
+        if not secret:
+            raise ValueError("The fleet aggregator needs a shared secret (PITHERM_FLEET_SECRET)")
+
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.log_interval = log_interval
+        self.state_file = state_file
+        self._state_changes = 0
+        self.saved = self._load_state()
+        self.states = {}
+        self.nodes = {}
+        self.ready = threading.Event()
+        self.stats = {"batches": 0, "readings": 0, "duplicates": 0, "logged": 0}
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fleet-ingest")
+        self._loop = None
+        self._server = None
+
+    def run(self):
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        print(f"[OK] Fleet aggregator listening on {self.host}:{self.port}")
+        self.ready.set()
+
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer)
+        node = None
+
+        try:
+            nonce = os.urandom(NONCE_BYTES)
+            writer.write(encode_message(CHALLENGE, nonce))
+            await writer.drain()
+
+            kind, body = await asyncio.wait_for(read_message(reader, MAX_HELLO_BYTES), HELLO_TIMEOUT_SECONDS)
+            if kind != HELLO:
+                raise ValueError("Expected a hello")
+
+            mac, body = body[:MAC_BYTES], body[MAC_BYTES:]
+            if not hmac.compare_digest(mac, sign_hello(self.secret, nonce, body)):
+                raise ValueError(f"Hello from {peer} failed authentication")
+
+            hello = json.loads(body)
+            node = str(hello["node"])
+            sensors = [entry["name"] for entry in hello["sensors"]]
+            await self._loop.run_in_executor(self._executor, self._register, node, hello["sensors"], peer)
+
+            while True:
+                kind, body = await read_message(reader)
+                if kind != BATCH:
+                    raise ValueError(f"Unexpected message type {kind}")
+
+                batch_id, records = decode_batch(body)
+                await self._loop.run_in_executor(self._executor, self.ingest, node, sensors, records)
+
+                writer.write(encode_message(ACK, BATCH_ID.pack(batch_id)))
+                await writer.drain()
+
+        except asyncio.IncompleteReadError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, struct.error, zlib.error, asyncio.TimeoutError) as e:
+            print(f"[FLEET] Dropping connection from {node or peer}:", e)
+        finally:
+            if node in self.nodes and self.nodes[node]["peer"] == peer:
+                self.nodes[node]["connected"] = False
+                FLEET_NODES.set(sum(1 for info in self.nodes.values() if info["connected"]))
+                print(f"[FLEET] Node {node} disconnected.")
+            writer.close()
+
+    def _register(self, node, sensors, peer):
+        for entry in sensors:
+            key = f"{node}/{entry['name']}"
+            config = SensorConfig(key, temp_high=entry["temp_high"], temp_low=entry["temp_low"])
+
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = SensorState(config)
+                saved = self.saved.get(key)
+                if saved:
+                    for flag, value in saved["flags"].items():
+                        setattr(state, flag, value)
+                    state._last_log_time = saved["last_log_time"]
+                    state.rules_digest = saved["rules_digest"]
+                    state.rule_flags = saved["rule_flags"]
+            else:
+                state.temp_high, state.temp_low = config.temp_high, config.temp_low
+
+        info = self.nodes.setdefault(node, {"readings": 0, "batches": 0, "last_seen": None})
+        info.update({"peer": peer, "connected": True, "sensors": [entry["name"] for entry in sensors]})
+        FLEET_NODES.set(sum(1 for info in self.nodes.values() if info["connected"]))
+        print(f"[FLEET] Node {node} connected from {peer} ({len(sensors)} sensors).")
+
+    def _load_state(self):
+        # The last full state, then the changes appended since, in order;
+        # a torn last line from a crash mid-append is skipped.
+        saved = {}
+        try:
+            with open(self.state_file, "r") as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print("[WARN] Fleet state unreadable, starting fresh:", e)
+
+        try:
+            with open(self.state_file + ".log", "r") as file:
+                for line in file:
+                    try:
+                        saved.update(json.loads(line))
+                    except ValueError:
+                        continue
+                    self._state_changes += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print("[WARN] Fleet state changes unreadable:", e)
+
+        return saved
+
+    def _save_state(self, keys):
+        # Appends the changed entries and fsyncs them, since the batch is
+        # acknowledged after this returns. The log is folded into the full
+        # state file every FLEET_STATE_COMPACT_CHANGES saves.
+        changes = {}
+        for key in keys:
+            state = self.states[key]
+            changes[key] = self.saved[key] = {
+                "last_ts": state.history.latest()[0],
+                "temp_high": state.temp_high,
+                "temp_low": state.temp_low,
+                "last_log_time": state._last_log_time,
+                "flags": {flag: getattr(state, flag) for flag in FLAGS},
+                "rules_digest": state.rules_digest,
+                "rule_flags": state.rule_flags
+            }
+
+        directory = os.path.dirname(self.state_file) or "."
+        log_path = self.state_file + ".log"
+
+        if self._state_changes >= FLEET_STATE_COMPACT_CHANGES:
+            tmp_path = self.state_file + ".tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(self.saved, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.state_file)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            fsync_directory(directory)
+            self._state_changes = 0
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        created = not os.path.exists(log_path)
+
+        with open(log_path, "a") as file:
+            file.write(json.dumps(changes) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        if created:
+            fsync_directory(directory)
+        self._state_changes += 1
+
+    def ingest(self, node, sensors, records):
+        rows = []
+        duplicates = 0
+        changed = set()
+
+        for index, ts, temp, hum in records:
+            if index >= len(sensors):
+                continue
+
+            key = f"{node}/{sensors[index]}"
+            state = self.states[key]
+
+            # A batch whose ACK was lost is sent again after reconnecting,
+            # possibly to an aggregator that has restarted since.
+            latest = state.history.latest()
+            last_ts = latest[0] if latest else self.saved.get(key, {}).get("last_ts")
+            if last_ts is not None and ts <= last_ts:
+                duplicates += 1
+                continue
+
+            state.history.append(ts, temp, hum)
+            evaluate_alerts(state, f"[{key}] ", temp, hum)
+            changed.add(key)
+
+            if ts - state._last_log_time >= self.log_interval:
+                state._last_log_time = ts
+                rows.append((datetime.fromtimestamp(ts), key, temp, hum))
+
+        log_readings(rows)
+        if changed:
+            self._save_state(changed)
+
+        info = self.nodes[node]
+        info["batches"] += 1
+        info["readings"] += len(records) - duplicates
+        info["last_seen"] = time.time()
+
+        self.stats["batches"] += 1
+        self.stats["readings"] += len(records) - duplicates
+        self.stats["duplicates"] += duplicates
+        self.stats["logged"] += len(rows)
+
+        FLEET_BATCHES.inc()
+        FLEET_READINGS.inc("accepted", amount=len(records) - duplicates)
+        if duplicates:
+            FLEET_READINGS.inc("duplicate", amount=duplicates)
+
+    def thresholds(self):
+        # (high, low) of every sensor the fleet has reported, including
+        # nodes not connected since the last restart, for build_report.
+        thresholds = {None: (TEMP_THRESHOLD_HIGH, TEMP_THRESHOLD_LOW)}
+        for key, saved in list(self.saved.items()):
+            if "temp_high" in saved:
+                thresholds[key] = (saved["temp_high"], saved["temp_low"])
+        for key, state in list(self.states.items()):
+            thresholds[key] = (state.temp_high, state.temp_low)
+        return thresholds
+
+    def monthly_report(self, month_str=None):
+        # One workbook of every reading would outgrow Excel's sheet limit
+        # and a sensible email at fleet size, so only the summary is sent.
+        send_monthly_report(month_str, thresholds=self.thresholds(), readings=False)
+
+    def report(self):
+        now = time.time()
+        connected = [node for node, info in self.nodes.items() if info["connected"]]
+        stale = [
+            node for node, info in self.nodes.items()
+            if info["last_seen"] is None or now - info["last_seen"] > FLEET_NODE_STALE_SECONDS
+        ]
+
+        print(
+            f"[FLEET] {len(connected)}/{len(self.nodes)} nodes connected, "
+            f"{self.stats['readings']} readings in {self.stats['batches']} batches."
+        )
+        if stale:
+            print(f"[FLEET] No data for over {FLEET_NODE_STALE_SECONDS}s from: " + ", ".join(sorted(stale)))
+        return {"connected": connected, "stale": stale, "stats": dict(self.stats)}
@@ -1,75 +1,155 @@
 import platform
+from concurrent.futures import ThreadPoolExecutor
+from src.pitherm.sensors import (
+    DHT_AVAILABLE,
+    DHTSensor,
+    SimulatedSensor,
+    SensorRegistry,
+    load_sensor_configs
+)
+from src.pitherm.simulation import make_simulated_sensor
+from src.pitherm.acquisition import FilteredSensor
+from src.pitherm.lcd import LCDRenderer
+from src.pitherm.startup import STARTUP
+from src.pitherm.config import SIM_SOURCE, SIM_SPEED
 
 HARDWARE_AVAILABLE = False
 
 try:
     if platform.system() == "Linux":
-        import adafruit_dht
-        import board
         import RPi.GPIO as GPIO
         from RPLCD.i2c import CharLCD
 
-        HARDWARE_AVAILABLE = True
+        HARDWARE_AVAILABLE = DHT_AVAILABLE
 except ImportError:
     HARDWARE_AVAILABLE = False
 
 class HardwareController:
-    def __init__(self):
-        self.dht_device = None
+    def __init__(self, sensor_configs=None):
+        self.sensor_configs = sensor_configs or load_sensor_configs()
+        self.sensors = None
         self.lcd = None
+        self.lcd_renderer = None
         self.led_pin = 17
         self.hardware_ready = False
+        # The self-test readings, handed out as the first read_all() so the
+        # first cycle does not wait out the DHT minimum read interval.
+        self._initial_readings = None
 
         if not HARDWARE_AVAILABLE:
             print("[INFO] Running in development mode (hardware libraries not available)")
+            self.sensors = self._simulated_registry()
             return
 
-        try:
-            self.dht_device = adafruit_dht.DHT22(board.D4)
-
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.led_pin, GPIO.OUT)
-            GPIO.output(self.led_pin, GPIO.LOW)
-
-            self.lcd = CharLCD('PCF8574', 0x27)
+        # The DHT self-test dominates startup, so GPIO and the LCD are set
+        # up alongside it rather than after it.
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="hw-init") as executor:
+            sensors = executor.submit(self._init_sensors)
+            gpio = executor.submit(self._init_gpio)
+            lcd = executor.submit(self._init_lcd)
 
-            test_temp = self.dht_device.temperature
-            test_hum = self.dht_device.humidity
-
-            if test_temp is None or test_hum is None:
-                raise RuntimeError("Initial DHT read returned None")
+        try:
+            self.sensors, self._initial_readings = sensors.result()
+            gpio.result()
+            self.lcd = lcd.result()
 
-            self.lcd.clear()
             self.lcd.write_string("PiTherm Ready")
 
+            self.lcd_renderer = LCDRenderer(self.lcd)
+            self.lcd_renderer.start()
+
             self.hardware_ready = True
-            print("[OK] Hardware initialized successfully.")
+            print(f"[OK] Hardware initialized successfully ({len(self.sensor_configs)} sensors).")
 
         except Exception as e:
             print("[WARN] Hardware initialization failed. Switching to development mode:", e)
-            self.dht_device = None
+            if not sensors.exception():
+                sensors.result()[0].close()
+            self.sensors = self._simulated_registry()
+            self._initial_readings = None
             self.lcd = None
+            self.lcd_renderer = None
             self.hardware_ready = False
 
-    def read_sensor(self):
-        if self.hardware_ready:
-            return self.dht_device.temperature, self.dht_device.humidity
-        else:
-            return 24.0, 50.0
+    def _init_sensors(self):
+        with STARTUP.stage("hardware.sensors"):
+            registry = SensorRegistry()
+            for config in self.sensor_configs:
+                registry.register(FilteredSensor(DHTSensor(config)))
+
+            # One sample per sensor is enough to prove the wiring; a full
+            # median burst would add a DHT minimum interval per sample.
+            sensors = list(registry.sensors.values())
+            try:
+                with ThreadPoolExecutor(max_workers=len(sensors), thread_name_prefix="hw-selftest") as executor:
+                    results = list(executor.map(lambda sensor: sensor.read(burst=1), sensors))
+
+                readings = {}
+                for sensor, (test_temp, test_hum) in zip(sensors, results):
+                    if test_temp is None or test_hum is None:
+                        raise RuntimeError(f"Initial DHT read returned None ({sensor.config.name})")
+                    readings[sensor.config.name] = (test_temp, test_hum)
+            except Exception:
+                registry.close()
+                raise
+
+            return registry, readings
+
+    def _init_gpio(self):
+        with STARTUP.stage("hardware.gpio"):
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.led_pin, GPIO.OUT)
+            GPIO.output(self.led_pin, GPIO.LOW)
+
+    def _init_lcd(self):
+        with STARTUP.stage("hardware.lcd"):
+            lcd = CharLCD('PCF8574', 0x27)
+            lcd.clear()
+            return lcd
+
+    def _simulated_registry(self):
+        registry = SensorRegistry()
+        for config in self.sensor_configs:
+            if SIM_SOURCE:
+                sensor = make_simulated_sensor(config, SIM_SOURCE, SIM_SPEED)
+                registry.register(FilteredSensor(sensor, min_interval=0, burst=1))
+            else:
+                registry.register(SimulatedSensor(config))
+        return registry
+
+    @property
+    def primary_sensor(self):
+        return self.sensor_configs[0].name
+
+    def read_sensor(self, name=None):
+        return self.sensors.read(name or self.primary_sensor)
+
+    def read_all(self):
+        if self._initial_readings is not None:
+            readings, self._initial_readings = self._initial_readings, None
+            return readings
+        return self.sensors.read_all()
 
     def set_led(self, state: bool):
         if self.hardware_ready:
             GPIO.output(self.led_pin, GPIO.HIGH if state else GPIO.LOW)
 
+    def set_lcd_screens(self, screens):
+        if self.lcd_renderer is not None:
+            self.lcd_renderer.set_screens(screens)
+
     def update_lcd(self, temp, hum):
-        if self.hardware_ready:
-            self.lcd.clear()
-            self.lcd.write_string(f"Temp: {temp:.1f}C")
-            self.lcd.crlf()
-            self.lcd.write_string(f"Hum : {hum:.1f}%")
+        if self.lcd_renderer is None:
+            return
+
+        if self.lcd_renderer.screens:
+            self.lcd_renderer.refresh()
+        else:
+            self.lcd_renderer.show([f"Temp: {temp:.1f}C", f"Hum : {hum:.1f}%"])
 
     def cleanup(self):
         if self.hardware_ready:
+            self.lcd_renderer.stop()
             self.lcd.clear()
             GPIO.cleanup()
-            self.dht_device.exit()
\ No newline at end of file
+        self.sensors.close()
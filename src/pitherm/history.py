@@ -0,0 +1,187 @@
+import importlib.util
+from array import array
+from collections import deque
+from src.pitherm.config import HISTORY_CAPACITY, HISTORY_WINDOWS
+
+# numpy is only needed once there is history to crunch, so it is found
+# here but imported on first use to keep it out of startup.
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+def load_numpy():
+    import numpy
+    return numpy
+
+FIELDS = ("temperature", "humidity")
+
+class RollingWindow:
+    # Sliding window over a ReadingBuffer field with O(1) amortized
+    # min/max (monotonic deques) and mean (running sum).
+
+    def __init__(self, buffer, field, seconds):
+        self.buffer = buffer
+        self.values = getattr(buffer, field)
+        self.seconds = seconds
+        self.start_seq = 0
+        self.total = 0.0
+        self._min = deque()
+        self._max = deque()
+
+    def push(self, seq, ts, value):
+        self.total += value
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+        cutoff = ts - self.seconds
+
+        while self.start_seq < seq and self.buffer.timestamp_at(self.start_seq) < cutoff:
+            self._evict()
+
+    def _evict(self):
+        # Only valid while start_seq is still inside the ring, which holds
+        # because eviction happens before the slot is overwritten.
+        self.total -= self.values[self.start_seq % self.buffer.capacity]
+
+        if self._min and self._min[0][0] == self.start_seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == self.start_seq:
+            self._max.popleft()
+
+        self.start_seq += 1
+
+    def stats(self):
+        count = self.buffer.seq - self.start_seq
+        if count <= 0:
+            return {"count": 0, "min": None, "max": None, "mean": None}
+
+        return {
+            "count": count,
+            "min": self._min[0][1],
+            "max": self._max[0][1],
+            "mean": self.total / count
+        }
+
+class ReadingBuffer:
+    def __init__(self, capacity=HISTORY_CAPACITY, windows=HISTORY_WINDOWS):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.temperature = array("d", bytes(8 * capacity))
+        self.humidity = array("d", bytes(8 * capacity))
+        self.seq = 0
+
+        self.windows = {
+            field: {seconds: RollingWindow(self, field, seconds) for seconds in windows}
+            for field in FIELDS
+        }
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def timestamp_at(self, seq):
+        return self.timestamps[seq % self.capacity]
+
+    def append(self, ts, temp, hum):
+        seq = self.seq
+        slot = seq % self.capacity
+
+        # Windows evict the slot about to be overwritten before it is reused.
+        for field_windows in self.windows.values():
+            for window in field_windows.values():
+                while window.start_seq <= seq - self.capacity:
+                    window._evict()
+
+        self.timestamps[slot] = ts
+        self.temperature[slot] = temp
+        self.humidity[slot] = hum
+        self.seq = seq + 1
+
+        for window in self.windows["temperature"].values():
+            window.push(seq, ts, temp)
+        for window in self.windows["humidity"].values():
+            window.push(seq, ts, hum)
+
+    def latest(self):
+        if not self.seq:
+            return None
+        slot = (self.seq - 1) % self.capacity
+        return self.timestamps[slot], self.temperature[slot], self.humidity[slot]
+
+    def readings(self):
+        # Every buffered (ts, temperature, humidity), oldest first.
+        seq = self.seq
+        return [
+            (self.timestamps[s % self.capacity], self.temperature[s % self.capacity], self.humidity[s % self.capacity])
+            for s in range(seq - min(seq, self.capacity), seq)
+        ]
+
+    def _first_seq_since(self, cutoff):
+        low = self.seq - len(self)
+        high = self.seq
+
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamp_at(mid) < cutoff:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _slice(self, values, start_seq):
+        start = start_seq % self.capacity
+        end = self.seq % self.capacity
+
+        if start_seq >= self.seq:
+            return values[0:0]
+        if start < end:
+            return values[start:end]
+        return values[start:] + values[:end]
+
+    def window(self, seconds, field="temperature"):
+        latest = self.latest()
+        if latest is None:
+            return array("d"), array("d")
+
+        start_seq = self._first_seq_since(latest[0] - seconds)
+        return self._slice(self.timestamps, start_seq), self._slice(getattr(self, field), start_seq)
+
+    def stats(self, seconds, field="temperature"):
+        window = self.windows[field].get(seconds)
+        if window is not None:
+            return window.stats()
+
+        _, values = self.window(seconds, field)
+        if not values:
+            return {"count": 0, "min": None, "max": None, "mean": None}
+
+        return {
+            "count": len(values),
+            "min": min(values),
+            "max": max(values),
+            "mean": sum(values) / len(values)
+        }
+
+    def percentiles(self, seconds, quantiles=(50, 90, 99), field="temperature"):
+        _, values = self.window(seconds, field)
+        if not values:
+            return {q: None for q in quantiles}
+
+        if NUMPY_AVAILABLE:
+            numpy = load_numpy()
+            result = numpy.percentile(numpy.frombuffer(values, dtype=numpy.float64), quantiles)
+            return {q: float(v) for q, v in zip(quantiles, result)}
+
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        result = {}
+
+        for q in quantiles:
+            position = last * q / 100
+            lower = int(position)
+            upper = min(lower + 1, last)
+            result[q] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+        return result
@@ -0,0 +1,76 @@
+import csv
+import os
+import threading
+from datetime import datetime
+from src.pitherm.config import DEFAULT_SENSOR
+from src.pitherm.writebuffer import WRITE_BUFFER
+
+JOURNAL_PREFIX = "temp_log_"
+JOURNAL_EXT = ".csv"
+JOURNAL_HEADER = ["timestamp", "temperature", "humidity", "sensor"]
+
+def journal_filename(month_str):
+    return f"{JOURNAL_PREFIX}{month_str}{JOURNAL_EXT}"
+
+# Append-only CSV log split by month. Rows go through the shared write
+# buffer, which commits them to the SD card in batches.
+
+class MonthlyLog:
+    def __init__(self, directory, prefix, header, ext=".csv", buffer=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.header = header
+        self.ext = ext
+        self.buffer = buffer or WRITE_BUFFER
+        self._month = None
+        self._lock = threading.Lock()
+
+    def path_for(self, month_str):
+        return os.path.join(self.directory, f"{self.prefix}{month_str}{self.ext}")
+
+    def write_row(self, when, fields):
+        month_str = when.strftime("%Y-%m")
+
+        with self._lock:
+            if month_str != self._month:
+                self._month = month_str
+                print(f"[JOURNAL] Writing to {self.path_for(month_str)}")
+
+            self.buffer.append(
+                self.path_for(month_str),
+                ",".join(str(field) for field in fields),
+                header=",".join(self.header)
+            )
+
+    def pending_rows(self, month_str):
+        return self.buffer.pending(self.path_for(month_str))
+
+    def flush(self):
+        self.buffer.flush()
+
+    def close(self):
+        with self._lock:
+            self.buffer.flush("close")
+            self._month = None
+
+class ReadingJournal(MonthlyLog):
+    def __init__(self, directory):
+        super().__init__(directory, JOURNAL_PREFIX, JOURNAL_HEADER, JOURNAL_EXT)
+
+    def append(self, temp, hum, when=None, sensor=DEFAULT_SENSOR):
+        when = when or datetime.now()
+        self.write_row(when, [int(when.timestamp()), temp, hum, sensor])
+
+def iter_journal(path):
+    with open(path, mode="r", newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+
+        for row in reader:
+            if len(row) < 3:
+                continue
+            sensor = row[3] if len(row) > 3 else DEFAULT_SENSOR
+            try:
+                yield datetime.fromtimestamp(int(row[0])), float(row[1]), float(row[2]), sensor
+            except ValueError:
+                continue
@@ -0,0 +1,145 @@
+import threading
+import time
+from src.pitherm.config import LCD_COLS, LCD_ROWS, LCD_ROTATE_SECONDS, LCD_MERGE_GAP
+from src.pitherm.watchdog import WATCHDOG
+
+def fit_lines(lines, cols=LCD_COLS, rows=LCD_ROWS):
+    lines = list(lines)[:rows]
+    lines += [""] * (rows - len(lines))
+    return [line[:cols].ljust(cols) for line in lines]
+
+def diff_runs(old, new, merge_gap=LCD_MERGE_GAP):
+    # Changed cells as (start, text) runs. Runs separated by a short gap
+    # are merged, since rewriting a couple of unchanged characters is
+    # cheaper than another cursor move.
+    runs = []
+    start = None
+    last_changed = None
+
+    for col, char in enumerate(new):
+        if old is not None and old[col] == char:
+            continue
+
+        if start is not None and col - last_changed - 1 <= merge_gap:
+            last_changed = col
+            continue
+
+        if start is not None:
+            runs.append((start, new[start:last_changed + 1]))
+        start = last_changed = col
+
+    if start is not None:
+        runs.append((start, new[start:last_changed + 1]))
+    return runs
+
+class LCDRenderer:
+    # Keeps a framebuffer of the HD44780 contents and sends only changed
+    # cells over I2C, from its own thread.
+
+    def __init__(self, lcd, cols=LCD_COLS, rows=LCD_ROWS, rotate_seconds=LCD_ROTATE_SECONDS):
+        self.lcd = lcd
+        self.cols = cols
+        self.rows = rows
+        self.rotate_seconds = rotate_seconds
+        self.framebuffer = [None] * rows
+        self.screens = []
+        self.stats = {"frames": 0, "cells_written": 0, "cursor_moves": 0}
+
+        self._frame = None
+        self._needs_refresh = False
+        self._screen_index = 0
+        self._next_rotation = None
+        self._wake = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="lcd-renderer", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=2):
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+
+        if self._thread:
+            self._thread.join(timeout)
+
+    def set_screens(self, screens):
+        with self._wake:
+            self.screens = list(screens)
+            self._screen_index = 0
+            self._next_rotation = time.monotonic() + self.rotate_seconds
+            self._wake.notify()
+
+    def show(self, lines):
+        with self._wake:
+            self._frame = fit_lines(lines, self.cols, self.rows)
+            self._wake.notify()
+
+    def refresh(self):
+        with self._wake:
+            self._needs_refresh = True
+            self._wake.notify()
+
+    def _current_screen(self):
+        screen = self.screens[self._screen_index % len(self.screens)]
+        try:
+            return fit_lines(screen(), self.cols, self.rows)
+        except Exception as e:
+            print("[WARN] LCD screen failed:", e)
+            return None
+
+    def _next_frame(self):
+        with self._wake:
+            while not self._stop:
+                now = time.monotonic()
+
+                if self.screens and now >= self._next_rotation:
+                    self._screen_index = (self._screen_index + 1) % len(self.screens)
+                    self._next_rotation = now + self.rotate_seconds
+                    self._needs_refresh = False
+                    return self._current_screen()
+
+                if self._frame is not None:
+                    frame, self._frame = self._frame, None
+                    return frame
+
+                if self._needs_refresh and self.screens:
+                    self._needs_refresh = False
+                    return self._current_screen()
+
+                self._wake.wait(self._next_rotation - now if self.screens else None)
+
+        return None
+
+    def _run(self):
+        while not self._stop:
+            frame = self._next_frame()
+            if frame is None:
+                continue
+
+            try:
+                with WATCHDOG.busy("lcd"):
+                    self._render(frame)
+            except Exception as e:
+                print("[WARN] LCD write failed:", e)
+                self.framebuffer = [None] * self.rows
+
+    def _render(self, frame):
+        for row, line in enumerate(frame):
+            for start, text in diff_runs(self.framebuffer[row], line):
+                self.lcd.cursor_pos = (row, start)
+                self.lcd.write_string(text)
+                self.stats["cursor_moves"] += 1
+                self.stats["cells_written"] += len(text)
+            self.framebuffer[row] = line
+
+        self.stats["frames"] += 1
@@ -1,124 +1,285 @@
+import itertools
 import os
-import time
+import shutil
 import threading
 from datetime import datetime
-from openpyxl import Workbook, load_workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
 from src.pitherm.smtp_client import SMTPClient
-from email.mime.application import MIMEApplication
-import csv
+from src.pitherm.alert import send_email_alert
+from src.pitherm.journal import ReadingJournal, JOURNAL_PREFIX, JOURNAL_EXT, journal_filename, iter_journal
+from src.pitherm.archive import archive_filename, iter_readings, write_archive
+from src.pitherm.report import build_report
+from src.pitherm.store import ReadingStore, iter_workbook
+from src.pitherm.scheduler import Scheduler
+from src.pitherm.writebuffer import WRITE_BUFFER
+from src.pitherm.config import (
+    DEFAULT_SENSOR,
+    REPORT_COMPRESS,
+    ARCHIVE_COMPACT,
+    STORE_ENABLED,
+    ARCHIVE_SCHEDULE,
+    MONTHLY_REPORT_SCHEDULE
+)
 
-_last_report_month = None
 _excel_lock = threading.Lock()
+_archive_lock = threading.Lock()
 BASE_LOG_DIR = "logs"
 CURRENT_DIR = os.path.join(BASE_LOG_DIR, "current")
 ARCHIVE_DIR = os.path.join(BASE_LOG_DIR, "archive")
+REPORT_DIR = os.path.join(BASE_LOG_DIR, "reports")
 
-def log_to_csv_fallback(temp, hum):
-    ensure_log_directories()
+_journal = ReadingJournal(CURRENT_DIR)
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = ReadingStore()
+    return _store
+
+def alert_write_failure(error):
+    # Write buffer failure listener: once per outage, since the buffer
+    # only reports the first failed commit until writes succeed again.
+    send_email_alert(
+        None,
+        None,
+        alert_type="log_failure",
+        detail=f"Log rows could not be written to the SD card and are held in memory: {error}"
+    )
 
-    fallback_file = os.path.join(CURRENT_DIR, "fallback_log.csv")
-    now = datetime.now()
-    file_exists = os.path.exists(fallback_file)
-
-    with open(fallback_file, mode="a", newline="") as file:
-        writer = csv.writer(file)
-
-        if not file_exists:
-            writer.writerow([
-                "Date", 
-                "Time", 
-                "Temperature (°C)", 
-                "Humidity (%)"
-            ])
-
-            writer.writerow([
-                now.strftime("%Y-%m-%d"),
-                now.strftime("%H:%M:%S"),
-                temp,
-                hum
-            ])
-    print("[FALLBACK] Logged reading to CSV.")
+WRITE_BUFFER.failure_listeners.append(alert_write_failure)
 
 def ensure_log_directories():
     os.makedirs(CURRENT_DIR, exist_ok=True)
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
+def compact_month(src_path, month_str):
+    # Converts a closed month to the archive format. Rows already archived
+    # for that month are kept and go first, so write_archive keeps them
+    # over the same rows in the source, and the source is only removed
+    # once the new archive has been written.
+    archived = os.path.join(ARCHIVE_DIR, archive_filename(month_str))
+
+    if src_path.endswith(".xlsx"):
+        readings = (
+            (datetime.fromtimestamp(ts), temp, hum, sensor)
+            for ts, sensor, temp, hum in iter_workbook(src_path)
+        )
+    else:
+        readings = iter_journal(src_path)
+
+    if os.path.exists(archived):
+        readings = itertools.chain(iter_readings(archived), readings)
+
+    rows = write_archive(readings, archived)
+    os.remove(src_path)
+
+    size_kb = os.path.getsize(archived) / 1024
+    print(f"[ARCHIVE] Compacted {os.path.basename(src_path)} into {os.path.basename(archived)} ({rows} rows, {size_kb:.1f} KB)")
+
+def archive_month_file(src_path, month_str):
+    file = os.path.basename(src_path)
+
+    if ARCHIVE_COMPACT:
+        # Workbooks are source data too (months logged before the
+        # journal), so they are merged into the archive like journals.
+        try:
+            compact_month(src_path, month_str)
+            return
+        except Exception as e:
+            print(f"[WARN] Could not compact {file}, archiving it as-is:", e)
+
+    dst_path = os.path.join(ARCHIVE_DIR, file)
+
+    if src_path != dst_path and not os.path.exists(dst_path):
+        os.rename(src_path, dst_path)
+        print(f"[ARCHIVE] Moved {file} to archive.")
+
+def closed_month(path, current_month):
+    # The month of a closed-month log file, or None for anything else.
+    name, ext = os.path.splitext(os.path.basename(path))
+
+    if name.startswith(JOURNAL_PREFIX) and ext in (".xlsx", JOURNAL_EXT):
+        month = name.replace(JOURNAL_PREFIX, "")
+        if month != current_month:
+            return month
+    return None
+
+def move_closed_journals(current_month):
+    # Moves closed-month journals out of CURRENT_DIR. This is the only
+    # step that needs the journal lock: a late row for that month then
+    # starts a new journal, compacted on the next run, and a compaction
+    # cut short leaves the journal in ARCHIVE_DIR to be picked up again.
+    with _excel_lock:
+        for file in os.listdir(CURRENT_DIR):
+            src_path = os.path.join(CURRENT_DIR, file)
+            if not file.endswith(JOURNAL_EXT) or closed_month(src_path, current_month) is None:
+                continue
+
+            _journal.close()
+            dst_path = os.path.join(ARCHIVE_DIR, file)
+
+            if os.path.exists(dst_path):
+                # Left over from an interrupted run; add the new rows.
+                with open(src_path, mode="r", newline="") as src, open(dst_path, mode="a", newline="") as dst:
+                    next(src, None)
+                    shutil.copyfileobj(src, dst)
+                os.remove(src_path)
+            else:
+                os.rename(src_path, dst_path)
+
 def archive_old_logs():
     ensure_log_directories()
 
     current_month = datetime.now().strftime("%Y-%m")
 
-    for file in os.listdir(CURRENT_DIR):
-        if file.startswith("temp_log_") and file.endswith(".xlsx"):
-            file_month = file.replace("temp_log_", "").replace(".xlsx", "")
+    if ARCHIVE_COMPACT:
+        move_closed_journals(current_month)
+
+    # Journals go first, so in the month the journal replaced the
+    # workbook, the workbook's rows are merged into the journal's archive.
+    candidates = [os.path.join(CURRENT_DIR, file) for file in os.listdir(CURRENT_DIR)]
+    if ARCHIVE_COMPACT:
+        candidates += [os.path.join(ARCHIVE_DIR, file) for file in os.listdir(ARCHIVE_DIR)]
+    candidates.sort(key=lambda path: (not path.endswith(JOURNAL_EXT), path))
 
-            if file_month != current_month:
-                src_path = os.path.join(CURRENT_DIR, file)
-                dst_path = os.path.join(ARCHIVE_DIR, file)
+    for path in candidates:
+        file_month = closed_month(path, current_month)
+        if file_month is None:
+            continue
 
-                if not os.path.exists(dst_path):
-                    os.rename(src_path, dst_path)
-                    print(f"[ARCHIVE] Moved {file} to archive.")
+        if path.endswith(JOURNAL_EXT) and not ARCHIVE_COMPACT:
+            with _excel_lock:
+                _journal.close()
+                archive_month_file(path, file_month)
+        else:
+            archive_month_file(path, file_month)
+
+def archive_logs_job():
+    # Compaction runs without the journal lock, so logging carries on
+    # meanwhile; _archive_lock keeps the startup and scheduled runs apart.
+    with _archive_lock:
+        archive_old_logs()
 
-def log_to_excel(temp, hum):
+def log_to_excel(temp, hum, sensor=DEFAULT_SENSOR, when=None):
     ensure_log_directories()
-    
+
+    now = when or datetime.now()
 
     with _excel_lock:
-        archive_old_logs()
+        _journal.append(temp, hum, when=now, sensor=sensor)
 
-        date_str = datetime.now().strftime("%Y-%m")
-        filename = os.path.join(CURRENT_DIR, f"temp_log_{date_str}.xlsx")
-    
+    if STORE_ENABLED:
         try:
-            try:
-                wb = load_workbook(filename)
-                ws = wb.active
-            except FileNotFoundError:
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Monthly Readings"
-                ws.append(["Date", "Time", "Temperature (°C)", "Humidity (%)"])
-                for col in range(1, 5):
-                    ws[f"{get_column_letter(col)}1"].font = Font(bold=True)
-            now = datetime.now()
-            ws.append([
-                now.strftime("%Y-%m-%d"), 
-                now.strftime("%H:%M:%S"), 
-                temp, 
-                hum
-            ])
-            wb.save(filename)
+            get_store().insert(now.timestamp(), temp, hum, sensor)
         except Exception as e:
-            print("[CRITICAL] Excel logging failed. Switching to CSV Fallback:", e)
-            log_to_csv_fallback(temp, hum)
+            print("[WARN] Historical store write failed:", e)
+
+def log_readings(rows):
+    # rows are (when, sensor, temp, hum). Used by the fleet aggregator:
+    # one journal lock and one store transaction for a whole batch.
+    if not rows:
+        return
+
+    ensure_log_directories()
 
-def send_monthly_report():
     with _excel_lock:
-        month_str = datetime.now().strftime("%Y-%m")
-        filename = os.path.join(CURRENT_DIR, f"temp_log_{month_str}.xlsx")
+        for when, sensor, temp, hum in rows:
+            _journal.append(temp, hum, when=when, sensor=sensor)
 
-    if not os.path.exists(filename):
-        print("[WARN] No Excel File to send.")
-        return
+    if STORE_ENABLED:
+        try:
+            get_store().insert_many((when.timestamp(), sensor, temp, hum) for when, sensor, temp, hum in rows)
+        except Exception as e:
+            print("[WARN] Historical store write failed:", e)
+
+def find_journal(month_str):
+    candidates = [
+        os.path.join(CURRENT_DIR, journal_filename(month_str)),
+        os.path.join(ARCHIVE_DIR, journal_filename(month_str)),
+        os.path.join(ARCHIVE_DIR, archive_filename(month_str))
+    ]
+
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+def export_month_to_excel(month_str, output_path=None):
+    journal_path = find_journal(month_str)
+
+    if journal_path is None:
+        return None
+
+    _journal.flush()
+    # Kept out of CURRENT_DIR so an export is never mistaken for logged data.
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    output_path = output_path or os.path.join(REPORT_DIR, f"temp_export_{month_str}.xlsx")
+    return build_report(journal_path, output_path, summary=False)["path"]
+
+def previous_month(now=None):
+    now = now or datetime.now()
+    year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+    return f"{year:04d}-{month:02d}"
+
+def send_monthly_report(month_str=None, thresholds=None, readings=True):
+    # thresholds and readings are passed to build_report; the fleet
+    # aggregator sends its nodes' thresholds and the summary only.
+    month_str = month_str or previous_month()
+    current_month = datetime.now().strftime("%Y-%m")
+
+    # Like compaction, the report is built without the journal lock so
+    # logging carries on meanwhile: a closed month's journal is moved out
+    # of CURRENT_DIR first, and _archive_lock keeps the archive job from
+    # compacting it away during the build.
+    if month_str != current_month:
+        ensure_log_directories()
+        move_closed_journals(current_month)
+    else:
+        _journal.flush()
+
+    with _archive_lock:
+        journal_path = find_journal(month_str)
+
+        if journal_path is None:
+            print(f"[WARN] No readings logged for {month_str}. Report skipped.")
+            return
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        output_path = os.path.join(REPORT_DIR, f"temp_report_{month_str}.xlsx")
+        report = build_report(
+            journal_path,
+            output_path,
+            summary=True,
+            compress=REPORT_COMPRESS,
+            thresholds=thresholds,
+            trace_memory=True,
+            readings=readings
+        )
+
+    filename = report["path"]
+    archived = "" if readings else " The readings themselves are kept in the archive."
 
     subject = f"Monthly Temp Report - {month_str}"
     body = f"""
-    <p>Attached is the temperature and humidity log for {month_str}.</p>
+    <p>Attached is the temperature and humidity report for {month_str}.</p>
+    <p>{report["rows"]} readings logged. See the Summary sheet for daily min/max/mean
+    and time spent outside the thresholds.{archived}</p>
     <p>- Raspberry Pi Monitor</p>
     """
 
+    subtype = "zip" if filename.endswith(".zip") else "vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    from email.mime.application import MIMEApplication
+
     with open(filename, 'rb') as f:
-        attachment = MIMEApplication(
-            f.read(),
-            _subtype='vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        attachment = MIMEApplication(f.read(), _subtype=subtype)
         attachment.add_header(
             'Content-Disposition',
             'attachment',
-            filename=filename
+            filename=os.path.basename(filename)
         )
     
     SMTPClient().send(
@@ -128,23 +289,14 @@ def send_monthly_report():
         attachment=attachment
     )
 
-    return body #temporary
-
-def check_and_send_monthly_report():
-    global _last_report_month
-
-    now = datetime.now()
-    current_month = now.strftime("%Y-%m")
-
-    if now.day == 1 and now.hour >= 7 and _last_report_month != current_month:
-            send_monthly_report()
-            _last_report_month = current_month
-
-def run_scheduler():
-    while True:
-        check_and_send_monthly_report()
-        time.sleep(60)
+def start_scheduler(report=send_monthly_report):
+    # Archiving runs once at startup too, in case the service was down
+    # over a month boundary. Compaction can take a while on a Pi, so it
+    # runs in the background instead of delaying the first reading.
+    threading.Thread(target=archive_logs_job, name="archive-startup", daemon=True).start()
 
-def start_scheduler():
-    thread = threading.Thread(target=run_scheduler, daemon=True)
-    thread.start()
\ No newline at end of file
+    scheduler = Scheduler()
+    scheduler.add("archive_logs", ARCHIVE_SCHEDULE, archive_logs_job)
+    scheduler.add("monthly_report", MONTHLY_REPORT_SCHEDULE, report)
+    scheduler.start()
+    return scheduler
\ No newline at end of file
@@ -1,83 +1,512 @@
+import asyncio
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from src.pitherm.config import (
-    TEMP_THRESHOLD_HIGH,
-    TEMP_THRESHOLD_LOW,
     LOG_INTERVAL_SECONDS,
     READ_INTERVAL_SECONDS,
-    TEMP_HYSTERESIS
+    READ_INTERVAL_FAST_SECONDS,
+    RING_SLOTS,
+    TEMP_HYSTERESIS,
+    TREND_ALERTS,
+    TREND_RESET_FACTOR,
+    ADAPTIVE_SAMPLING,
+    LCD_ROTATE_SCREENS,
+    SENSOR_READ_TIMEOUT_SECONDS,
+    SINK_TIMEOUT_SECONDS,
+    SINK_WORKERS
 )
 from src.pitherm.alert import send_email_alert
 from src.pitherm.logging_service import log_to_excel
 from src.pitherm.dashboard import send_to_adafruit
+from src.pitherm.history import ReadingBuffer
+from src.pitherm.rollup import RollupStore
+from src.pitherm.trend import TrendDetector
+from src.pitherm.rules import get_rule_engine
+from src.pitherm.acquisition import AdaptiveSampler
+from src.pitherm.writebuffer import WRITE_BUFFER
+from src.pitherm.snapshot import FLAGS
+from src.pitherm.watchdog import WATCHDOG
+from src.pitherm.metrics import timed, LOOP_LAG, SINK_TIMEOUTS, STAGE_SECONDS
 
-class Monitor:
-    def __init__(self, hardware):
-        self.hardware = hardware
+# Enough log times to cover the whole ring at the fastest sampling rate,
+# so a restarted logging process can tell which replayed readings were due.
+RECENT_LOG_TIMES = RING_SLOTS * READ_INTERVAL_FAST_SECONDS // LOG_INTERVAL_SECONDS + 1
+
+class SensorState:
+    def __init__(self, config):
+        self.name = config.name
+        self.temp_high = config.temp_high
+        self.temp_low = config.temp_low
         self.alert_sent_high = False
         self.alert_sent_low = False
+        self.trend_alert_high = False
+        self.trend_alert_low = False
+        # One bit per alert rule; see rules.RuleEngine.
+        self.rule_flags = 0
+        self.rules_digest = 0
         self._last_log_time = 0
+        self.log_times = deque(maxlen=RECENT_LOG_TIMES)
+        self.history = ReadingBuffer()
+
+TREND = TrendDetector()
+
+def evaluate_trend(state, label, temperature, humidity, notify=True, detector=TREND):
+    # Early warning when the fitted trend reaches a threshold within the
+    # lead time. Sent once, and re-armed only after the projection moves
+    # well past the lead time or the real alert has fired.
+    forecast = detector.forecast(state.history)
+    reset_after = detector.lead_seconds * TREND_RESET_FACTOR
+
+    for kind, threshold, flag, sent in (
+        ("high", state.temp_high, "trend_alert_high", state.alert_sent_high),
+        ("low", state.temp_low, "trend_alert_low", state.alert_sent_low)
+    ):
+        if sent:
+            setattr(state, flag, False)
+            continue
+
+        eta = detector.seconds_until(forecast, threshold)
+
+        if eta is not None and eta <= detector.lead_seconds:
+            if not getattr(state, flag):
+                minutes = eta / 60
+                direction = "rising" if kind == "high" else "falling"
+                print(f"[WARN] {label}Temperature {direction}, {kind} threshold expected in {minutes:.0f} min.")
+                if notify:
+                    detail = (
+                        f"Trend: {forecast['slope_per_hour']:+.1f}°C/h, "
+                        f"{threshold:.1f}°C expected in about {minutes:.0f} min"
+                    )
+                    send_email_alert(temperature, humidity, alert_type=f"trend_{kind}", sensor=state.name, detail=detail)
+                setattr(state, flag, True)
+
+        elif getattr(state, flag) and (eta is None or eta > reset_after):
+            print(f"[INFO] {label}{kind.capitalize()} temperature trend eased.")
+            setattr(state, flag, False)
+
+def evaluate_alerts(state, label, temperature, humidity, notify=True):
+    high_reset = state.temp_high - TEMP_HYSTERESIS
+    low_reset = state.temp_low + TEMP_HYSTERESIS
+
+    if temperature >= state.temp_high:
+        if not state.alert_sent_high:
+            print(f"[ALERT] {label}High Temperature threshold reached.")
+            if notify:
+                send_email_alert(temperature, humidity, alert_type="high", sensor=state.name)
+                WRITE_BUFFER.flush("alert", wait=False)
+            state.alert_sent_high = True
+
+    elif state.alert_sent_high and temperature <= high_reset:
+        print(f"[INFO] {label}High temperature recovered.")
+        state.alert_sent_high = False
+
+    if temperature <= state.temp_low:
+        if not state.alert_sent_low:
+            print(f"[ALERT] {label}Low temperature threshold reached.")
+            if notify:
+                send_email_alert(temperature, humidity, alert_type="low", sensor=state.name)
+                WRITE_BUFFER.flush("alert", wait=False)
+            state.alert_sent_low = True
     
-    def process_reading(self, temperature, humidity):
-        
-        high_reset = TEMP_THRESHOLD_HIGH - TEMP_HYSTERESIS
-        low_reset = TEMP_THRESHOLD_LOW + TEMP_HYSTERESIS
-        
-        print(f"[DATA] Temp: {temperature:.1f}°C | Humidity: {humidity:.1f}%")
-
-        self.hardware.update_lcd(temperature, humidity)
+    elif state.alert_sent_low and temperature >= low_reset:
+        print(f"[INFO] {label}Low temperature recovered.")
+        state.alert_sent_low = False
+
+    if TREND_ALERTS:
+        evaluate_trend(state, label, temperature, humidity, notify)
+
+    for rule, value, fired in get_rule_engine().evaluate(state, temperature, humidity):
+        if not fired:
+            print(f"[INFO] {label}Rule {rule.name} recovered.")
+            continue
+
+        print(f"[ALERT] {label}Rule {rule.describe(value)}")
+        if notify:
+            send_email_alert(temperature, humidity, alert_type="rule", sensor=state.name, detail=rule.describe(value))
+            WRITE_BUFFER.flush("alert", wait=False)
+
+class Monitor:
+    def __init__(self, hardware, publisher=None, snapshot=None):
+        # publisher(sensor, ts, temperature, humidity) replaces the local
+        # sinks when they run in separate processes.
+        self.hardware = hardware
+        self.publisher = publisher
+        self.snapshot = snapshot
+        # Called with (sensor, ts, temperature, humidity) for every reading;
+        # must not block.
+        self.listeners = []
+        self.states = {config.name: SensorState(config) for config in hardware.sensor_configs}
+        self.primary_sensor = hardware.sensor_configs[0].name
+        self.rollups = RollupStore()
+        self.sampler = AdaptiveSampler()
+        self.started = time.time()
+
+        if snapshot is not None:
+            snapshot.restore(self.states)
+
+        if LCD_ROTATE_SCREENS:
+            hardware.set_lcd_screens(self.lcd_screens())
+
+    @property
+    def alert_sent_high(self):
+        return any(state.alert_sent_high for state in self.states.values())
+
+    @property
+    def alert_sent_low(self):
+        return any(state.alert_sent_low for state in self.states.values())
+    
+    @property
+    def rule_alert(self):
+        return any(state.rule_flags for state in self.states.values())
+
+    def active_rules(self, state):
+        rules = get_rule_engine().rules
+        return [rule.name for bit, rule in enumerate(rules) if state.rule_flags >> bit & 1]
+
+    def sink_state(self):
+        # The current per-sensor state in the snapshot's format, handed to
+        # a sink process when it is restarted.
+        return {
+            name: {
+                "last_log_time": state._last_log_time,
+                "log_times": list(state.log_times),
+                "flags": {flag: getattr(state, flag) for flag in FLAGS},
+                "rules_digest": state.rules_digest,
+                "rule_flags": state.rule_flags,
+                "readings": state.history.readings()
+            }
+            for name, state in self.states.items()
+        }
+
+    def get_summary(self, sensor=None, seconds=3600):
+        history = self.states[sensor or self.primary_sensor].history
+        return {
+            "temperature": history.stats(seconds, "temperature"),
+            "humidity": history.stats(seconds, "humidity")
+        }
+
+    def health(self):
+        sensors = {}
+        for name, state in self.states.items():
+            latest = state.history.latest()
+            sensors[name] = {
+                "last_reading": latest[0] if latest else None,
+                "temperature": latest[1] if latest else None,
+                "humidity": latest[2] if latest else None,
+                "alert": state.alert_sent_high or state.alert_sent_low,
+                "warning": state.trend_alert_high or state.trend_alert_low,
+                "rules": self.active_rules(state)
+            }
+
+        health = {"uptime_seconds": round(time.time() - self.started), "sensors": sensors}
+        if WATCHDOG.is_alive():
+            health["watchdog"] = WATCHDOG.status()
+        return health
+
+    def heartbeat(self):
+        health = self.health()
+        now = time.time()
+        parts = []
+
+        for name, sensor in health["sensors"].items():
+            if sensor["last_reading"] is None:
+                parts.append(f"{name}: no data")
+            else:
+                parts.append(f"{name}: {sensor['temperature']:.1f}°C, {now - sensor['last_reading']:.0f}s ago")
+
+        watchdog = health.get("watchdog")
+        if watchdog:
+            stalled = [name for name, component in watchdog["components"].items() if component["stalled"]]
+            parts.append("stalled: " + ", ".join(stalled) if stalled else f"{len(watchdog['recent_stalls'])} recent stall(s)")
+
+        print(f"[HEARTBEAT] Up {health['uptime_seconds'] / 3600:.1f}h | " + " | ".join(parts))
+        return health
+
+    def lcd_screens(self):
+        screens = [lambda: self._reading_screen(self.primary_sensor), self._range_screen, self._status_screen]
+        for name in list(self.states)[1:]:
+            screens.append(lambda name=name: self._reading_screen(name))
+        return screens
+
+    def _reading_screen(self, name):
+        latest = self.states[name].history.latest()
+        if latest is None:
+            return [name, "Waiting..."]
+
+        _, temp, hum = latest
+        if len(self.states) == 1:
+            return [f"Temp: {temp:.1f}C", f"Hum : {hum:.1f}%"]
+        return [name, f"{temp:.1f}C  {hum:.1f}%"]
+
+    def _range_screen(self):
+        stats = self.states[self.primary_sensor].history.stats(86400, "temperature")
+        if not stats["count"]:
+            return ["24h range", "No data yet"]
+        return [f"Lo {stats['min']:.1f} Hi {stats['max']:.1f}", f"24h avg {stats['mean']:.1f}C"]
+
+    def _status_screen(self):
+        high = [s.name for s in self.states.values() if s.alert_sent_high]
+        low = [s.name for s in self.states.values() if s.alert_sent_low]
+
+        if high:
+            return ["ALERT: HIGH", ",".join(high)]
+        if low:
+            return ["ALERT: LOW", ",".join(low)]
+
+        rules = [name for state in self.states.values() for name in self.active_rules(state)]
+        if rules:
+            return ["ALERT: RULE", ",".join(rules)]
+
+        rising = [s.name for s in self.states.values() if s.trend_alert_high]
+        falling = [s.name for s in self.states.values() if s.trend_alert_low]
+
+        if rising:
+            return ["WARN: RISING", ",".join(rising)]
+        if falling:
+            return ["WARN: FALLING", ",".join(falling)]
+        return ["Status: OK", f"{len(self.states)} sensor(s)"]
+
+    def next_interval(self):
+        if not ADAPTIVE_SAMPLING:
+            return READ_INTERVAL_SECONDS
+        return self.sampler.next_interval(self.states.values())
+
+    def process_reading(self, temperature, humidity, sensor=None):
+        state = self.states[sensor or self.primary_sensor]
+        current_time = self._record(state, temperature, humidity)
+
+        for stage, sink in self._sinks(state, temperature, humidity, current_time):
+            with timed(stage):
+                self._run_stage(stage, sink)
+
+        self._update_outputs(state, temperature, humidity)
+
+    def _read_all(self):
+        with WATCHDOG.busy("sensor_read"):
+            return self.hardware.read_all()
+
+    def _run_stage(self, stage, sink):
+        with WATCHDOG.busy(stage):
+            sink()
+
+    def _label(self, state):
+        return f"[{state.name}] " if len(self.states) > 1 else ""
+
+    def _record(self, state, temperature, humidity):
+        print(f"[DATA] {self._label(state)}Temp: {temperature:.1f}°C | Humidity: {humidity:.1f}%")
+
         current_time = time.time()
-        
-        if current_time - self._last_log_time >= LOG_INTERVAL_SECONDS:
-            log_to_excel(temperature, humidity)
-            self._last_log_time = current_time
-
-        send_to_adafruit(temperature, humidity)
-
-        if temperature >= TEMP_THRESHOLD_HIGH:
-            if not self.alert_sent_high:
-                print("[ALERT] High Temperature threshold reached.")
-                send_email_alert(temperature, humidity, alert_type="high")
-                self.alert_sent_high = True
-
-        elif self.alert_sent_high and temperature <= high_reset:
-            print("[INFO] High temperature recovered.")
-            self.alert_sent_high = False
-
-        if temperature <= TEMP_THRESHOLD_LOW:
-            if not self.alert_sent_low:
-                print("[ALERT] Low temperature threshold reached.")
-                send_email_alert(temperature, humidity, alert_type="low")
-                self.alert_sent_low = True
-        
-        elif self.alert_sent_low and temperature >= low_reset:
-            print("[INFO] Low temperature recovered.")
-            self.alert_sent_low = False
-
-        self.hardware.set_led(self.alert_sent_high or self.alert_sent_low)
+
+        with timed("history"):
+            state.history.append(current_time, temperature, humidity)
+            self.rollups.add(current_time, temperature, humidity, sensor=state.name)
+            if self.snapshot is not None:
+                self.snapshot.record_reading(state.name, current_time, temperature, humidity)
+
+        for listener in self.listeners:
+            try:
+                listener(state.name, current_time, temperature, humidity)
+            except Exception as e:
+                print("[WARN] Reading listener failed:", e)
+
+        return current_time
+
+    def _sinks(self, state, temperature, humidity, current_time):
+        # The log interval is tracked in both modes so the snapshot can
+        # hand it to the logging process after a restart.
+        log_due = current_time - state._last_log_time >= LOG_INTERVAL_SECONDS
+        if log_due:
+            state._last_log_time = current_time
+            state.log_times.append(current_time)
+
+        if self.publisher is not None:
+            return [("publish", lambda: self.publisher(state.name, current_time, temperature, humidity))]
+
+        sinks = []
+
+        if log_due:
+            sinks.append(("log_to_excel", lambda: log_to_excel(temperature, humidity, sensor=state.name)))
+
+        sinks.append(("send_to_adafruit", lambda: send_to_adafruit(temperature, humidity, sensor=state.name)))
+        return sinks
+
+    def _update_outputs(self, state, temperature, humidity):
+        with timed("alerts"):
+            self._evaluate_alerts(state, self._label(state), temperature, humidity)
+
+        with timed("set_led"):
+            self.hardware.set_led(self.alert_sent_high or self.alert_sent_low or self.rule_alert)
+
+        # After the alerts, so the screens show this reading and its
+        # alert status.
+        if state.name == self.primary_sensor:
+            with timed("update_lcd"):
+                self.hardware.update_lcd(temperature, humidity)
+
+        if self.snapshot is not None:
+            with timed("snapshot"):
+                self.snapshot.save_state(state)
+
+    def _evaluate_alerts(self, state, label, temperature, humidity):
+        # With a publisher, emails are sent by the alerts process; the
+        # flags are still tracked here for the LED and LCD.
+        evaluate_alerts(state, label, temperature, humidity, notify=self.publisher is None)
 
     def run(self):
         print("[START] Monitoring Started. Press Ctrl + C to stop.")
 
+        last_cycle = None
+        interval = READ_INTERVAL_SECONDS
+
         try:
             while True:
-                try:
-                    temperature, humidity = self.hardware.read_sensor()
+                cycle_start = time.monotonic()
+                if last_cycle is not None:
+                    LOOP_LAG.set(max(0.0, cycle_start - last_cycle - interval))
+                last_cycle = cycle_start
+                WATCHDOG.beat("main_loop")
 
+                with timed("sensor_read"):
+                    readings = self._read_all()
+
+                for sensor, (temperature, humidity) in readings.items():
                     if temperature is not None and humidity is not None:
                         try:
-                            self.process_reading(temperature, humidity)
+                            self.process_reading(temperature, humidity, sensor=sensor)
                         except Exception as e:
-                            print("[ERROR] Processing failure:", e)
+                            print(f"[ERROR] Processing failure ({sensor}):", e)
                     else:
-                        print("[WARN] Sensor read failed.")
-                
-                except RuntimeError as err:
-                    print(f"[ERROR] DHT read error: {err}")
+                        print(f"[WARN] Sensor read failed ({sensor}).")
                 
-                time.sleep(READ_INTERVAL_SECONDS)
+                interval = self.next_interval()
+                time.sleep(interval)
 
         except KeyboardInterrupt:
             print("\n[STOP] Monitoring stopped by user.")
 
         finally:
-            self.hardware.cleanup()
\ No newline at end of file
+            # Stopped first so the threads shutting down are not restarted.
+            WATCHDOG.stop()
+            self.rollups.close()
+            self.hardware.cleanup()
+
+    def run_async(self):
+        print("[START] Monitoring Started (async mode). Press Ctrl + C to stop.")
+
+        try:
+            asyncio.run(self._run_async())
+
+        except KeyboardInterrupt:
+            print("\n[STOP] Monitoring stopped by user.")
+
+        finally:
+            # Stopped first so the threads shutting down are not restarted.
+            WATCHDOG.stop()
+            self.rollups.close()
+            self.hardware.cleanup()
+
+    async def _run_async(self):
+        loop = asyncio.get_running_loop()
+
+        # Hardware calls stay serialized on one thread; sinks get their own
+        # pool so a stuck upload or log write cannot block a sensor read.
+        hardware_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hardware")
+        sink_executor = ThreadPoolExecutor(max_workers=SINK_WORKERS, thread_name_prefix="sink")
+        in_flight = {}
+        read = None
+        next_tick = loop.time()
+
+        try:
+            while True:
+                LOOP_LAG.set(max(0.0, loop.time() - next_tick))
+                WATCHDOG.beat("main_loop")
+
+                # A read that timed out is left to finish on its own; no
+                # new read is queued behind it on the hardware thread.
+                if read is not None and not read.done():
+                    print("[ERROR] Previous sensor read still hung. Skipping tick.")
+                    SINK_TIMEOUTS.inc("sensor_read")
+                    readings = {}
+                else:
+                    read = loop.run_in_executor(hardware_executor, self._read_all)
+                    try:
+                        with timed("sensor_read"):
+                            readings = await asyncio.wait_for(asyncio.shield(read), SENSOR_READ_TIMEOUT_SECONDS)
+                    except asyncio.TimeoutError:
+                        print(f"[ERROR] Sensor read exceeded {SENSOR_READ_TIMEOUT_SECONDS}s. Skipping tick.")
+                        SINK_TIMEOUTS.inc("sensor_read")
+                        readings = {}
+
+                for sensor, (temperature, humidity) in readings.items():
+                    if temperature is None or humidity is None:
+                        print(f"[WARN] Sensor read failed ({sensor}).")
+                        continue
+
+                    try:
+                        await self._process_reading_async(
+                            loop, hardware_executor, sink_executor, in_flight, sensor, temperature, humidity
+                        )
+                    except Exception as e:
+                        print(f"[ERROR] Processing failure ({sensor}):", e)
+
+                next_tick = self._next_tick(next_tick, loop.time(), self.next_interval())
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+        finally:
+            for task in list(in_flight.values()):
+                task.cancel()
+            sink_executor.shutdown(wait=False)
+            hardware_executor.shutdown(wait=False)
+
+    def _next_tick(self, next_tick, now, interval):
+        next_tick += interval
+
+        # Ticks are fixed-rate; if a cycle overran, skip the missed ticks
+        # instead of bursting to catch up.
+        if now > next_tick:
+            missed = int((now - next_tick) // interval) + 1
+            print(f"[WARN] Monitoring cycle overran. Skipping {missed} tick(s).")
+            next_tick += missed * interval
+
+        return next_tick
+
+    async def _process_reading_async(self, loop, hardware_executor, sink_executor, in_flight, sensor, temperature, humidity):
+        state = self.states[sensor]
+        current_time = await loop.run_in_executor(hardware_executor, self._record, state, temperature, humidity)
+
+        for stage, sink in self._sinks(state, temperature, humidity, current_time):
+            key = (stage, state.name)
+
+            if key in in_flight:
+                print(f"[WARN] {stage} for {state.name} still running. Skipping this reading.")
+                SINK_TIMEOUTS.inc(stage)
+                continue
+
+            task = asyncio.create_task(self._run_sink(loop, sink_executor, stage, sink))
+            in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: in_flight.pop(key, None))
+
+        await loop.run_in_executor(hardware_executor, self._update_outputs, state, temperature, humidity)
+
+    async def _run_sink(self, loop, executor, stage, sink):
+        timeout = SINK_TIMEOUT_SECONDS.get(stage, SINK_TIMEOUT_SECONDS["default"])
+        start = time.perf_counter()
+        call = loop.run_in_executor(executor, self._run_stage, stage, sink)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(call), timeout)
+        except asyncio.TimeoutError:
+            print(f"[ERROR] {stage} exceeded its {timeout}s deadline. Bypassing it until it returns.")
+            SINK_TIMEOUTS.inc(stage)
+            # The task stays in flight until the worker thread is free
+            # again, so later readings skip this sink instead of piling
+            # more hung calls onto the pool.
+            try:
+                await call
+            except Exception as e:
+                print(f"[ERROR] {stage} failed:", e)
+        except Exception as e:
+            print(f"[ERROR] {stage} failed:", e)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage)
@@ -0,0 +1,315 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from src.pitherm.config import (
+    LOG_INTERVAL_SECONDS,
+    SINK_PROCESSES,
+    SINK_POLL_SECONDS,
+    SINK_STALL_SECONDS,
+    SINK_RESTART_BACKOFF_SECONDS,
+    SINK_RESTART_MAX_BACKOFF_SECONDS,
+    PROCESS_CHECK_SECONDS
+)
+from src.pitherm.ring import ReadingRing
+from src.pitherm.logging_service import log_to_excel, start_scheduler
+from src.pitherm.dashboard import send_to_adafruit, stop_uploader
+from src.pitherm.alert import stop_dispatcher
+from src.pitherm.monitor import SensorState, evaluate_alerts
+from src.pitherm.snapshot import apply_snapshot
+from src.pitherm.writebuffer import WRITE_BUFFER
+from src.pitherm.metrics import REGISTRY
+
+PROCESS_UP = REGISTRY.gauge("pitherm_process_up", "Whether each pipeline process is running.", labels=("process",))
+PROCESS_BACKLOG = REGISTRY.gauge(
+    "pitherm_process_backlog",
+    "Readings published but not yet consumed by each sink process.",
+    labels=("process",)
+)
+PROCESS_RESTARTS = REGISTRY.counter(
+    "pitherm_process_restarts_total",
+    "Sink processes restarted after a crash or stall.",
+    labels=("process",)
+)
+
+# Sink handlers run inside their own process and only see readings
+# through the ring.
+
+class LoggingSink:
+    # Owns the journal, the write buffer and the archive/report jobs.
+
+    def __init__(self, configs):
+        self.write_buffer = WRITE_BUFFER
+        self.write_buffer.start("logging")
+        self.scheduler = start_scheduler()
+        self._last_log_time = {}
+        self._replayed_logs = {}
+
+    def restore(self, restored):
+        for sensor, entry in restored.items():
+            self._last_log_time[sensor] = entry["last_log_time"]
+            self._replayed_logs[sensor] = set(entry.get("log_times", ()))
+
+    def handle(self, sensor, ts, temperature, humidity):
+        last = self._last_log_time.get(sensor, 0)
+
+        # After a restart, readings replayed from before the restored log
+        # time are logged if the acquisition process found them due.
+        if ts <= last:
+            due = ts in self._replayed_logs.get(sensor, ())
+        else:
+            due = ts - last >= LOG_INTERVAL_SECONDS
+            if due:
+                self._last_log_time[sensor] = ts
+
+        if due:
+            log_to_excel(temperature, humidity, sensor=sensor, when=datetime.fromtimestamp(ts))
+
+    def close(self):
+        self.scheduler.stop()
+        self.write_buffer.close()
+
+class UploadSink:
+    def __init__(self, configs):
+        pass
+
+    def handle(self, sensor, ts, temperature, humidity):
+        send_to_adafruit(temperature, humidity, sensor=sensor)
+
+    def close(self):
+        stop_uploader()
+
+class AlertSink:
+    def __init__(self, configs):
+        self.states = {config.name: SensorState(config) for config in configs}
+
+    def handle(self, sensor, ts, temperature, humidity):
+        label = f"[{sensor}] " if len(self.states) > 1 else ""
+        state = self.states[sensor]
+
+        # Readings replayed after a restart are already part of the
+        # restored history and alert flags.
+        latest = state.history.latest()
+        if latest is not None and ts <= latest[0]:
+            return
+
+        # Trend alerts fit over recent history, so keep a local copy.
+        state.history.append(ts, temperature, humidity)
+        evaluate_alerts(state, label, temperature, humidity)
+
+    def restore(self, restored):
+        for sensor, entry in restored.items():
+            if sensor in self.states:
+                apply_snapshot(self.states[sensor], entry)
+
+    def close(self):
+        stop_dispatcher()
+
+SINK_HANDLERS = {
+    "logging": LoggingSink,
+    "upload": UploadSink,
+    "alerts": AlertSink
+}
+
+def run_sink(name, ring_name, sensors, configs, cursor, restored=None):
+    # Entry point of a sink process. Ctrl+C reaches the whole process
+    # group; sinks leave shutdown to the supervisor instead.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    ring = ReadingRing.attach(ring_name, sensors)
+    pid = os.getpid()
+    started = time.time()
+    processed = errors = dropped = 0
+
+    print(f"[PROCESS] {name} sink started (pid {pid}) at reading {cursor}.")
+
+    try:
+        handler = SINK_HANDLERS[name](configs)
+        if restored and hasattr(handler, "restore"):
+            handler.restore(restored)
+        ring.beat(name, pid, started, cursor, processed, errors, dropped)
+
+        while not ring.stopping:
+            readings, cursor, lost = ring.read_since(cursor)
+            dropped += lost
+
+            for reading in readings:
+                try:
+                    handler.handle(*reading)
+                    processed += 1
+                except Exception as e:
+                    errors += 1
+                    print(f"[ERROR] {name} sink failed on a reading:", e)
+
+            ring.beat(name, pid, started, cursor, processed, errors, dropped)
+
+            if not readings:
+                time.sleep(SINK_POLL_SECONDS)
+
+        handler.close()
+    finally:
+        ring.close()
+
+class SinkSupervisor:
+    # Runs in the acquisition process. Starts one process per sink,
+    # publishes readings to the ring and restarts sinks that exit or stop
+    # heartbeating. A sink restarts from the last reading it consumed.
+    # restored is the previous run's state snapshot and seeds the first
+    # start of each sink. A restarted sink is seeded from state_source()
+    # instead, the Monitor's current state, so alert flags and log times
+    # carry over; readings it replays from the ring that are already
+    # reflected in that state are skipped.
+
+    def __init__(
+        self,
+        sensor_configs,
+        sinks=SINK_PROCESSES,
+        stall_seconds=SINK_STALL_SECONDS,
+        restored=None,
+        state_source=None
+    ):
+        self.configs = list(sensor_configs)
+        self.restored = restored or {}
+        self.state_source = state_source
+        self.sensors = [config.name for config in self.configs]
+        self.sinks = tuple(sinks)
+        self.stall_seconds = stall_seconds
+        self.ring = ReadingRing(self.sensors)
+        self.started = time.time()
+        self.published = 0
+
+        # Spawned rather than forked: the acquisition process already
+        # runs threads (LCD, write buffer, metrics) by the time a sink
+        # needs restarting.
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = {}
+        self._spawned = {}
+        self._restart_at = {}
+        self._backoff = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        for name in self.sinks:
+            self._start_sink(name, cursor=0, restored=self.restored)
+
+        self._thread = threading.Thread(target=self._watch, name="sink-supervisor", daemon=True)
+        self._thread.start()
+
+    def _start_sink(self, name, cursor, restored=None):
+        process = self._context.Process(
+            target=run_sink,
+            args=(name, self.ring.name, self.sensors, self.configs, cursor, restored),
+            name=f"pitherm-{name}",
+            daemon=True
+        )
+        process.start()
+        self._processes[name] = process
+        self._spawned[name] = time.time()
+        PROCESS_UP.set(1, name)
+
+    def publish(self, sensor, ts, temperature, humidity):
+        with self._lock:
+            seq = self.ring.publish(sensor, ts, temperature, humidity)
+            self.published += 1
+            self.ring.beat("acquisition", os.getpid(), self.started, seq, self.published, 0, 0)
+
+    def _watch(self):
+        while not self._stop.wait(PROCESS_CHECK_SECONDS):
+            for name in self.sinks:
+                self._check(name)
+
+    def _check(self, name):
+        process = self._processes[name]
+        health = self.ring.health(name)
+        PROCESS_BACKLOG.set(self.ring.write_seq - health["cursor"], name)
+
+        if process.is_alive():
+            # Until its first heartbeat a sink is starting up, and the
+            # stall deadline runs from the spawn, so a sink that hangs
+            # while setting up its handler is restarted too.
+            started = health["pid"] == process.pid
+            last_seen = health["beat"] if started else self._spawned[name]
+
+            if time.time() - last_seen <= self.stall_seconds:
+                if started:
+                    self._backoff.pop(name, None)
+                return
+
+            state = "stalled" if started else "hung during startup"
+            print(f"[PROCESS] {name} sink {state} for {time.time() - last_seen:.0f}s, restarting.")
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        elif name not in self._restart_at:
+            print(f"[PROCESS] {name} sink exited with code {process.exitcode}.")
+
+        PROCESS_UP.set(0, name)
+
+        now = time.monotonic()
+        if name not in self._restart_at:
+            backoff = self._backoff.get(name, 0)
+            self._backoff[name] = min(backoff * 2 or SINK_RESTART_BACKOFF_SECONDS, SINK_RESTART_MAX_BACKOFF_SECONDS)
+            self._restart_at[name] = now + backoff
+
+        if now >= self._restart_at[name]:
+            del self._restart_at[name]
+            PROCESS_RESTARTS.inc(name)
+
+            restored = None
+            if self.state_source is not None:
+                try:
+                    restored = self.state_source()
+                except Exception as e:
+                    print(f"[WARN] Could not collect state for the {name} sink:", e)
+
+            self._start_sink(name, cursor=health["cursor"], restored=restored)
+
+    def health(self):
+        now = time.time()
+        write_seq = self.ring.write_seq
+        report = {}
+
+        for name in ("acquisition",) + self.sinks:
+            health = self.ring.health(name)
+            process = self._processes.get(name)
+            report[name] = {
+                "pid": health["pid"] or None,
+                "alive": process.is_alive() if process else True,
+                "beat_age_seconds": round(now - health["beat"], 1) if health["beat"] else None,
+                "backlog": write_seq - health["cursor"],
+                "processed": health["processed"],
+                "errors": health["errors"],
+                "dropped": health["dropped"]
+            }
+        return report
+
+    def report(self):
+        for name, health in self.health().items():
+            state = "up" if health["alive"] else "DOWN"
+            print(
+                f"[PROCESS] {name}: {state}, pid {health['pid']}, backlog {health['backlog']}, "
+                f"processed {health['processed']}, errors {health['errors']}, dropped {health['dropped']}"
+            )
+
+    def stop(self, timeout=20):
+        self._stop.set()
+        self.ring.request_stop()
+
+        if self._thread:
+            self._thread.join(PROCESS_CHECK_SECONDS)
+
+        deadline = time.monotonic() + timeout
+        for name, process in self._processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"[PROCESS] {name} sink did not stop, terminating.")
+                process.terminate()
+                process.join()
+
+        self.ring.close()
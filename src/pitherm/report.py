@@ -0,0 +1,221 @@
+import os
+import time
+import tracemalloc
+import zipfile
+from src.pitherm.config import LOG_INTERVAL_SECONDS
+from src.pitherm.archive import iter_readings
+from src.pitherm.sensors import load_sensor_configs
+
+READINGS_HEADER = ["Date", "Time", "Temperature (°C)", "Humidity (%)", "Sensor"]
+SUMMARY_HEADER = [
+    "Date",
+    "Sensor",
+    "Readings",
+    "Min (°C)",
+    "Max (°C)",
+    "Mean (°C)",
+    "Minutes Above High",
+    "Minutes Below Low"
+]
+
+# Gaps longer than this (restarts, outages) are not counted as time
+# spent above or below a threshold.
+MAX_READING_GAP_SECONDS = 2 * LOG_INTERVAL_SECONDS
+
+# Rows per sheet, header included, before readings continue on another
+# sheet (Excel's limit), and the most sensors drawn on the summary chart.
+SHEET_MAX_ROWS = 1048576
+CHART_MAX_SENSORS = 10
+
+# openpyxl takes longer to import than the rest of PiTherm put together,
+# so it is imported where a workbook is actually built.
+
+def bold_row(ws, values):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=True)
+        row.append(cell)
+    return row
+
+class DailySummary:
+    def __init__(self):
+        self.count = 0
+        self.temp_min = None
+        self.temp_max = None
+        self.temp_sum = 0.0
+        self.seconds_above = 0
+        self.seconds_below = 0
+
+    def add(self, temp):
+        self.temp_min = temp if self.temp_min is None else min(self.temp_min, temp)
+        self.temp_max = temp if self.temp_max is None else max(self.temp_max, temp)
+        self.temp_sum += temp
+        self.count += 1
+
+class MonthSummary:
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+        self.days = {}
+        self._previous = {}
+
+    def observe(self, when, temp, sensor):
+        day = self.days.setdefault((when.strftime("%Y-%m-%d"), sensor), DailySummary())
+        day.add(temp)
+
+        # Each interval is attributed to the reading that started it.
+        if sensor in self._previous:
+            prev_when, prev_temp, prev_day = self._previous[sensor]
+            gap = (when - prev_when).total_seconds()
+            high, low = self.thresholds.get(sensor, self.thresholds[None])
+
+            if 0 < gap <= MAX_READING_GAP_SECONDS:
+                if prev_temp >= high:
+                    prev_day.seconds_above += gap
+                elif prev_temp <= low:
+                    prev_day.seconds_below += gap
+
+        self._previous[sensor] = (when, temp, day)
+
+def write_summary(ws, days):
+    ws.append(bold_row(ws, SUMMARY_HEADER))
+
+    ranges = {}
+    row_index = 1
+
+    for (date, sensor), day in sorted(days.items(), key=lambda item: (item[0][1], item[0][0])):
+        ws.append([
+            date,
+            sensor,
+            day.count,
+            day.temp_min,
+            day.temp_max,
+            round(day.temp_sum / day.count, 2),
+            round(day.seconds_above / 60, 1),
+            round(day.seconds_below / 60, 1)
+        ])
+        row_index += 1
+        ranges[sensor] = (ranges.get(sensor, (row_index,))[0], row_index)
+
+    # A chart of a whole fleet's sensors would be unreadable.
+    if not ranges or len(ranges) > CHART_MAX_SENSORS:
+        return
+
+    from openpyxl.chart import LineChart, Reference
+    from openpyxl.chart.series import SeriesLabel
+
+    chart = LineChart()
+    chart.title = "Daily Mean Temperature"
+    chart.y_axis.title = "°C"
+    chart.x_axis.title = "Date"
+    chart.width = 24
+
+    for sensor, (first_row, last_row) in ranges.items():
+        chart.add_data(Reference(ws, min_col=6, min_row=first_row, max_row=last_row))
+        chart.series[-1].tx = SeriesLabel(v=sensor)
+
+    first_row, last_row = next(iter(ranges.values()))
+    chart.set_categories(Reference(ws, min_col=1, min_row=first_row, max_row=last_row))
+
+    ws.add_chart(chart, "J2")
+
+def build_report(
+    journal_path,
+    output_path,
+    summary=True,
+    compress=False,
+    thresholds=None,
+    trace_memory=False,
+    readings=True
+):
+    # thresholds maps sensor to (high, low), with the default under None.
+    # Without readings only the summary sheet is written. With
+    # trace_memory, the peak Python memory allocated while building is
+    # reported too; tracing slows the build down, so it is optional.
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    try:
+        return _build_report(journal_path, output_path, summary, compress, thresholds, trace_memory, readings)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+def _build_report(journal_path, output_path, summary, compress, thresholds, trace_memory, readings):
+    from openpyxl import Workbook
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+
+    if thresholds is None:
+        configs = load_sensor_configs()
+        thresholds = {c.name: (c.temp_high, c.temp_low) for c in configs}
+        thresholds[None] = (configs[0].temp_high, configs[0].temp_low)
+
+    wb = Workbook(write_only=True)
+    summary_ws = wb.create_sheet("Summary") if summary else None
+    readings_ws = None
+    sheet_rows = 0
+    sheets = 0
+
+    month_summary = MonthSummary(thresholds)
+    count = 0
+
+    for when, temp, hum, sensor in iter_readings(journal_path):
+        if summary_ws is not None:
+            month_summary.observe(when, temp, sensor)
+        count += 1
+
+        if not readings:
+            continue
+
+        if readings_ws is None or sheet_rows >= SHEET_MAX_ROWS:
+            sheets += 1
+            readings_ws = wb.create_sheet("Monthly Readings" + (f" {sheets}" if sheets > 1 else ""))
+            readings_ws.append(bold_row(readings_ws, READINGS_HEADER))
+            sheet_rows = 1
+
+        readings_ws.append([
+            when.strftime("%Y-%m-%d"),
+            when.strftime("%H:%M:%S"),
+            temp,
+            hum,
+            sensor
+        ])
+        sheet_rows += 1
+
+    if readings and readings_ws is None:
+        readings_ws = wb.create_sheet("Monthly Readings")
+        readings_ws.append(bold_row(readings_ws, READINGS_HEADER))
+
+    if summary_ws is not None:
+        write_summary(summary_ws, month_summary.days)
+
+    wb.save(output_path)
+
+    if compress:
+        zip_path = os.path.splitext(output_path)[0] + ".zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            archive.write(output_path, arcname=os.path.basename(output_path))
+        os.remove(output_path)
+        output_path = zip_path
+
+    result = {
+        "path": output_path,
+        "rows": count,
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_memory_kb": tracemalloc.get_traced_memory()[1] // 1024 if trace_memory else None,
+        "size_kb": os.path.getsize(output_path) // 1024
+    }
+
+    peak = f"peak {result['peak_memory_kb']} KB, " if trace_memory else ""
+    print(
+        f"[REPORT] Built {os.path.basename(output_path)}: {result['rows']} rows in {result['seconds']}s, "
+        f"{peak}{result['size_kb']} KB on disk."
+    )
+    return result
@@ -0,0 +1,109 @@
+import struct
+import time
+from multiprocessing import shared_memory
+from src.pitherm.config import RING_SLOTS
+
+# Shared-memory layout:
+#
+#   header   write_seq (uint64), capacity (uint64), stop flag (uint64)
+#   health   one record per process, written only by that process
+#   slots    capacity reading records
+#
+# There is a single writer (the acquisition process). Each slot carries
+# the sequence number it holds; the writer zeroes it while the slot is
+# being rewritten, so readers can detect a torn or overwritten slot
+# without taking a lock that a crashed process could leave held.
+
+HEADER = struct.Struct("<QQQ")
+HEALTH = struct.Struct("<QddQQQQ")
+SLOT = struct.Struct("<QdddI4x")
+
+PROCESS_NAMES = ("acquisition", "logging", "upload", "alerts")
+HEALTH_FIELDS = ("pid", "started", "beat", "cursor", "processed", "errors", "dropped")
+
+class ReadingRing:
+    def __init__(self, sensors, name=None, capacity=RING_SLOTS, create=True):
+        self.sensors = list(sensors)
+        self.capacity = capacity
+        self._slots_offset = HEADER.size + HEALTH.size * len(PROCESS_NAMES)
+        size = self._slots_offset + SLOT.size * capacity
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self._owner = create
+
+        if create:
+            self.buf[:size] = bytes(size)
+            HEADER.pack_into(self.buf, 0, 0, capacity, 0)
+        else:
+            _, self.capacity, _ = HEADER.unpack_from(self.buf, 0)
+
+    @classmethod
+    def attach(cls, name, sensors):
+        return cls(sensors, name=name, create=False)
+
+    @property
+    def write_seq(self):
+        return HEADER.unpack_from(self.buf, 0)[0]
+
+    def publish(self, sensor, ts, temperature, humidity):
+        seq = self.write_seq + 1
+        offset = self._slots_offset + (seq % self.capacity) * SLOT.size
+
+        struct.pack_into("<Q", self.buf, offset, 0)
+        SLOT.pack_into(self.buf, offset, 0, ts, temperature, humidity, self.sensors.index(sensor))
+        struct.pack_into("<Q", self.buf, offset, seq)
+        struct.pack_into("<Q", self.buf, 0, seq)
+        return seq
+
+    @property
+    def stopping(self):
+        return HEADER.unpack_from(self.buf, 0)[2] == 1
+
+    def request_stop(self):
+        # Readers poll this flag; a multiprocessing.Event would deadlock
+        # set() if a waiting process had been killed.
+        struct.pack_into("<Q", self.buf, 16, 1)
+
+    def read_since(self, cursor, limit=256):
+        # Returns (readings, new cursor, dropped). Readings the reader was
+        # too slow for have been overwritten and are counted as dropped.
+        write_seq = self.write_seq
+        dropped = 0
+
+        if write_seq - cursor > self.capacity:
+            dropped = write_seq - cursor - self.capacity
+            cursor = write_seq - self.capacity
+
+        readings = []
+        while cursor < write_seq and len(readings) < limit:
+            seq = cursor + 1
+            offset = self._slots_offset + (seq % self.capacity) * SLOT.size
+            slot_seq, ts, temperature, humidity, sensor = SLOT.unpack_from(self.buf, offset)
+
+            if slot_seq != seq or struct.unpack_from("<Q", self.buf, offset)[0] != seq:
+                dropped += 1
+            else:
+                readings.append((self.sensors[sensor], ts, temperature, humidity))
+            cursor = seq
+
+        return readings, cursor, dropped
+
+    def _health_offset(self, process):
+        return HEADER.size + HEALTH.size * PROCESS_NAMES.index(process)
+
+    def beat(self, process, pid, started, cursor, processed, errors, dropped):
+        HEALTH.pack_into(
+            self.buf, self._health_offset(process),
+            pid, started, time.time(), cursor, processed, errors, dropped
+        )
+
+    def health(self, process):
+        return dict(zip(HEALTH_FIELDS, HEALTH.unpack_from(self.buf, self._health_offset(process))))
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
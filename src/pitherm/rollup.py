@@ -0,0 +1,233 @@
+import csv
+import os
+import threading
+import time
+from datetime import datetime
+from src.pitherm.config import DEFAULT_SENSOR, ROLLUP_TIERS, ROLLUP_MAX_POINTS
+from src.pitherm.journal import MonthlyLog
+
+ROLLUP_DIR = os.path.join("logs", "rollups")
+ROLLUP_HEADER = [
+    "bucket_start",
+    "sensor",
+    "count",
+    "temp_min",
+    "temp_max",
+    "temp_mean",
+    "hum_min",
+    "hum_max",
+    "hum_mean"
+]
+
+class RollupBucket:
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.temp_min = self.temp_max = None
+        self.hum_min = self.hum_max = None
+        self.temp_sum = 0.0
+        self.hum_sum = 0.0
+
+    def add(self, temp, hum):
+        if self.count == 0:
+            self.temp_min = self.temp_max = temp
+            self.hum_min = self.hum_max = hum
+        else:
+            self.temp_min = min(self.temp_min, temp)
+            self.temp_max = max(self.temp_max, temp)
+            self.hum_min = min(self.hum_min, hum)
+            self.hum_max = max(self.hum_max, hum)
+
+        self.temp_sum += temp
+        self.hum_sum += hum
+        self.count += 1
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.temp_min, self.temp_max = other.temp_min, other.temp_max
+            self.hum_min, self.hum_max = other.hum_min, other.hum_max
+        else:
+            self.temp_min = min(self.temp_min, other.temp_min)
+            self.temp_max = max(self.temp_max, other.temp_max)
+            self.hum_min = min(self.hum_min, other.hum_min)
+            self.hum_max = max(self.hum_max, other.hum_max)
+
+        self.temp_sum += other.temp_sum
+        self.hum_sum += other.hum_sum
+        self.count += other.count
+
+    def to_row(self, sensor):
+        return [
+            self.start,
+            sensor,
+            self.count,
+            self.temp_min,
+            self.temp_max,
+            round(self.temp_sum / self.count, 2),
+            self.hum_min,
+            self.hum_max,
+            round(self.hum_sum / self.count, 2)
+        ]
+
+    def to_dict(self, sensor):
+        return dict(zip(ROLLUP_HEADER, self.to_row(sensor)))
+
+    @classmethod
+    def from_row(cls, row):
+        bucket = cls(int(row[0]))
+        bucket.count = int(row[2])
+        bucket.temp_min, bucket.temp_max = float(row[3]), float(row[4])
+        bucket.hum_min, bucket.hum_max = float(row[6]), float(row[7])
+        bucket.temp_sum = float(row[5]) * bucket.count
+        bucket.hum_sum = float(row[8]) * bucket.count
+        return bucket
+
+class RollupTier:
+    def __init__(self, name, seconds, retention_seconds, directory=ROLLUP_DIR):
+        self.name = name
+        self.seconds = seconds
+        self.retention_seconds = retention_seconds
+        self.log = MonthlyLog(os.path.join(directory, name), f"rollup_{name}_", ROLLUP_HEADER)
+        self._open = {}
+        self._last_prune_month = None
+
+    def add(self, ts, temp, hum, sensor):
+        start = int(ts // self.seconds * self.seconds)
+        bucket = self._open.get(sensor)
+
+        if bucket is not None and bucket.start != start:
+            self._write(bucket, sensor)
+            bucket = None
+
+        if bucket is None:
+            bucket = self._open[sensor] = RollupBucket(start)
+
+        bucket.add(temp, hum)
+
+    def _write(self, bucket, sensor):
+        when = datetime.fromtimestamp(bucket.start)
+        self.log.write_row(when, bucket.to_row(sensor))
+
+        month_str = when.strftime("%Y-%m")
+        if month_str != self._last_prune_month:
+            self._last_prune_month = month_str
+            self.prune()
+
+    def flush(self):
+        for sensor, bucket in self._open.items():
+            self._write(bucket, sensor)
+        self._open = {}
+
+    def month_files(self):
+        # Includes months whose rows are still in the write buffer.
+        names = set(os.listdir(self.log.directory)) if os.path.isdir(self.log.directory) else set()
+        directory = os.path.abspath(self.log.directory)
+        for path in self.log.buffer.pending_paths():
+            if os.path.dirname(path) == directory:
+                names.add(os.path.basename(path))
+
+        files = []
+        for file in sorted(names):
+            name, ext = os.path.splitext(file)
+            if name.startswith(self.log.prefix) and ext == self.log.ext:
+                files.append((name.replace(self.log.prefix, ""), os.path.join(self.log.directory, file)))
+        return files
+
+    def prune(self, now=None):
+        cutoff = datetime.fromtimestamp((now or time.time()) - self.retention_seconds)
+        cutoff_month = cutoff.strftime("%Y-%m")
+
+        # A month file is only removed once every bucket in it has expired.
+        for month_str, path in self.month_files():
+            if month_str < cutoff_month and month_str != self.log._month:
+                os.remove(path)
+                print(f"[ROLLUP] Removed expired {self.name} rollup {os.path.basename(path)}")
+
+    def query(self, start, end, sensor=None):
+        first_month = datetime.fromtimestamp(start).strftime("%Y-%m")
+        last_month = datetime.fromtimestamp(end).strftime("%Y-%m")
+        buckets = {}
+
+        for month_str, path in self.month_files():
+            if month_str < first_month or month_str > last_month:
+                continue
+
+            for row in self._read_rows(path, month_str):
+                if len(row) < len(ROLLUP_HEADER) or (sensor and row[1] != sensor):
+                    continue
+                try:
+                    bucket = RollupBucket.from_row(row)
+                except ValueError:
+                    continue
+                if start <= bucket.start <= end:
+                    self._merge_into(buckets, row[1], bucket)
+
+        for name, bucket in self._open.items():
+            if (sensor is None or name == sensor) and start <= bucket.start <= end:
+                self._merge_into(buckets, name, bucket)
+
+        return [bucket.to_dict(name) for (bucket_start, name), bucket in sorted(buckets.items())]
+
+    def _read_rows(self, path, month_str):
+        # Header rows fail RollupBucket.from_row and are skipped by the caller.
+        if os.path.exists(path):
+            with open(path, mode="r", newline="") as file:
+                yield from csv.reader(file)
+        yield from csv.reader(self.log.pending_rows(month_str))
+
+    def _merge_into(self, buckets, sensor, bucket):
+        # Partial buckets flushed on shutdown share a start with the bucket
+        # continued after restart, so rows are merged on (start, sensor).
+        key = (bucket.start, sensor)
+        if key in buckets:
+            buckets[key].merge(bucket)
+        else:
+            merged = RollupBucket(bucket.start)
+            merged.merge(bucket)
+            buckets[key] = merged
+
+    def close(self):
+        self.flush()
+        self.log.close()
+
+class RollupStore:
+    def __init__(self, directory=ROLLUP_DIR, tiers=ROLLUP_TIERS):
+        self.tiers = [RollupTier(name, seconds, retention, directory) for name, seconds, retention in tiers]
+        self._lock = threading.Lock()
+
+    def tier(self, name):
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        raise KeyError(name)
+
+    def add(self, ts, temp, hum, sensor=DEFAULT_SENSOR):
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(ts, temp, hum, sensor)
+
+    def choose_tier(self, start, end, max_points=ROLLUP_MAX_POINTS, now=None):
+        now = now or time.time()
+
+        for tier in self.tiers:
+            covers_range = now - tier.retention_seconds <= start
+            if covers_range and (end - start) / tier.seconds <= max_points:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, start, end, sensor=None, tier=None, max_points=ROLLUP_MAX_POINTS):
+        with self._lock:
+            selected = self.tier(tier) if tier else self.choose_tier(start, end, max_points)
+            return selected.name, selected.query(start, end, sensor)
+
+    def prune(self):
+        with self._lock:
+            for tier in self.tiers:
+                tier.prune()
+
+    def close(self):
+        with self._lock:
+            for tier in self.tiers:
+                tier.close()
@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import threading
+import zlib
+from src.pitherm.config import ALERT_RULES_FILE, RULE_RATE_WINDOW_SECONDS, RULE_MIN_RATE_POINTS
+from src.pitherm.trend import fit_line
+
+# Rule bits are persisted in the state snapshot as a 64-bit mask.
+MAX_RULES = 64
+
+FIELDS = ("temperature", "humidity")
+UNITS = {"temperature": "°C", "humidity": "%"}
+CONDITIONS = ("above", "below", "rate_above", "rate_below")
+KEYS = ("name", "field", *CONDITIONS, "hysteresis", "for_seconds", "window_seconds", "sensors")
+
+class AlertRule:
+    # One condition on one field: a level ("above"/"below") or a rate of
+    # change per hour ("rate_above"/"rate_below"). It fires once the
+    # condition has held for for_seconds and recovers once the value is
+    # back past the threshold by hysteresis.
+
+    def __init__(
+        self,
+        name,
+        field="temperature",
+        above=None,
+        below=None,
+        rate_above=None,
+        rate_below=None,
+        hysteresis=0.0,
+        for_seconds=0,
+        window_seconds=RULE_RATE_WINDOW_SECONDS,
+        sensors=None
+    ):
+        given = {key: value for key, value in zip(CONDITIONS, (above, below, rate_above, rate_below)) if value is not None}
+
+        if field not in FIELDS:
+            raise ValueError(f"Rule {name!r}: unknown field {field!r}")
+        if len(given) != 1:
+            raise ValueError(f"Rule {name!r}: needs exactly one of {', '.join(CONDITIONS)}")
+
+        self.name = name
+        self.field = field
+        self.condition, threshold = given.popitem()
+        self.threshold = float(threshold)
+        self.hysteresis = float(hysteresis)
+        self.for_seconds = float(for_seconds)
+        self.window_seconds = float(window_seconds)
+        self.sensors = set(sensors) if sensors else None
+
+        self.rate = self.condition.startswith("rate_")
+        self.rising = self.condition.endswith("above")
+        self.reset = self.threshold - self.hysteresis if self.rising else self.threshold + self.hysteresis
+
+    def __repr__(self):
+        return f"AlertRule({self.name!r}, {self.field} {self.condition} {self.threshold})"
+
+    def applies_to(self, sensor):
+        return self.sensors is None or sensor in self.sensors
+
+    def triggered(self, value):
+        return value >= self.threshold if self.rising else value <= self.threshold
+
+    def recovered(self, value):
+        return value < self.reset if self.rising else value > self.reset
+
+    def describe(self, value):
+        unit = UNITS[self.field] + ("/h" if self.rate else "")
+        direction = "above" if self.rising else "below"
+        held = f" for {self.for_seconds / 60:.0f} min" if self.for_seconds else ""
+        kind = f"{self.field} rate" if self.rate else self.field
+        return f"{self.name}: {kind} {value:.1f}{unit} {direction} {self.threshold:.1f}{unit}{held}"
+
+def load_rules(path=ALERT_RULES_FILE):
+    if not path or not os.path.exists(path):
+        return []
+
+    with open(path, "r") as file:
+        entries = json.load(file)
+
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must contain a list of rules")
+
+    rules = []
+    for index, entry in enumerate(entries):
+        name = entry.get("name") if isinstance(entry, dict) else None
+        if not name:
+            raise ValueError(f"Rule #{index + 1} in {path} has no name")
+
+        unknown = sorted(set(entry) - set(KEYS))
+        if unknown:
+            raise ValueError(f"Rule {name!r}: unknown keys {', '.join(unknown)} (expected {', '.join(KEYS)})")
+
+        rules.append(AlertRule(**entry))
+
+    names = [rule.name for rule in rules]
+
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate rule names in {path}")
+    if len(rules) > MAX_RULES:
+        raise ValueError(f"At most {MAX_RULES} rules are supported ({path} has {len(rules)})")
+
+    return rules
+
+class RuleEngine:
+    # Rules are compiled into one plan per sensor: the rules in scope,
+    # tagged with their bit in SensorState.rule_flags, plus the distinct
+    # (field, window) rates they need. Each reading computes those rates
+    # once and then makes a single pass over the rules.
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.digest = zlib.crc32(json.dumps([
+            dict(vars(rule), sensors=sorted(rule.sensors) if rule.sensors else None) for rule in self.rules
+        ], sort_keys=True).encode())
+        self._plans = {}
+        self._pending = {}
+
+    def plan(self, sensor):
+        plan = self._plans.get(sensor)
+        if plan is None:
+            rules = [(bit, rule) for bit, rule in enumerate(self.rules) if rule.applies_to(sensor)]
+            rates = sorted({(rule.field, rule.window_seconds) for _, rule in rules if rule.rate})
+            plan = self._plans[sensor] = (rules, rates)
+        return plan
+
+    def rate(self, history, field, window_seconds):
+        # Least-squares slope in units per hour, or None with too little data.
+        timestamps, values = history.window(window_seconds, field)
+        if len(values) < RULE_MIN_RATE_POINTS:
+            return None
+
+        fit = fit_line(timestamps, values)
+        return fit[0] * 3600 if fit else None
+
+    def evaluate(self, state, temperature, humidity):
+        # Returns [(rule, value, fired)] for the rules that changed state.
+        rules, rates = self.plan(state.name)
+        if not rules:
+            return []
+
+        # Flags restored from a snapshot taken under different rules
+        # cannot be matched to the current ones.
+        if state.rules_digest != self.digest:
+            state.rule_flags = 0
+            state.rules_digest = self.digest
+
+        latest = state.history.latest()
+        now = latest[0] if latest else 0
+        levels = {"temperature": temperature, "humidity": humidity}
+        rate_values = {key: self.rate(state.history, *key) for key in rates}
+        changes = []
+
+        for bit, rule in rules:
+            value = rate_values[(rule.field, rule.window_seconds)] if rule.rate else levels[rule.field]
+            if value is None:
+                continue
+
+            mask = 1 << bit
+            key = (state.name, bit)
+
+            if not state.rule_flags & mask:
+                if not rule.triggered(value):
+                    self._pending.pop(key, None)
+                    continue
+
+                since = self._pending.setdefault(key, now)
+                if now - since >= rule.for_seconds:
+                    state.rule_flags |= mask
+                    self._pending.pop(key, None)
+                    changes.append((rule, value, True))
+
+            elif rule.recovered(value):
+                state.rule_flags &= ~mask
+                changes.append((rule, value, False))
+
+        return changes
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine():
+    global _engine
+
+    with _engine_lock:
+        if _engine is None:
+            _engine = RuleEngine(load_rules())
+            if _engine.rules:
+                print(f"[RULES] Loaded {len(_engine.rules)} alert rules from {ALERT_RULES_FILE}")
+    return _engine
+
+def validate_rules():
+    # Loads the rules at startup, so a mistake in the rules file stops the
+    # service with a clear message instead of failing every reading.
+    try:
+        get_rule_engine()
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[ERROR] Invalid alert rules in {ALERT_RULES_FILE}: {e}")
+        print("[HINT] See rules.example.json for the supported keys.")
+        sys.exit(1)
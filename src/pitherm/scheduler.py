@@ -0,0 +1,256 @@
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from src.pitherm.config import SCHEDULER_STATE_FILE, SCHEDULER_MAX_SLEEP_SECONDS
+from src.pitherm.watchdog import WATCHDOG
+from src.pitherm.metrics import REGISTRY
+
+JOB_SECONDS = REGISTRY.histogram(
+    "pitherm_job_duration_seconds",
+    "Run time of scheduled jobs.",
+    labels=("job",),
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *"
+}
+
+# (low, high) for minute, hour, day of month, month, day of week
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def parse_cron_field(field, low, high):
+    values = set()
+
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+
+    return values
+
+class CronSpec:
+    # Standard five-field cron: minute hour day-of-month month day-of-week.
+    # As in cron, when both day fields are restricted either one matching
+    # is enough.
+
+    def __init__(self, spec):
+        self.spec = spec
+        fields = CRON_ALIASES.get(spec, spec).split()
+
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs five fields: {spec}")
+
+        parsed = [parse_cron_field(field, *limits) for field, limits in zip(fields, CRON_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, when):
+        in_days = when.day in self.days
+        # cron counts Sunday as 0, datetime counts Monday as 0
+        in_weekdays = (when.weekday() + 1) % 7 in self.weekdays
+
+        if self._any_day:
+            return in_weekdays
+        if self._any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def next_after(self, when):
+        when = when.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = when + timedelta(days=366 * 5)
+
+        while when < limit:
+            if when.month not in self.months:
+                year, month = (when.year + 1, 1) if when.month == 12 else (when.year, when.month + 1)
+                when = when.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(when):
+                when = (when + timedelta(days=1)).replace(hour=0, minute=0)
+            elif when.hour not in self.hours:
+                when = (when + timedelta(hours=1)).replace(minute=0)
+            elif when.minute not in self.minutes:
+                when += timedelta(minutes=1)
+            else:
+                return when
+
+        raise ValueError(f"Cron spec never fires: {self.spec}")
+
+class Job:
+    def __init__(self, name, spec, func, catch_up=True):
+        self.name = name
+        self.cron = CronSpec(spec)
+        self.func = func
+        self.catch_up = catch_up
+        self.next_run = None
+
+class Scheduler:
+    # Runs periodic jobs from a heap ordered by next fire time and sleeps
+    # until the earliest one is due. Last-run times are persisted so jobs
+    # missed while the service was down run once on the next start.
+
+    def __init__(self, state_file=SCHEDULER_STATE_FILE, max_sleep=SCHEDULER_MAX_SLEEP_SECONDS):
+        self.state_file = state_file
+        self.max_sleep = max_sleep
+        self.jobs = {}
+        self.state = self._load_state()
+
+        self._heap = []
+        self._seq = 0
+        self._wake = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print("[WARN] Scheduler state unreadable, starting fresh:", e)
+            return {}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.state, file, indent=4)
+        os.replace(tmp_path, self.state_file)
+
+    def add(self, name, spec, func, catch_up=True):
+        job = Job(name, spec, func, catch_up)
+        now = datetime.now()
+        last_run = self.state.get(name, {}).get("last_run")
+
+        job.next_run = job.cron.next_after(now)
+        if catch_up and last_run is not None:
+            missed = job.cron.next_after(datetime.fromtimestamp(last_run))
+            if missed <= now:
+                print(f"[SCHEDULER] {name} missed its run at {missed:%Y-%m-%d %H:%M}, running now.")
+                job.next_run = now
+
+        with self._wake:
+            self.jobs[name] = job
+            self._push(job)
+            self._wake.notify()
+        return job
+
+    def _push(self, job):
+        self._seq += 1
+        heapq.heappush(self._heap, (job.next_run, self._seq, job))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=5):
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_due(self):
+        with self._wake:
+            while not self._stop:
+                if not self._heap:
+                    self._wake.wait()
+                    continue
+
+                next_run, _, job = self._heap[0]
+                delay = (next_run - datetime.now()).total_seconds()
+
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    if self.jobs.get(job.name) is job:
+                        return job
+                    continue
+
+                # Capped so a wall clock step (NTP sync after boot) is
+                # noticed without waiting out the whole old delay.
+                self._wake.wait(min(delay, self.max_sleep))
+
+        return None
+
+    def _run(self):
+        while not self._stop:
+            job = self._next_due()
+            if job is None:
+                continue
+
+            self.run_job(job)
+
+            with self._wake:
+                job.next_run = job.cron.next_after(datetime.now())
+                self._push(job)
+
+    def run_job(self, job):
+        started = time.time()
+        start = time.perf_counter()
+        ok = True
+
+        try:
+            with WATCHDOG.busy("scheduler"):
+                job.func()
+        except Exception as e:
+            ok = False
+            print(f"[ERROR] Scheduled job {job.name} failed:", e)
+
+        duration = time.perf_counter() - start
+        JOB_SECONDS.observe(duration, job.name)
+
+        entry = self.state.setdefault(job.name, {"runs": 0, "failures": 0})
+        entry["last_run"] = started
+        entry["last_duration"] = round(duration, 3)
+        entry["runs"] = entry.get("runs", 0) + 1
+        if not ok:
+            entry["failures"] = entry.get("failures", 0) + 1
+
+        try:
+            self._save_state()
+        except OSError as e:
+            print("[WARN] Could not persist scheduler state:", e)
+
+        print(f"[SCHEDULER] {job.name} {'finished' if ok else 'failed'} in {duration:.2f}s")
+
+    def get_stats(self):
+        with self._wake:
+            return {
+                name: {
+                    "spec": job.cron.spec,
+                    "next_run": job.next_run.isoformat(timespec="seconds"),
+                    **self.state.get(name, {})
+                }
+                for name, job in self.jobs.items()
+            }
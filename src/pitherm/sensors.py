@@ -0,0 +1,140 @@
+import json
+import os
+import platform
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.pitherm.metrics import SENSOR_FAILURES
+from src.pitherm.config import (
+    TEMP_THRESHOLD_HIGH,
+    TEMP_THRESHOLD_LOW,
+    DEFAULT_SENSOR,
+    SENSOR_NAME_MAX_BYTES,
+    SENSOR_CONFIG_FILE,
+    SENSOR_POLL_WORKERS
+)
+
+DHT_AVAILABLE = False
+
+try:
+    if platform.system() == "Linux":
+        import adafruit_dht
+        import board
+
+        DHT_AVAILABLE = True
+except ImportError:
+    DHT_AVAILABLE = False
+
+class SensorConfig:
+    def __init__(self, name, pin="D4", temp_high=TEMP_THRESHOLD_HIGH, temp_low=TEMP_THRESHOLD_LOW):
+        self.name = name
+        self.pin = pin
+        self.temp_high = float(temp_high)
+        self.temp_low = float(temp_low)
+
+    def __repr__(self):
+        return f"SensorConfig({self.name!r}, pin={self.pin!r})"
+
+def load_sensor_configs(path=SENSOR_CONFIG_FILE):
+    if not path or not os.path.exists(path):
+        return [SensorConfig(DEFAULT_SENSOR)]
+
+    with open(path, "r") as file:
+        entries = json.load(file)
+
+    configs = [SensorConfig(**entry) for entry in entries]
+    names = [c.name for c in configs]
+
+    if not configs:
+        raise ValueError(f"No sensors defined in {path}")
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate sensor names in {path}")
+
+    for name in names:
+        if len(name.encode()) > SENSOR_NAME_MAX_BYTES:
+            raise ValueError(f"Sensor name {name!r} in {path} is longer than {SENSOR_NAME_MAX_BYTES} bytes")
+
+    return configs
+
+class DHTSensor:
+    def __init__(self, config):
+        self.config = config
+        self.device = adafruit_dht.DHT22(getattr(board, config.pin))
+
+    def read(self):
+        return self.device.temperature, self.device.humidity
+
+    def close(self):
+        self.device.exit()
+
+class SimulatedSensor:
+    def __init__(self, config, temp=24.0, hum=50.0, jitter=0.0, delay=0.0):
+        self.config = config
+        self.temp = temp
+        self.hum = hum
+        self.jitter = jitter
+        self.delay = delay
+
+    def read(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+        if not self.jitter:
+            return self.temp, self.hum
+
+        return (
+            round(self.temp + random.uniform(-self.jitter, self.jitter), 1),
+            round(self.hum + random.uniform(-self.jitter, self.jitter), 1)
+        )
+
+    def close(self):
+        pass
+
+class SensorRegistry:
+    def __init__(self, max_workers=SENSOR_POLL_WORKERS):
+        self.sensors = {}
+        self.max_workers = max_workers
+        self._executor = None
+
+    def register(self, sensor):
+        if sensor.config.name in self.sensors:
+            raise ValueError(f"Sensor already registered: {sensor.config.name}")
+        self.sensors[sensor.config.name] = sensor
+
+    def names(self):
+        return list(self.sensors)
+
+    def configs(self):
+        return [sensor.config for sensor in self.sensors.values()]
+
+    def read(self, name):
+        return self.sensors[name].read()
+
+    def read_all(self):
+        if len(self.sensors) == 1:
+            return {name: self._safe_read(name) for name in self.sensors}
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(self.sensors)),
+                thread_name_prefix="sensor-poll"
+            )
+
+        futures = {name: self._executor.submit(self._safe_read, name) for name in self.sensors}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _safe_read(self, name):
+        try:
+            return self.sensors[name].read()
+        except RuntimeError as err:
+            print(f"[ERROR] DHT read error ({name}): {err}")
+            SENSOR_FAILURES.inc(name)
+            return None, None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        for sensor in self.sensors.values():
+            sensor.close()
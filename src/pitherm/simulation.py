@@ -0,0 +1,135 @@
+import math
+import random
+import time
+from src.pitherm.archive import iter_readings
+
+class SimClock:
+    # Virtual clock for simulated sensors. speed=60 plays one hour of
+    # readings per real minute.
+
+    def __init__(self, speed=1.0, start=None):
+        self.speed = speed
+        self.start = time.time() if start is None else start
+        self._origin = time.monotonic()
+
+    def now(self):
+        return self.start + (time.monotonic() - self._origin) * self.speed
+
+class ReplaySensor:
+    def __init__(self, config, trace_path, clock=None, loop=True):
+        self.config = config
+        self.clock = clock
+        self.loop = loop
+        rows = list(iter_readings(trace_path))
+
+        # Single-sensor traces replay for any sensor name.
+        if any(sensor == config.name for _, _, _, sensor in rows):
+            rows = [row for row in rows if row[3] == config.name]
+
+        self.trace = [(when.timestamp(), temp, hum) for when, temp, hum, _ in rows]
+        self._index = 0
+
+        if not self.trace:
+            raise ValueError(f"Trace {trace_path} has no readings for {config.name}")
+
+        self._trace_start = self.trace[0][0]
+        self._trace_span = self.trace[-1][0] - self._trace_start
+
+    def read(self):
+        if self.clock is None:
+            # Without a clock every read steps to the next recorded row.
+            if self._index >= len(self.trace):
+                if not self.loop:
+                    return None, None
+                self._index = 0
+            _, temp, hum = self.trace[self._index]
+            self._index += 1
+            return temp, hum
+
+        offset = self.clock.now() - self.clock.start
+        if self.loop and self._trace_span > 0:
+            offset %= self._trace_span
+        target = self._trace_start + offset
+
+        while self._index + 1 < len(self.trace) and self.trace[self._index + 1][0] <= target:
+            self._index += 1
+        if self._index > 0 and self.trace[self._index][0] > target:
+            self._index = 0
+
+        _, temp, hum = self.trace[self._index]
+        return temp, hum
+
+    def close(self):
+        pass
+
+class SyntheticSensor:
+    def __init__(
+        self,
+        config,
+        base_temp=22.0,
+        base_hum=45.0,
+        drift_per_hour=0.0,
+        daily_swing=0.0,
+        noise=0.1,
+        spike_chance=0.0,
+        spike_size=6.0,
+        dropout_chance=0.0,
+        clock=None,
+        seed=None
+    ):
+        self.config = config
+        self.base_temp = base_temp
+        self.base_hum = base_hum
+        self.drift_per_hour = drift_per_hour
+        self.daily_swing = daily_swing
+        self.noise = noise
+        self.spike_chance = spike_chance
+        self.spike_size = spike_size
+        self.dropout_chance = dropout_chance
+        self.clock = clock or SimClock()
+        self.random = random.Random(seed)
+
+    def read(self):
+        if self.dropout_chance and self.random.random() < self.dropout_chance:
+            raise RuntimeError("Checksum did not validate. Try again.")
+
+        now = self.clock.now()
+        hours = (now - self.clock.start) / 3600
+
+        temp = self.base_temp + self.drift_per_hour * hours
+        temp += self.daily_swing * math.sin(2 * math.pi * (now % 86400) / 86400)
+        temp += self.random.gauss(0, self.noise)
+
+        if self.spike_chance and self.random.random() < self.spike_chance:
+            temp += self.spike_size
+
+        hum = self.base_hum - (temp - self.base_temp) * 0.8 + self.random.gauss(0, self.noise * 2)
+        return round(temp, 1), round(min(max(hum, 0.0), 100.0), 1)
+
+    def close(self):
+        pass
+
+SYNTHETIC_PATTERNS = {
+    "steady": {},
+    "drift": {"drift_per_hour": 0.5},
+    "spiky": {"spike_chance": 0.05},
+    "dropout": {"dropout_chance": 0.2},
+    "daily": {"daily_swing": 2.0},
+    "failing-cooling": {"drift_per_hour": 3.0, "noise": 0.2}
+}
+
+def make_simulated_sensor(config, spec, speed=1.0):
+    # spec is "synthetic:<pattern>" or "replay:<path to journal csv>".
+    kind, _, argument = spec.partition(":")
+    clock = SimClock(speed)
+
+    if kind == "replay":
+        return ReplaySensor(config, argument, clock=clock)
+
+    if kind == "synthetic":
+        pattern = SYNTHETIC_PATTERNS.get(argument or "steady")
+        if pattern is None:
+            raise ValueError(f"Unknown synthetic pattern: {argument}")
+        return SyntheticSensor(config, clock=clock, **pattern)
+
+    raise ValueError(f"Unknown simulated sensor source: {spec}")
@@ -1,13 +1,13 @@
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from src.pitherm.config import (
     SMTP_HOST,
     SMTP_PORT,
     SMTP_CC,
     SMTP_RECIPIENT,
-    SMTP_FROM
+    SMTP_FROM,
+    SMTP_STARTTLS
 )
-import smtplib
+from src.pitherm.metrics import SMTP_FAILURES
+import time
 
 def build_recipients(primary):
     cc_list = [e.strip() for e in SMTP_CC.split(",")] if SMTP_CC else []
@@ -16,16 +16,59 @@ def build_recipients(primary):
     return primary, cc_list, unique_recipients
 
 class SMTPClient:
-    def __init__(self):
-        self.host = SMTP_HOST
-        self.port = int(SMTP_PORT)
+    def __init__(self, keepalive_seconds=0, host=None, port=None, starttls=SMTP_STARTTLS):
+        self.host = host or SMTP_HOST
+        self.port = int(port or SMTP_PORT)
+        self.starttls = starttls
+        self.keepalive_seconds = keepalive_seconds
+        self._server = None
+        self._last_used = 0
     
+    # smtplib and the email package are imported on first send; most runs
+    # never send anything.
     def _connect(self):
+        import smtplib
+
         server = smtplib.SMTP(self.host, self.port, timeout=10)
-        server.starttls()
+        if self.starttls:
+            server.starttls()
         return server
+
+    def _get_server(self):
+        if self._server is not None:
+            if time.monotonic() - self._last_used > self.keepalive_seconds:
+                self.close()
+            else:
+                try:
+                    if self._server.noop()[0] == 250:
+                        return self._server
+                except OSError:
+                    pass
+                self.close()
+
+        self._server = self._connect()
+        return self._server
+
+    def close(self):
+        if self._server is None:
+            return
+
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        finally:
+            self._server = None
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > self.keepalive_seconds:
+            print("[INFO] Closing idle SMTP session.")
+            self.close()
     
     def send(self, subject, body, is_html=False, attachment=None):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
         primary_to, cc_list, recipients = build_recipients(SMTP_RECIPIENT)
 
         msg = MIMEMultipart()
@@ -42,12 +85,18 @@ class SMTPClient:
             msg.attach(attachment)
         
         try:
-            server = self._connect()
+            server = self._get_server()
             server.sendmail(SMTP_FROM, recipients, msg.as_string())
-            server.quit()
+            self._last_used = time.monotonic()
+
+            if self.keepalive_seconds <= 0:
+                self.close()
+
             print("[OK] Email sent via SMTPClient.")
             return True
         
         except Exception as e:
             print("[ERROR] SMTPClient failed:", e)
-            return False
\ No newline at end of file
+            SMTP_FAILURES.inc()
+            self.close()
+            return False
@@ -0,0 +1,255 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from src.pitherm.config import SNAPSHOT_FILE, SNAPSHOT_READINGS, SNAPSHOT_FLUSH_SECONDS, SENSOR_NAME_MAX_BYTES
+
+# Fixed-layout snapshot of the per-sensor runtime state, updated in place
+# through mmap so a state change costs a few dozen bytes, not a file
+# rewrite:
+#
+#   header   magic, version, readings per sensor, sensor count
+#   per sensor:
+#     name     SENSOR_NAME_MAX_BYTES bytes of UTF-8, NUL padded
+#     state    two copies (A/B), each seq, last log time, flags, rule
+#              digest and rule bits, crc32
+#     readings ring of seq, ts, temperature, humidity, crc32
+#
+# State updates go to the older copy, so the newer one stays intact if
+# the write is torn; readers take the newest copy whose crc matches.
+# Reading slots are checked the same way, and a bad slot is skipped.
+
+MAGIC = b"PTSN"
+VERSION = 2
+
+HEADER = struct.Struct("<4sIII")
+NAME = struct.Struct(f"<{SENSOR_NAME_MAX_BYTES}s")
+STATE = struct.Struct("<QdBBBBIQI")
+READING = struct.Struct("<QdddI")
+
+FLAGS = ("alert_sent_high", "alert_sent_low", "trend_alert_high", "trend_alert_low")
+
+def section_size(capacity):
+    return NAME.size + 2 * STATE.size + capacity * READING.size
+
+def file_size(sensor_count, capacity):
+    return HEADER.size + sensor_count * section_size(capacity)
+
+def checksum(record):
+    # Every record ends in a crc32 of the bytes before it.
+    return zlib.crc32(record[:-4])
+
+def pack_state(seq, last_log_time, flags, rules_digest, rule_flags):
+    record = STATE.pack(seq, last_log_time, *flags, rules_digest, rule_flags, 0)
+    return STATE.pack(seq, last_log_time, *flags, rules_digest, rule_flags, checksum(record))
+
+def pack_reading(seq, ts, temperature, humidity):
+    record = READING.pack(seq, ts, temperature, humidity, 0)
+    return READING.pack(seq, ts, temperature, humidity, checksum(record))
+
+def parse_snapshot(buf):
+    # Returns {sensor: {"seq", "last_log_time", "flags", "readings"}}, or
+    # None if buf does not hold a snapshot this version understands.
+    if len(buf) < HEADER.size:
+        return None
+
+    magic, version, capacity, count = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or len(buf) < file_size(count, capacity):
+        return None
+
+    sensors = {}
+    for index in range(count):
+        offset = HEADER.size + index * section_size(capacity)
+        try:
+            name = NAME.unpack_from(buf, offset)[0].rstrip(b"\0").decode()
+        except UnicodeDecodeError:
+            return None
+        offset += NAME.size
+
+        state = None
+        for copy in range(2):
+            record = bytes(buf[offset + copy * STATE.size:offset + (copy + 1) * STATE.size])
+            seq, last_log_time, *flags, rules_digest, rule_flags, crc = STATE.unpack(record)
+
+            if seq and crc == checksum(record) and (state is None or seq > state[0]):
+                state = (seq, last_log_time, dict(zip(FLAGS, map(bool, flags))), rules_digest, rule_flags)
+        offset += 2 * STATE.size
+
+        readings = []
+        for slot in range(capacity):
+            record = bytes(buf[offset + slot * READING.size:offset + (slot + 1) * READING.size])
+            seq, ts, temperature, humidity, crc = READING.unpack(record)
+            if seq and crc == checksum(record):
+                readings.append((seq, ts, temperature, humidity))
+        readings.sort()
+
+        sensors[name] = {
+            "seq": state[0] if state else 0,
+            "last_log_time": state[1] if state else 0,
+            "flags": state[2] if state else dict.fromkeys(FLAGS, False),
+            "rules_digest": state[3] if state else 0,
+            "rule_flags": state[4] if state else 0,
+            "readings": [(ts, temperature, humidity) for _, ts, temperature, humidity in readings],
+            "reading_seq": readings[-1][0] if readings else 0
+        }
+
+    return sensors
+
+def apply_snapshot(state, entry):
+    # Restores a SensorState from a snapshot entry.
+    for flag, value in entry["flags"].items():
+        setattr(state, flag, value)
+    state._last_log_time = entry["last_log_time"]
+    state.rules_digest = entry["rules_digest"]
+    state.rule_flags = entry["rule_flags"]
+
+    for ts, temperature, humidity in entry["readings"]:
+        state.history.append(ts, temperature, humidity)
+
+class StateSnapshot:
+    def __init__(self, sensors, path=SNAPSHOT_FILE, capacity=SNAPSHOT_READINGS, flush_seconds=SNAPSHOT_FLUSH_SECONDS):
+        self.sensors = list(sensors)
+        for name in self.sensors:
+            if len(name.encode()) > NAME.size:
+                raise ValueError(f"Sensor name {name!r} does not fit the snapshot ({NAME.size} bytes max)")
+
+        self.path = path
+        self.capacity = capacity
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._offsets = {
+            name: HEADER.size + index * section_size(capacity) for index, name in enumerate(self.sensors)
+        }
+        self._state_seq = {}
+        self._reading_seq = {}
+        self._saved = {}
+
+        restored = self._open()
+        for name in self.sensors:
+            entry = restored.get(name)
+            self._state_seq[name] = entry["seq"] if entry else 0
+            self._reading_seq[name] = entry["reading_seq"] if entry else 0
+
+        self.restored = restored
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        size = file_size(len(self.sensors), self.capacity)
+        restored = {}
+        existing_size = 0
+
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+            restored = parse_snapshot(data) or {}
+            existing_size = len(data)
+        except FileNotFoundError:
+            pass
+
+        layout_matches = list(restored) == self.sensors and existing_size == size
+        if not layout_matches:
+            # First run, or the sensors or capacity changed: lay the file
+            # out afresh, carrying over whatever matches by sensor name,
+            # and swap it in atomically.
+            self.mm = bytearray(size)
+            HEADER.pack_into(self.mm, 0, MAGIC, VERSION, self.capacity, len(self.sensors))
+            for name, offset in self._offsets.items():
+                NAME.pack_into(self.mm, offset, name.encode())
+
+            for name, entry in restored.items():
+                if name not in self.sensors:
+                    continue
+
+                entry["readings"] = entry["readings"][-self.capacity:]
+                entry["seq"] = 1
+                entry["reading_seq"] = len(entry["readings"])
+
+                self._write_state(name, 1, entry)
+                for seq, reading in enumerate(entry["readings"], start=1):
+                    self._write_reading(name, seq, *reading)
+
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as file:
+                file.write(self.mm)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+
+            if restored:
+                print("[SNAPSHOT] Sensor layout changed; state carried over by sensor name.")
+
+        self.file = open(self.path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), size)
+
+        return {name: entry for name, entry in restored.items() if name in self.sensors}
+
+    def _write_state(self, name, seq, entry):
+        offset = self._offsets[name] + NAME.size + (seq % 2) * STATE.size
+        self.mm[offset:offset + STATE.size] = pack_state(
+            seq,
+            entry["last_log_time"],
+            [entry["flags"][flag] for flag in FLAGS],
+            entry["rules_digest"],
+            entry["rule_flags"]
+        )
+
+    def _write_reading(self, name, seq, ts, temperature, humidity):
+        offset = self._offsets[name] + NAME.size + 2 * STATE.size + (seq % self.capacity) * READING.size
+        self.mm[offset:offset + READING.size] = pack_reading(seq, ts, temperature, humidity)
+
+    def restore(self, states):
+        # Seeds SensorStates from the previous run.
+        for name, entry in self.restored.items():
+            if name in states:
+                apply_snapshot(states[name], entry)
+
+        if self.restored:
+            count = sum(len(entry["readings"]) for entry in self.restored.values())
+            print(f"[SNAPSHOT] Restored alert state and {count} readings from {self.path}")
+
+    def record_reading(self, name, ts, temperature, humidity):
+        with self._lock:
+            seq = self._reading_seq[name] + 1
+            self._write_reading(name, seq, ts, temperature, humidity)
+            self._reading_seq[name] = seq
+
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush()
+
+    def save_state(self, state):
+        # Called after every reading; only writes when something changed.
+        entry = {
+            "last_log_time": state._last_log_time,
+            "flags": {flag: getattr(state, flag) for flag in FLAGS},
+            "rules_digest": state.rules_digest,
+            "rule_flags": state.rule_flags
+        }
+        current = (entry["last_log_time"], tuple(entry["flags"].values()), state.rules_digest, state.rule_flags)
+
+        with self._lock:
+            if self._saved.get(state.name) == current:
+                return
+
+            seq = self._state_seq[state.name] + 1
+            self._write_state(state.name, seq, entry)
+            self._state_seq[state.name] = seq
+            self._saved[state.name] = current
+            self._flush()
+
+    def _flush(self):
+        self.mm.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self.mm.closed:
+                return
+            self._flush()
+            self.mm.close()
+            self.file.close()
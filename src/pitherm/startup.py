@@ -0,0 +1,72 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from src.pitherm.metrics import REGISTRY
+
+# Modules that are slow to import on a Pi and are meant to load on first
+# use. Any of them showing up before the first reading is a regression.
+DEFERRED_MODULES = ("openpyxl", "requests", "smtplib", "email.mime", "numpy")
+
+STARTUP_SECONDS = REGISTRY.gauge(
+    "pitherm_startup_stage_seconds",
+    "Time spent in each startup stage of the last launch.",
+    labels=("stage",)
+)
+
+class StartupTimer:
+    # Collects how long each startup stage took and prints a breakdown
+    # once the first reading arrives. Stages may be recorded from several
+    # threads, e.g. while the hardware initializes in parallel.
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self.first_reading = None
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.stages.append((name, seconds))
+        STARTUP_SECONDS.set(round(seconds, 4), name)
+
+    def loaded_deferred_modules(self):
+        return [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    def on_reading(self, sensor, ts, temperature, humidity):
+        # Monitor listener; reports once, on the first reading.
+        if self.first_reading is not None:
+            return
+
+        with self._lock:
+            if self.first_reading is not None:
+                return
+            self.first_reading = self.elapsed()
+
+        STARTUP_SECONDS.set(round(self.first_reading, 4), "first_reading")
+        self.report()
+
+    def report(self):
+        with self._lock:
+            stages = list(self.stages)
+
+        print(f"[STARTUP] First reading {self.first_reading:.3f}s after launch:")
+        for name, seconds in stages:
+            print(f"[STARTUP]   {name:<20} {seconds * 1000:8.1f} ms")
+
+        loaded = self.loaded_deferred_modules()
+        if loaded:
+            print("[STARTUP] Loaded before the first reading: " + ", ".join(loaded))
+
+STARTUP = StartupTimer()
@@ -0,0 +1,172 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from src.pitherm.config import DEFAULT_SENSOR
+from src.pitherm.archive import iter_readings, ARCHIVE_EXT
+
+STORE_PATH = os.path.join("logs", "pitherm.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    ts INTEGER NOT NULL,
+    sensor TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    humidity REAL NOT NULL,
+    PRIMARY KEY (sensor, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings (ts);
+"""
+
+class ReadingStore:
+    def __init__(self, path=STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def insert(self, ts, temp, hum, sensor=DEFAULT_SENSOR):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO readings (ts, sensor, temperature, humidity) VALUES (?, ?, ?, ?)",
+                (int(ts), sensor, temp, hum)
+            )
+
+    def insert_many(self, rows):
+        # rows are (ts, sensor, temperature, humidity); duplicates are ignored
+        # so importers can be re-run safely.
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO readings (ts, sensor, temperature, humidity) VALUES (?, ?, ?, ?)",
+                ((int(ts), sensor, temp, hum) for ts, sensor, temp, hum in rows)
+            )
+            return cursor.rowcount
+
+    def query(self, start, end, sensor=None, limit=None):
+        sql = "SELECT ts, sensor, temperature, humidity FROM readings WHERE ts BETWEEN ? AND ?"
+        params = [int(start), int(end)]
+
+        if sensor:
+            sql += " AND sensor = ?"
+            params.append(sensor)
+        sql += " ORDER BY ts"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def aggregate(self, start, end, sensor=None, bucket_seconds=None):
+        group = "sensor"
+        select = "sensor"
+
+        if bucket_seconds:
+            select = f"(ts / {int(bucket_seconds)}) * {int(bucket_seconds)} AS bucket, sensor"
+            group = "bucket, sensor"
+
+        sql = f"""
+            SELECT {select}, COUNT(*), MIN(temperature), MAX(temperature), AVG(temperature),
+                   MIN(humidity), MAX(humidity), AVG(humidity)
+            FROM readings WHERE ts BETWEEN ? AND ?
+        """
+        params = [int(start), int(end)]
+
+        if sensor:
+            sql += " AND sensor = ?"
+            params.append(sensor)
+        sql += f" GROUP BY {group} ORDER BY {group}"
+
+        keys = (["bucket"] if bucket_seconds else []) + [
+            "sensor", "count", "temp_min", "temp_max", "temp_mean", "hum_min", "hum_max", "hum_mean"
+        ]
+
+        with self._lock:
+            return [dict(zip(keys, row)) for row in self._conn.execute(sql, params)]
+
+    def extent(self):
+        with self._lock:
+            return self._conn.execute("SELECT MIN(ts), MAX(ts), COUNT(*) FROM readings").fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def parse_date_time(date_value, time_value):
+    if isinstance(date_value, datetime):
+        date_value = date_value.strftime("%Y-%m-%d")
+    if not isinstance(time_value, str):
+        time_value = time_value.strftime("%H:%M:%S")
+    return datetime.strptime(f"{date_value} {time_value}", "%Y-%m-%d %H:%M:%S")
+
+def iter_workbook(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb["Monthly Readings"] if "Monthly Readings" in wb.sheetnames else wb.active
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            if not row or row[0] is None or row[2] is None:
+                continue
+            try:
+                when = parse_date_time(row[0], row[1])
+                sensor = row[4] if len(row) > 4 and row[4] else DEFAULT_SENSOR
+                yield when.timestamp(), sensor, float(row[2]), float(row[3])
+            except (TypeError, ValueError):
+                continue
+    finally:
+        wb.close()
+
+def iter_fallback_csv(path):
+    with open(path, mode="r", newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+
+        for row in reader:
+            if len(row) < 4:
+                continue
+            try:
+                when = parse_date_time(row[0], row[1])
+                sensor = row[4] if len(row) > 4 and row[4] else DEFAULT_SENSOR
+                yield when.timestamp(), sensor, float(row[2]), float(row[3])
+            except ValueError:
+                continue
+
+def iter_journal_rows(path):
+    for when, temp, hum, sensor in iter_readings(path):
+        yield when.timestamp(), sensor, temp, hum
+
+def import_logs(store, directories):
+    imported = 0
+    start = time.perf_counter()
+
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+
+        for file in sorted(os.listdir(directory)):
+            path = os.path.join(directory, file)
+
+            if file.startswith("temp_log_") and file.endswith(".xlsx"):
+                rows = iter_workbook(path)
+            elif file.startswith("temp_log_") and file.endswith((".csv", ARCHIVE_EXT)):
+                rows = iter_journal_rows(path)
+            elif file.startswith("fallback_log") and file.endswith(".csv"):
+                rows = iter_fallback_csv(path)
+            else:
+                continue
+
+            count = store.insert_many(rows)
+            imported += count
+            print(f"[IMPORT] {file}: {count} new readings")
+
+    print(f"[IMPORT] Imported {imported} readings in {time.perf_counter() - start:.1f}s")
+    return imported
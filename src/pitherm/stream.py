@@ -0,0 +1,247 @@
+import os
+import queue
+import socket
+import struct
+import threading
+from collections import deque
+from src.pitherm.config import STREAM_CLIENT_QUEUE, STREAM_REPLAY_MAX, STREAM_SEND_TIMEOUT_SECONDS
+from src.pitherm.metrics import REGISTRY
+
+# Wire format (all integers big-endian):
+#
+#   client -> server, once after connecting:
+#       uint16 number of past readings to replay (0 for live only)
+#
+#   server -> client, one frame per reading:
+#       uint16 length of the rest of the frame
+#       uint32 sequence number
+#       float64 unix timestamp
+#       float32 temperature (°C)
+#       float32 humidity (%)
+#       sensor name, utf-8 (the remaining bytes)
+#
+# A subscriber whose queue fills up (it is not reading fast enough) is
+# disconnected; it can reconnect and ask for a replay to catch up.
+
+FRAME_HEADER = struct.Struct(">H")
+FRAME_BODY = struct.Struct(">Idff")
+HELLO = struct.Struct(">H")
+HELLO_TIMEOUT_SECONDS = 2
+
+STREAM_SUBSCRIBERS = REGISTRY.gauge("pitherm_stream_subscribers", "Connected live-stream subscribers.")
+STREAM_FRAMES = REGISTRY.counter("pitherm_stream_frames_total", "Reading frames sent to subscribers.")
+STREAM_DROPS = REGISTRY.counter(
+    "pitherm_stream_dropped_subscribers_total",
+    "Subscribers disconnected for falling behind."
+)
+
+def encode_frame(seq, ts, temperature, humidity, sensor):
+    body = FRAME_BODY.pack(seq, ts, temperature, humidity) + sensor.encode()
+    return FRAME_HEADER.pack(len(body)) + body
+
+def decode_frame(body):
+    seq, ts, temperature, humidity = FRAME_BODY.unpack_from(body)
+    return {
+        "seq": seq,
+        "ts": ts,
+        "temperature": round(temperature, 2),
+        "humidity": round(humidity, 2),
+        "sensor": body[FRAME_BODY.size:].decode()
+    }
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def read_frames(sock):
+    # Client side: yields decoded readings until the server closes.
+    while True:
+        header = _recv_exact(sock, FRAME_HEADER.size)
+        if header is None:
+            return
+        body = _recv_exact(sock, FRAME_HEADER.unpack(header)[0])
+        if body is None:
+            return
+        yield decode_frame(body)
+
+def subscribe(address, replay=0):
+    # address is a Unix socket path or a (host, port) tuple.
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(address)
+    sock.sendall(HELLO.pack(replay))
+    return sock
+
+class Subscriber:
+    def __init__(self, sock, name, queue_size):
+        self.sock = sock
+        self.name = name
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+class StreamServer:
+    def __init__(
+        self,
+        unix_path=None,
+        tcp_address=None,
+        queue_size=STREAM_CLIENT_QUEUE,
+        replay_max=STREAM_REPLAY_MAX,
+        send_timeout=STREAM_SEND_TIMEOUT_SECONDS
+    ):
+        self.unix_path = unix_path
+        self.tcp_address = tcp_address
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.stats = {"published": 0, "subscribers_total": 0, "dropped": 0}
+
+        self._history = deque(maxlen=replay_max)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._listeners = []
+
+    def start(self):
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.remove(self.unix_path)
+            os.makedirs(os.path.dirname(self.unix_path) or ".", exist_ok=True)
+            self._listen(socket.AF_UNIX, self.unix_path, self.unix_path)
+
+        if self.tcp_address:
+            host, port = self.tcp_address
+            self._listen(socket.AF_INET, self.tcp_address, f"{host}:{port}")
+
+    def _listen(self, family, address, label):
+        server = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            if family == socket.AF_INET:
+                server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(address)
+            server.listen()
+        except OSError as e:
+            server.close()
+            print(f"[WARN] Stream server could not bind {label}:", e)
+            return
+
+        self._listeners.append(server)
+        threading.Thread(target=self._accept, args=(server,), name=f"stream-accept-{label}", daemon=True).start()
+        print(f"[OK] Live readings streamed on {label}")
+
+    def _accept(self, server):
+        while True:
+            try:
+                sock, address = server.accept()
+            except OSError:
+                return
+
+            name = f"{address[0]}:{address[1]}" if isinstance(address, tuple) else "unix"
+            threading.Thread(target=self._serve, args=(sock, name), name="stream-client", daemon=True).start()
+
+    def _serve(self, sock, name):
+        try:
+            sock.settimeout(HELLO_TIMEOUT_SECONDS)
+            hello = _recv_exact(sock, HELLO.size)
+            replay = HELLO.unpack(hello)[0] if hello else 0
+        except (OSError, socket.timeout):
+            replay = 0
+
+        sock.settimeout(self.send_timeout)
+        subscriber = Subscriber(sock, name, self.queue_size)
+
+        # The replay snapshot and registration happen together, so no
+        # reading is missed or sent twice.
+        with self._lock:
+            backlog = list(self._history)[-replay:] if replay else []
+            self._subscribers.add(subscriber)
+            self.stats["subscribers_total"] += 1
+            STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+        print(f"[STREAM] Subscriber connected ({name}, replay {len(backlog)}).")
+
+        try:
+            if backlog:
+                sock.sendall(b"".join(backlog))
+                STREAM_FRAMES.inc(amount=len(backlog))
+
+            while not subscriber.closed:
+                frame = subscriber.queue.get()
+                if frame is None:
+                    break
+                sock.sendall(frame)
+                STREAM_FRAMES.inc()
+        except OSError:
+            pass
+        finally:
+            self._remove(subscriber)
+            sock.close()
+            print(f"[STREAM] Subscriber disconnected ({name}).")
+
+    def _remove(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        subscriber.closed = True
+
+    def publish(self, sensor, ts, temperature, humidity):
+        with self._lock:
+            self._seq += 1
+            frame = encode_frame(self._seq, ts, temperature, humidity, sensor)
+            self._history.append(frame)
+            self.stats["published"] += 1
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(frame)
+            except queue.Full:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        print(f"[STREAM] Subscriber {subscriber.name} fell behind, disconnecting.")
+        self.stats["dropped"] += 1
+        STREAM_DROPS.inc()
+        self._disconnect(subscriber)
+
+    def _disconnect(self, subscriber):
+        self._remove(subscriber)
+
+        # Replace whatever is queued with the stop sentinel, and shut the
+        # socket down for a writer blocked in sendall.
+        while True:
+            try:
+                subscriber.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscriber.queue.put_nowait(None)
+
+        try:
+            subscriber.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "subscribers": len(self._subscribers)}
+
+    def stop(self):
+        for server in self._listeners:
+            try:
+                # Wakes the thread blocked in accept().
+                server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            server.close()
+        self._listeners = []
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._disconnect(subscriber)
+
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
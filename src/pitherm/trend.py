@@ -0,0 +1,92 @@
+from src.pitherm.config import (
+    TREND_WINDOW_SECONDS,
+    TREND_LEAD_SECONDS,
+    TREND_MIN_POINTS,
+    TREND_MIN_R2,
+    TREND_MIN_SLOPE_PER_HOUR
+)
+from src.pitherm.history import NUMPY_AVAILABLE, load_numpy
+
+def fit_line(timestamps, values):
+    # Least-squares line through the points. Returns (slope per second,
+    # fitted value at the last timestamp, r squared) or None.
+    count = len(values)
+    if count < 2:
+        return None
+
+    if NUMPY_AVAILABLE:
+        numpy = load_numpy()
+        x = numpy.frombuffer(timestamps, dtype=numpy.float64)
+        y = numpy.frombuffer(values, dtype=numpy.float64)
+        x = x - x[-1]
+        x_mean, y_mean = x.mean(), y.mean()
+        dx, dy = x - x_mean, y - y_mean
+        sxx, sxy, syy = float(dx @ dx), float(dx @ dy), float(dy @ dy)
+    else:
+        last = timestamps[-1]
+        x_mean = sum(ts - last for ts in timestamps) / count
+        y_mean = sum(values) / count
+        sxx = sxy = syy = 0.0
+        for ts, value in zip(timestamps, values):
+            dx, dy = ts - last - x_mean, value - y_mean
+            sxx += dx * dx
+            sxy += dx * dy
+            syy += dy * dy
+
+    if sxx == 0:
+        return None
+
+    slope = sxy / sxx
+    # x is relative to the last timestamp, so the fitted value there is
+    # the intercept.
+    fitted = y_mean - slope * x_mean
+    r2 = (sxy * sxy) / (sxx * syy) if syy else 1.0
+    return slope, fitted, r2
+
+class TrendDetector:
+    # Projects the recent temperature trend and reports how long until
+    # it crosses a threshold. Fits that are too short, too noisy (low r²)
+    # or too flat are ignored so sensor jitter does not cause warnings.
+
+    def __init__(
+        self,
+        window_seconds=TREND_WINDOW_SECONDS,
+        lead_seconds=TREND_LEAD_SECONDS,
+        min_points=TREND_MIN_POINTS,
+        min_r2=TREND_MIN_R2,
+        min_slope_per_hour=TREND_MIN_SLOPE_PER_HOUR
+    ):
+        self.window_seconds = window_seconds
+        self.lead_seconds = lead_seconds
+        self.min_points = min_points
+        self.min_r2 = min_r2
+        self.min_slope = min_slope_per_hour / 3600
+
+    def forecast(self, history):
+        timestamps, values = history.window(self.window_seconds, "temperature")
+        if len(values) < self.min_points:
+            return None
+
+        fit = fit_line(timestamps, values)
+        if fit is None:
+            return None
+
+        slope, fitted, r2 = fit
+        if r2 < self.min_r2 or abs(slope) < self.min_slope:
+            return None
+
+        return {"slope_per_hour": slope * 3600, "fitted": fitted, "r2": r2, "points": len(values)}
+
+    def seconds_until(self, forecast, threshold):
+        # None when the trend is not heading towards the threshold.
+        if forecast is None:
+            return None
+
+        slope = forecast["slope_per_hour"] / 3600
+        distance = threshold - forecast["fitted"]
+
+        if distance == 0:
+            return 0.0
+        if (distance > 0) != (slope > 0):
+            return None
+        return distance / slope
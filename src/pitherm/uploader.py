@@ -0,0 +1,221 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from src.pitherm.metrics import UPLOAD_FAILURES
+from src.pitherm.watchdog import WATCHDOG
+
+FEEDS = ("temperature", "humidity")
+SPOOL_FILE = os.path.join("logs", "spool", "adafruit_spool.jsonl")
+
+class AdafruitUploader:
+    def __init__(
+        self,
+        username,
+        key,
+        base_url="https://io.adafruit.com",
+        batch_size=10,
+        flush_seconds=60,
+        queue_size=1000,
+        timeout=5,
+        spool_path=SPOOL_FILE
+    ):
+        self.username = username
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.timeout = timeout
+        self.spool_path = spool_path
+
+        # Deferred until the first upload; requests is slow to import.
+        import requests
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "X-AIO-Key": key,
+            "Content-Type": "application/json"
+        })
+
+        self.stats = {
+            "points_sent": 0,
+            "batches_sent": 0,
+            "send_failures": 0,
+            "dropped": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "spool_depth": len(self._read_spool()),
+            "last_send_latency": None
+        }
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def feed_url(self, feed):
+        return f"{self.base_url}/api/v2/{self.username}/feeds/{feed}/data/batch"
+
+    def submit(self, temp, hum, when=None, feed_prefix=""):
+        created_at = (when or datetime.now(timezone.utc)).isoformat()
+        records = [
+            {"feed": f"{feed_prefix}{feed}", "value": value, "created_at": created_at}
+            for feed, value in zip(FEEDS, (temp, hum))
+        ]
+
+        try:
+            self.queue.put_nowait(records)
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        return stats
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="adafruit-uploader", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+
+        if self._thread:
+            self._thread.join(timeout)
+
+        self.session.close()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=min(remaining, 1)))
+            except queue.Empty:
+                continue
+
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            with WATCHDOG.busy("adafruit_upload"):
+                self._flush(batch)
+
+        self._flush(self._drain())
+
+    def _flush(self, batch):
+        records = [record for point in batch for record in point]
+
+        # Anything already spooled goes first so the feeds stay in order.
+        if records and os.path.exists(self.spool_path):
+            self._spool(records)
+            records = []
+
+        failed = self._send_records(records)
+
+        if failed:
+            self._spool(failed)
+        elif os.path.exists(self.spool_path):
+            self._replay_spool()
+
+    def _send_records(self, records):
+        failed = []
+
+        feeds = {}
+        for record in records:
+            feeds.setdefault(record["feed"], []).append(record)
+
+        for feed, points in feeds.items():
+            feed_failed = False
+
+            for i in range(0, len(points), self.batch_size):
+                chunk = points[i:i + self.batch_size]
+                if feed_failed or not self._post(feed, chunk):
+                    feed_failed = True
+                    failed.extend(chunk)
+
+        return failed
+
+    def _post(self, feed, records):
+        data = [{"value": r["value"], "created_at": r["created_at"]} for r in records]
+        start = time.monotonic()
+
+        try:
+            res = self.session.post(self.feed_url(feed), json={"data": data}, timeout=self.timeout)
+            self.stats["last_send_latency"] = time.monotonic() - start
+
+            if 200 <= res.status_code < 300:
+                self.stats["points_sent"] += len(records)
+                self.stats["batches_sent"] += 1
+                return True
+
+            print(f"[WARN] Adafruit error ({res.status_code}): {res.text}")
+
+        except Exception as err:
+            print("[ERROR] Adafruit exception:", err)
+
+        self.stats["send_failures"] += 1
+        UPLOAD_FAILURES.inc()
+        return False
+
+    def _read_spool(self):
+        if not os.path.exists(self.spool_path):
+            return []
+
+        records = []
+        with open(self.spool_path, "r") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def _spool(self, records):
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+
+        with open(self.spool_path, "a") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+
+        self.stats["spooled"] += len(records)
+        self.stats["spool_depth"] += len(records)
+        print(f"[SPOOL] Stored {len(records)} Adafruit points offline.")
+
+    def _replay_spool(self):
+        records = self._read_spool()
+        failed = self._send_records(records)
+        self.stats["replayed"] += len(records) - len(failed)
+        self.stats["spool_depth"] = len(failed)
+
+        if failed:
+            tmp_path = self.spool_path + ".tmp"
+            with open(tmp_path, "w") as file:
+                for record in failed:
+                    file.write(json.dumps(record) + "\n")
+            os.replace(tmp_path, self.spool_path)
+        else:
+            os.remove(self.spool_path)
+            print(f"[SPOOL] Replayed {len(records)} Adafruit points.")
@@ -0,0 +1,284 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from src.pitherm.config import WATCHDOG_CHECK_SECONDS, WATCHDOG_HISTORY, WATCHDOG_DEADLINES
+from src.pitherm.metrics import REGISTRY
+
+STALL_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+WATCHDOG_STALLS = REGISTRY.counter(
+    "pitherm_watchdog_stalls_total",
+    "Components that missed their watchdog deadline.",
+    labels=("component",)
+)
+WATCHDOG_STALL_SECONDS = REGISTRY.histogram(
+    "pitherm_watchdog_stall_seconds",
+    "How long a component went without reporting in, per stall.",
+    labels=("component",),
+    buckets=STALL_BUCKETS
+)
+WATCHDOG_RESTARTS = REGISTRY.counter(
+    "pitherm_watchdog_restarts_total",
+    "Worker threads the watchdog found dead and restarted.",
+    labels=("component",)
+)
+WATCHDOG_STALLED = REGISTRY.gauge(
+    "pitherm_watchdog_stalled",
+    "1 while a component is past its watchdog deadline.",
+    labels=("component",)
+)
+
+def sd_notify(message):
+    # sd_notify(3) without libsystemd: one datagram to $NOTIFY_SOCKET.
+    # Does nothing when the process was not started by systemd.
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(message.encode())
+        return True
+    except OSError as e:
+        print("[WARN] sd_notify failed:", e)
+        return False
+
+def systemd_watchdog_interval():
+    # Seconds between WATCHDOG=1 pings (half of WatchdogSec=), or None if
+    # the systemd watchdog is off for this process.
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+
+    try:
+        if not usec or (pid and int(pid) != os.getpid()):
+            return None
+        return int(usec) / 1e6 / 2
+    except ValueError:
+        return None
+
+class Component:
+    # periodic components must beat() at least once per deadline; the
+    # others only count while inside busy(), so an idle worker waiting
+    # for work is not a stall. worker is an object with is_alive() and
+    # start(), restarted if its thread dies.
+
+    def __init__(self, name, deadline, critical=False, periodic=False, worker=None):
+        self.name = name
+        self.deadline = deadline
+        self.critical = critical
+        self.periodic = periodic
+        self.worker = worker
+        self.last = time.monotonic()
+        self.active = {}
+        self.stalled_since = None
+        self.restarts = 0
+
+    def since(self):
+        # Start of the period the deadline applies to, or None when idle.
+        if self.periodic:
+            return self.last
+        return min(self.active.values()) if self.active else None
+
+    def overdue(self, now):
+        since = self.since()
+        return since is not None and now - since > self.deadline
+
+class Watchdog:
+    def __init__(self, check_seconds=WATCHDOG_CHECK_SECONDS, history=WATCHDOG_HISTORY):
+        self.check_seconds = check_seconds
+        self.notify_interval = systemd_watchdog_interval()
+        self.components = {}
+        self.stalls = deque(maxlen=history)
+        self._healthy = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, deadline=None, critical=False, periodic=False, worker=None):
+        if deadline is None:
+            deadline = WATCHDOG_DEADLINES.get(name, WATCHDOG_DEADLINES["default"])
+
+        with self._lock:
+            self.components[name] = Component(name, deadline, critical, periodic, worker)
+        WATCHDOG_STALLED.set(0, name)
+
+    def unregister(self, name):
+        with self._lock:
+            self.components.pop(name, None)
+
+    def beat(self, name):
+        # Unregistered names are ignored, so instrumented code runs the
+        # same in processes without a watchdog.
+        component = self.components.get(name)
+        if component is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            component.last = now
+            if component.stalled_since is not None:
+                self._recovered(component, now)
+
+    @contextmanager
+    def busy(self, name):
+        component = self.components.get(name)
+        if component is None:
+            yield
+            return
+
+        token = object()
+        with self._lock:
+            component.active[token] = time.monotonic()
+
+        try:
+            yield
+        finally:
+            now = time.monotonic()
+            with self._lock:
+                component.active.pop(token, None)
+                component.last = now
+                if component.stalled_since is not None and not component.overdue(now):
+                    self._recovered(component, now)
+
+    def _recovered(self, component, now):
+        seconds = now - component.stalled_since
+        component.stalled_since = None
+
+        WATCHDOG_STALL_SECONDS.observe(seconds, component.name)
+        WATCHDOG_STALLED.set(0, component.name)
+        self.stalls.append({
+            "component": component.name,
+            "started": round(time.time() - seconds),
+            "seconds": round(seconds, 1),
+            "event": "stall"
+        })
+        print(f"[WATCHDOG] {component.name} recovered after {seconds:.1f}s.")
+
+    def check(self):
+        # One pass over the components. Returns False while a critical
+        # component is stalled.
+        now = time.monotonic()
+        restart = []
+
+        with self._lock:
+            for component in self.components.values():
+                worker = component.worker
+                if worker is not None and not worker.is_alive():
+                    restart.append(component)
+                    continue
+
+                if component.stalled_since is None and component.overdue(now):
+                    component.stalled_since = component.since()
+                    WATCHDOG_STALLS.inc(component.name)
+                    WATCHDOG_STALLED.set(1, component.name)
+
+                    kind = "no heartbeat" if component.periodic else "busy"
+                    print(
+                        f"[WATCHDOG] {component.name} stalled: {kind} for {now - component.stalled_since:.0f}s "
+                        f"(deadline {component.deadline}s)."
+                    )
+
+            stalled = [c.name for c in self.components.values() if c.critical and c.stalled_since is not None]
+
+        for component in restart:
+            self._restart(component)
+
+        healthy = not stalled
+        if healthy != self._healthy:
+            self._healthy = healthy
+            if healthy:
+                sd_notify("STATUS=Running")
+            else:
+                sd_notify("STATUS=Stalled: " + ", ".join(stalled))
+                if self.notify_interval is not None:
+                    print("[WATCHDOG] Withholding the systemd watchdog ping until it recovers.")
+
+        return healthy
+
+    def _restart(self, component):
+        # A dead thread leaves no active call behind, so its stall ends
+        # here; the outage is bounded by the check interval.
+        component.restarts += 1
+        WATCHDOG_RESTARTS.inc(component.name)
+        self.stalls.append({
+            "component": component.name,
+            "started": round(time.time()),
+            "seconds": None,
+            "event": "restart"
+        })
+        print(f"[WATCHDOG] {component.name} thread died. Restarting it.")
+
+        try:
+            component.worker.start()
+        except Exception as e:
+            print(f"[ERROR] Could not restart {component.name}:", e)
+
+        with self._lock:
+            component.active.clear()
+            component.last = time.monotonic()
+            if component.stalled_since is not None:
+                self._recovered(component, component.last)
+
+    def status(self):
+        now = time.monotonic()
+
+        with self._lock:
+            components = {
+                name: {
+                    "stalled": component.stalled_since is not None,
+                    "idle_seconds": round(now - component.last, 1),
+                    "deadline": component.deadline,
+                    "restarts": component.restarts
+                }
+                for name, component in self.components.items()
+            }
+            stalls = list(self.stalls)
+
+        return {"components": components, "recent_stalls": stalls}
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+        sd_notify("READY=1")
+        if self.notify_interval is not None:
+            sd_notify("WATCHDOG=1")
+            print(f"[WATCHDOG] systemd watchdog active, pinging every {self.notify_interval:g}s.")
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        sd_notify("STOPPING=1")
+
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        interval = self.check_seconds
+        if self.notify_interval is not None:
+            interval = min(interval, self.notify_interval)
+
+        while not self._stop.wait(interval):
+            try:
+                healthy = self.check()
+            except Exception as e:
+                print("[ERROR] Watchdog check failed:", e)
+                continue
+
+            if healthy and self.notify_interval is not None:
+                sd_notify("WATCHDOG=1")
+
+WATCHDOG = Watchdog()
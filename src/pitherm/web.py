@@ -0,0 +1,297 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from src.pitherm.config import (
+    WEB_CHART_POINTS,
+    WEB_MAX_CHART_POINTS,
+    WEB_CACHE_ENTRIES,
+    WEB_SSE_MAX_CLIENTS,
+    WEB_SSE_QUEUE
+)
+from src.pitherm.downsample import lttb, minmax_buckets
+from src.pitherm.metrics import REGISTRY
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+RANGE_UNITS = {"m": 60, "h": 3600, "d": 86400}
+SSE_KEEPALIVE_SECONDS = 15
+# Below three points lttb() hands back every raw row.
+MIN_CHART_POINTS = 3
+
+WEB_CACHE_HITS = REGISTRY.counter("pitherm_web_cache_total", "Dashboard history requests by cache result.", labels=("result",))
+WEB_SSE_CLIENTS = REGISTRY.gauge("pitherm_web_sse_clients", "Connected dashboard event streams.")
+
+def parse_range(value):
+    match = re.fullmatch(r"(\d+)([mhd])", value or "")
+    if not match:
+        raise ValueError(f"Invalid range: {value}")
+    return int(match.group(1)) * RANGE_UNITS[match.group(2)]
+
+def compact(points):
+    # Whole-second timestamps and two decimals keep month-long responses
+    # small for the Pi's uplink.
+    return [[int(point[0])] + [round(value, 2) for value in point[1:]] for point in points]
+
+class HistoryCache:
+    # LRU of rendered history responses keyed by (range, points, sensor,
+    # mode). Entries expire after the source tier's bucket length, since
+    # the data cannot change faster than that.
+
+    def __init__(self, max_entries=WEB_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, body, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class WebDashboard:
+    def __init__(self, monitor, chart_points=WEB_CHART_POINTS):
+        self.monitor = monitor
+        self.chart_points = chart_points
+        self.cache = HistoryCache()
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def latest(self):
+        sensors = {}
+        for name, state in self.monitor.states.items():
+            latest = state.history.latest()
+            sensors[name] = {
+                "ts": latest[0] if latest else None,
+                "temperature": latest[1] if latest else None,
+                "humidity": latest[2] if latest else None,
+                "temp_high": state.temp_high,
+                "temp_low": state.temp_low,
+                "alert": state.alert_sent_high or state.alert_sent_low,
+                "warning": state.trend_alert_high or state.trend_alert_low,
+                "rules": self.monitor.active_rules(state)
+            }
+        return {"primary": self.monitor.primary_sensor, "sensors": sensors}
+
+    def history(self, range_seconds, points, sensor, mode):
+        key = (range_seconds, points, sensor, mode)
+        body = self.cache.get(key)
+        if body is not None:
+            WEB_CACHE_HITS.inc("hit")
+            return body
+
+        WEB_CACHE_HITS.inc("miss")
+        result, ttl = self._build_history(range_seconds, points, sensor, mode)
+        body = json.dumps(result, separators=(",", ":")).encode()
+        self.cache.put(key, body, ttl)
+        return body
+
+    def _build_history(self, range_seconds, points, sensor, mode):
+        end = time.time()
+        start = end - range_seconds
+        history = self.monitor.states[sensor].history
+        oldest = history.timestamp_at(history.seq - len(history)) if len(history) else None
+
+        if oldest is not None and oldest <= start:
+            # The in-memory buffer covers the range: chart raw readings.
+            timestamps, temps = history.window(range_seconds, "temperature")
+            _, hums = history.window(range_seconds, "humidity")
+            source, ttl = "memory", 5
+            temp_rows = [(ts, value, value, value, 1) for ts, value in zip(timestamps, temps)]
+            hum_rows = [(ts, value, value, value, 1) for ts, value in zip(timestamps, hums)]
+        else:
+            # The coarsest tier that still fills the chart keeps the rows
+            # read from disk to a minimum.
+            tier, rows = self.monitor.rollups.query(start, end, sensor=sensor, max_points=points)
+            source = tier
+            ttl = min(max(self.monitor.rollups.tier(tier).seconds, 5), 300)
+            temp_rows = [
+                (row["bucket_start"], row["temp_min"], row["temp_max"], row["temp_mean"], row["count"]) for row in rows
+            ]
+            hum_rows = [
+                (row["bucket_start"], row["hum_min"], row["hum_max"], row["hum_mean"], row["count"]) for row in rows
+            ]
+
+        if mode == "minmax":
+            temperature = compact(minmax_buckets(temp_rows, points, start, end))
+            humidity = compact(minmax_buckets(hum_rows, points, start, end))
+        else:
+            temperature = compact(lttb([(row[0], row[3]) for row in temp_rows], points))
+            humidity = compact(lttb([(row[0], row[3]) for row in hum_rows], points))
+
+        result = {
+            "sensor": sensor,
+            "start": start,
+            "end": end,
+            "source": source,
+            "mode": mode,
+            "temperature": temperature,
+            "humidity": humidity
+        }
+        return result, ttl
+
+    # Server-sent events
+
+    def publish(self, sensor, ts, temperature, humidity):
+        payload = json.dumps({"sensor": sensor, "ts": ts, "temperature": temperature, "humidity": humidity})
+
+        with self._lock:
+            clients = list(self._clients)
+
+        for client in clients:
+            try:
+                client.put_nowait(payload)
+            except queue.Full:
+                # A stalled browser tab: end its stream, EventSource
+                # reconnects on its own.
+                self._unregister(client)
+                while True:
+                    try:
+                        client.get_nowait()
+                    except queue.Empty:
+                        break
+                client.put_nowait(None)
+
+    def register(self):
+        with self._lock:
+            if len(self._clients) >= WEB_SSE_MAX_CLIENTS:
+                return None
+            client = queue.Queue(maxsize=WEB_SSE_QUEUE)
+            self._clients.add(client)
+            WEB_SSE_CLIENTS.set(len(self._clients))
+            return client
+
+    def _unregister(self, client):
+        with self._lock:
+            self._clients.discard(client)
+            WEB_SSE_CLIENTS.set(len(self._clients))
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    dashboard = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path in ("/", "/index.html"):
+                self._send_file(os.path.join(STATIC_DIR, "index.html"), "text/html; charset=utf-8")
+            elif url.path == "/api/latest":
+                self._send_json(json.dumps(self.dashboard.latest()).encode())
+            elif url.path == "/api/history":
+                self._history(params)
+            elif url.path == "/api/stream":
+                self._stream()
+            else:
+                self._send_error(404, "Not found")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _history(self, params):
+        started = time.perf_counter()
+
+        try:
+            range_seconds = parse_range(params.get("range", "24h"))
+            points = int(params.get("points", self.dashboard.chart_points))
+            points = max(MIN_CHART_POINTS, min(points, WEB_MAX_CHART_POINTS))
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+
+        sensor = params.get("sensor") or self.dashboard.monitor.primary_sensor
+        mode = params.get("mode", "lttb")
+
+        if sensor not in self.dashboard.monitor.states or mode not in ("lttb", "minmax"):
+            self._send_error(400, "Unknown sensor or mode")
+            return
+
+        body = self.dashboard.history(range_seconds, points, sensor, mode)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._send_json(body, extra_headers={"Server-Timing": f"history;dur={elapsed_ms:.1f}"})
+
+    def _stream(self):
+        client = self.dashboard.register()
+        if client is None:
+            self._send_error(503, "Too many event streams")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        try:
+            self.wfile.write(b"retry: 5000\n\n")
+            while True:
+                try:
+                    payload = client.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+
+                if payload is None:
+                    break
+                self.wfile.write(f"event: reading\ndata: {payload}\n\n".encode())
+                self.wfile.flush()
+        finally:
+            self.dashboard._unregister(client)
+
+    def _send_json(self, body, extra_headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path, content_type):
+        with open(path, "rb") as file:
+            body = file.read()
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_web_dashboard(monitor, host, port):
+    dashboard = WebDashboard(monitor)
+    handler = type("BoundDashboardHandler", (DashboardHandler,), {"dashboard": dashboard})
+
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        print(f"[WARN] Web dashboard could not bind {host}:{port}:", e)
+        return None
+
+    server.daemon_threads = True
+    monitor.listeners.append(dashboard.publish)
+    threading.Thread(target=server.serve_forever, name="web-dashboard", daemon=True).start()
+    print(f"[OK] Dashboard available at http://{host}:{port}/")
+    return server
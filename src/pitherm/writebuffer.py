@@ -0,0 +1,412 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from src.pitherm.config import (
+    WRITE_FLUSH_ROWS,
+    WRITE_FLUSH_SECONDS,
+    WRITE_STAGING_DIR,
+    WRITE_MAX_PENDING_ROWS,
+    WRITE_RETRY_SECONDS
+)
+from src.pitherm.metrics import REGISTRY
+from src.pitherm.watchdog import WATCHDOG
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+WRITE_BYTES = REGISTRY.counter("pitherm_write_bytes_total", "Bytes committed to log files.")
+WRITE_FLUSHES = REGISTRY.counter("pitherm_write_flushes_total", "Group commits of buffered log rows.", labels=("reason",))
+WRITE_FAILURES = REGISTRY.counter("pitherm_write_failures_total", "Group commits that failed for at least one file.")
+WRITE_DROPPED = REGISTRY.counter(
+    "pitherm_write_dropped_rows_total",
+    "Unwritable log rows dropped once the retained backlog hit its cap."
+)
+
+class WriteBuffer:
+    # Collects appended lines for any number of files and commits them
+    # together: one write and one fsync per file per flush. A flush
+    # happens after flush_rows lines, when the oldest line is flush_seconds
+    # old, or when asked (shutdown, alerts, before a file is read).
+    #
+    # With a staging directory (tmpfs by default) every line is also
+    # appended to a staging log before it is acknowledged. On startup the
+    # staging log is replayed, so rows survive a crash or kill of the
+    # process. Before touching the target files a flush records their
+    # sizes in the staging log, which lets recovery roll back a half
+    # finished flush instead of duplicating rows.
+    #
+    # Commits run on the flusher thread, and the file I/O happens outside
+    # the lock, so append() never waits on the SD card. Rows that fail to
+    # write are kept and retried every retry_seconds, up to
+    # max_pending_rows; beyond that the oldest are dropped. The
+    # failure_listeners are called with the error when writes start
+    # failing.
+
+    def __init__(
+        self,
+        flush_rows=WRITE_FLUSH_ROWS,
+        flush_seconds=WRITE_FLUSH_SECONDS,
+        staging_dir=WRITE_STAGING_DIR,
+        max_pending_rows=WRITE_MAX_PENDING_ROWS,
+        retry_seconds=WRITE_RETRY_SECONDS
+    ):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.staging_dir = staging_dir
+        self.max_pending_rows = max_pending_rows
+        self.retry_seconds = retry_seconds
+        self.staging_path = None
+        self.name = "main"
+        self.failure_listeners = []
+        self.stats = {
+            "rows": 0,
+            "bytes_written": 0,
+            "flushes": 0,
+            "fsyncs": 0,
+            "recovered_rows": 0,
+            "failed_flushes": 0,
+            "dropped_rows": 0
+        }
+
+        self._pending = {}
+        self._pending_rows = 0
+        self._oldest = None
+        self._committing = {}
+        self._commits = 0
+        self._flush_reason = None
+        self._retry_at = None
+        self._staging = None
+        self._started = False
+        self._stop = False
+        self._thread = None
+        self._wake = threading.Condition()
+
+    def start(self, name=None):
+        # name separates the staging logs of processes sharing a directory.
+        with self._wake:
+            if self.is_alive():
+                return
+
+            # A restart after the flush thread died keeps the staging log.
+            if not self._started:
+                self._started = True
+                self.name = name or self.name
+                self._stop = False
+                self._open_staging()
+
+        self._thread = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _open_staging(self):
+        if not self.staging_dir:
+            return
+
+        # One staging log per working directory, since log paths are
+        # relative to it.
+        key = hashlib.sha1(os.getcwd().encode()).hexdigest()[:12]
+        path = os.path.join(self.staging_dir, f"pitherm-{key}-{self.name}.jsonl")
+
+        try:
+            os.makedirs(self.staging_dir, exist_ok=True)
+            staging = open(path, mode="a+")
+        except OSError as e:
+            print("[WARN] Write staging unavailable, buffering in memory only:", e)
+            return
+
+        if fcntl is not None:
+            try:
+                fcntl.flock(staging.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                staging.close()
+                print(f"[WARN] {path} is in use by another process, buffering in memory only.")
+                return
+
+        self.staging_path = path
+        self._staging = staging
+        self._recover()
+
+    def _recover(self):
+        self._staging.seek(0)
+        entries = []
+        sizes = {}
+
+        for line in self._staging:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by the crash itself.
+                continue
+            if "commit" in entry:
+                sizes = entry["commit"]
+            else:
+                entries.append(entry)
+
+        if not entries:
+            self._truncate_staging()
+            return
+
+        for path, size in sizes.items():
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, mode="r+") as file:
+                    file.truncate(size)
+
+        for entry in entries:
+            if entry.get("header") and self._is_empty(entry["path"]) and entry["path"] not in self._pending:
+                self._pending[entry["path"]] = [entry["header"]]
+            self._pending.setdefault(entry["path"], []).append(entry["line"])
+
+        self._pending_rows = len(entries)
+        self._commit("recovery")
+        self.stats["recovered_rows"] += len(entries)
+        print(f"[RECOVER] Restored {len(entries)} unflushed log rows from {self.staging_path}")
+
+    def _is_empty(self, path):
+        return not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def append(self, path, line, header=None):
+        # header is written first if the file is still empty.
+        if not self._started:
+            self.start()
+
+        path = os.path.abspath(path)
+        line = line if line.endswith("\n") else line + "\n"
+        if header is not None and not header.endswith("\n"):
+            header += "\n"
+
+        with self._wake:
+            lines = self._pending.get(path)
+            if lines is None:
+                # A file with rows in flight already has its header coming.
+                empty = path not in self._committing and self._is_empty(path)
+                header = header if header and empty else None
+                lines = self._pending[path] = [header] if header else []
+            else:
+                header = None
+
+            if self._staging is not None:
+                self._staging.write(json.dumps({"path": path, "line": line, "header": header}) + "\n")
+                self._staging.flush()
+
+            lines.append(line)
+
+            self._pending_rows += 1
+            self.stats["rows"] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+            if self._pending_rows >= self.flush_rows:
+                self._wake.notify_all()
+
+    def pending(self, path):
+        # Rows not yet on disk, including those being committed right now.
+        path = os.path.abspath(path)
+        with self._wake:
+            return self._committing.get(path, []) + self._pending.get(path, [])
+
+    def pending_paths(self):
+        with self._wake:
+            return list(dict.fromkeys([*self._committing, *self._pending]))
+
+    def flush(self, reason="manual", wait=True):
+        # Asks the flusher thread to commit now. With wait, returns once
+        # the rows pending at the time of the call have been attempted.
+        with self._wake:
+            if not self.is_alive():
+                if self._pending_rows and not self._committing:
+                    self._commit(reason)
+                return
+
+            target = self._commits + bool(self._committing) + bool(self._pending_rows)
+            if target == self._commits:
+                return
+
+            self._flush_reason = reason
+            self._wake.notify_all()
+
+            while wait and self._commits < target and self.is_alive():
+                self._wake.wait(1)
+
+    def _commit(self, reason):
+        # Called with the lock held; released while the files are written.
+        pending, self._pending = self._pending, {}
+        self._committing = pending
+        self._pending_rows = 0
+        self._oldest = None
+        self._flush_reason = None
+
+        mark = None
+        if self._staging is not None:
+            sizes = {path: os.path.getsize(path) if os.path.exists(path) else 0 for path in pending}
+            self._staging.write(json.dumps({"commit": sizes}) + "\n")
+            self._staging.flush()
+            mark = self._staging.tell()
+
+        self._wake.release()
+        try:
+            written, failed, error = self._write(pending)
+        finally:
+            self._wake.acquire()
+            self._committing = {}
+
+        self.stats["bytes_written"] += written
+        self.stats["flushes"] += 1
+        WRITE_BYTES.inc(amount=written)
+        WRITE_FLUSHES.inc(reason)
+
+        if failed:
+            self._retain(failed)
+        if self._staging is not None:
+            self._restage(mark, failed)
+
+        if failed:
+            self._failed(error)
+        elif self._retry_at is not None:
+            self._retry_at = None
+            print("[WRITE] Log writes are succeeding again.")
+
+        self._commits += 1
+        self._wake.notify_all()
+
+    def _write(self, pending):
+        written = 0
+        failed = {}
+        error = None
+
+        with WATCHDOG.busy("write_buffer"):
+            for path, lines in pending.items():
+                data = "".join(lines)
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, mode="a", newline="") as file:
+                        file.write(data)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    written += len(data.encode())
+                    self.stats["fsyncs"] += 1
+                except OSError as e:
+                    print(f"[ERROR] Buffered write to {path} failed, keeping rows:", e)
+                    failed[path] = lines
+                    error = e
+
+        return written, failed, error
+
+    def _retain(self, failed):
+        # Failed rows go back ahead of the rows appended since, up to the
+        # cap; the oldest are dropped first.
+        excess = sum(map(len, failed.values())) + self._pending_rows - self.max_pending_rows
+
+        for path, lines in failed.items():
+            if excess > 0:
+                # The first line of a still-empty file is its header.
+                keep_header = 1 if self._is_empty(path) else 0
+                dropped = min(excess, len(lines) - keep_header)
+                del lines[keep_header:keep_header + dropped]
+                excess -= dropped
+                self.stats["dropped_rows"] += dropped
+                WRITE_DROPPED.inc(amount=dropped)
+
+            self._pending[path] = lines + self._pending.get(path, [])
+            self._pending_rows += len(lines)
+
+        if self._pending_rows:
+            self._oldest = time.monotonic()
+
+    def _restage(self, mark, failed):
+        # Keeps the rows staged while the commit ran, with the failed rows
+        # ahead of them.
+        self._staging.seek(mark)
+        newer = self._staging.read()
+        self._truncate_staging()
+
+        for path, lines in failed.items():
+            for line in lines:
+                self._staging.write(json.dumps({"path": path, "line": line, "header": None}) + "\n")
+        self._staging.write(newer)
+        self._staging.flush()
+
+    def _failed(self, error):
+        self.stats["failed_flushes"] += 1
+        WRITE_FAILURES.inc()
+
+        first = self._retry_at is None
+        self._retry_at = time.monotonic() + self.retry_seconds
+        if not first:
+            return
+
+        print(f"[CRITICAL] Log writes are failing; holding up to {self.max_pending_rows} rows in memory:", error)
+        for listener in self.failure_listeners:
+            try:
+                listener(error)
+            except Exception as e:
+                print("[WARN] Write failure listener failed:", e)
+
+    def _truncate_staging(self):
+        self._staging.seek(0)
+        self._staging.truncate()
+
+    def _due(self, now):
+        # The reason for the next commit, or None if nothing is due yet.
+        if not self._pending_rows:
+            self._oldest = None
+            self._flush_reason = None
+            return None
+
+        if self._flush_reason is not None:
+            return self._flush_reason
+        if self._retry_at is not None:
+            return "retry" if now >= self._retry_at else None
+        if self._pending_rows >= self.flush_rows:
+            return "rows"
+        if now >= self._oldest + self.flush_seconds:
+            return "age"
+        return None
+
+    def _run(self):
+        with self._wake:
+            while not self._stop:
+                now = time.monotonic()
+                reason = self._due(now)
+                if reason is not None:
+                    self._commit(reason)
+                    continue
+
+                if self._oldest is None:
+                    self._wake.wait()
+                else:
+                    due = self._retry_at if self._retry_at is not None else self._oldest + self.flush_seconds
+                    self._wake.wait(max(0.0, due - now))
+
+    def get_stats(self):
+        with self._wake:
+            return {**self.stats, "pending_rows": self._pending_rows}
+
+    def close(self):
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+
+        if self._thread:
+            self._thread.join(2)
+
+        with self._wake:
+            # A commit still stuck on the SD card keeps its rows staged
+            # for the next start.
+            if self._pending_rows and not self._committing:
+                self._commit("shutdown")
+            if self._staging is not None:
+                self._staging.close()
+                self._staging = None
+            self._started = False
+
+WRITE_BUFFER = WriteBuffer()
+
+REGISTRY.gauge("pitherm_write_pending_rows", "Log rows waiting for the next group commit.").set_function(
+    lambda: WRITE_BUFFER.get_stats()["pending_rows"]
+)